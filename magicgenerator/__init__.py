@@ -0,0 +1,10 @@
+"""
+Library entry points. Importing the package has no side effects:
+no config is read and no log file is created until the CLI configures it.
+"""
+__version__ = "1.1.0"
+
+from magicgenerator.generator import DataGenerator
+from magicgenerator.parser import SchemaParser, SchemaField
+
+__all__ = ["DataGenerator", "SchemaParser", "SchemaField", "__version__"]
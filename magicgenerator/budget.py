@@ -0,0 +1,95 @@
+import argparse
+import re
+from typing import Optional, Tuple
+
+# Multipliers for the unit accepted by parse_size (case-insensitive)
+_SIZE_UNITS = {
+    "": 1, "b": 1,
+    "k": 1000, "kb": 1000, "kib": 1024,
+    "m": 1000 ** 2, "mb": 1000 ** 2, "mib": 1024 ** 2,
+    "g": 1000 ** 3, "gb": 1000 ** 3, "gib": 1024 ** 3,
+    "t": 1000 ** 4, "tb": 1000 ** 4, "tib": 1024 ** 4,
+}
+
+
+def parse_size(value: str) -> int:
+    """
+    Parses a byte size such as "1048576", "256MB", "256MiB" or "1.5G".
+    Used as an argparse `type`.
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is malformed or not > 0.
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([a-zA-Z]*)\s*", value)
+    unit = match.group(2).lower() if match else None
+    if unit not in _SIZE_UNITS:
+        raise argparse.ArgumentTypeError(
+            f"invalid size {value!r} (expected e.g. 1048576, 256MB, 1GiB)"
+        )
+    size = int(float(match.group(1)) * _SIZE_UNITS[unit])
+    if size <= 0:
+        raise argparse.ArgumentTypeError(f"size must be > 0 (got {value!r})")
+    return size
+
+
+class ByteBudget:
+    """
+    Job-wide byte budget that workers draw files from.
+
+    Each claim hands out the next file index together with a per-file
+    budget of at most `target` bytes, for at most ceil(total / target)
+    files. A file never exceeds its budget, so it usually ends a
+    partial line short; that remainder is refunded and picked up by the
+    last file where it still fits under `target` (refunds never add a
+    file of their own).
+
+    File indices start at `first_index` (to continue an existing
+    dataset). Backed by shared memory so it can be passed to pool
+    initializers.
+    """
+
+    def __init__(self, total: int, target: int, first_index: int = 0):
+        import math
+        import multiprocessing
+
+        self.target = target
+        self._end_index = first_index + math.ceil(total / target)
+        self._remaining = multiprocessing.Value("q", total)
+        self._next_index = multiprocessing.Value("q", first_index, lock=False)
+
+    def claim(self) -> Optional[Tuple[int, int]]:
+        """
+        Reserve bytes for the next file.
+
+        Returns:
+            Optional[Tuple[int, int]]: (file index, byte budget),
+            or None once the job budget is used up.
+        """
+        with self._remaining.get_lock():
+            if self._remaining.value <= 0 \
+                    or self._next_index.value >= self._end_index:
+                return None
+            budget = min(self.target, self._remaining.value)
+            self._remaining.value -= budget
+            index = self._next_index.value
+            self._next_index.value += 1
+        return index, budget
+
+    @property
+    def next_index(self) -> int:
+        """Index the next claim would get (one past the last file)."""
+        with self._remaining.get_lock():
+            return self._next_index.value
+
+    def refund(self, unused: int) -> None:
+        """Give back bytes a file reserved but did not write."""
+        with self._remaining.get_lock():
+            self._remaining.value += unused
+
+    def exhaust(self) -> None:
+        """
+        Stop handing out files, e.g. when what is left cannot hold
+        a single line.
+        """
+        with self._remaining.get_lock():
+            self._remaining.value = 0
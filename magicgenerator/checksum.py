@@ -0,0 +1,169 @@
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List
+from magicgenerator.logger import get_logger
+from magicgenerator.utils import new_file_mode
+
+logger = get_logger(__name__)
+
+# Supported --checksum algorithms
+CHECKSUMS = ("blake2b", "sha256", "crc32")
+
+# Bytes read per call when an existing file has to be hashed
+READ_CHUNK = 8 << 20
+
+
+class Checksum:
+    """
+    Running digest of a file's bytes, fed with the encoded batches as
+    they are written (hashlib releases the GIL on large buffers, and
+    one update per batch keeps the per-call overhead negligible).
+
+    Parameters:
+        algorithm (str): One of CHECKSUMS.
+    """
+
+    def __init__(self, algorithm: str):
+        if algorithm not in CHECKSUMS:
+            raise ValueError(f"unknown checksum {algorithm!r}")
+        self.algorithm = algorithm
+        self.size = 0
+        if algorithm == "crc32":
+            import zlib
+
+            self._crc32 = zlib.crc32
+            self._crc = 0
+            self._hash: Any = None
+        else:
+            import hashlib
+
+            self._hash = hashlib.new(algorithm)
+
+    def update(self, data: bytes) -> None:
+        """Add `data` to the digest."""
+        if self._hash is None:
+            self._crc = self._crc32(data, self._crc)
+        else:
+            self._hash.update(data)
+        self.size += len(data)
+
+    def hexdigest(self) -> str:
+        """Digest of everything added so far, as hex."""
+        if self._hash is None:
+            return f"{self._crc:08x}"
+        return self._hash.hexdigest()
+
+
+class ChecksumWriter:
+    """Passes writes through to `f`, adding every buffer to `checksum`."""
+
+    def __init__(self, f: Any, checksum: Checksum):
+        self._f = f
+        self.checksum = checksum
+
+    def write(self, data: bytes) -> int:
+        self.checksum.update(data)
+        return self._f.write(data)
+
+
+def hash_file(path: Path, algorithm: str) -> Checksum:
+    """
+    Checksum of the current content of `path` (used before appending,
+    where the existing bytes have to be part of the digest).
+    """
+    checksum = Checksum(algorithm)
+    with open(path, "rb") as f:
+        while buf := f.read(READ_CHUNK):
+            checksum.update(buf)
+    return checksum
+
+
+@dataclass
+class FileSum:
+    """
+    Checksum of one written file.
+
+    Attributes:
+        path:      the file
+        size:      its size in bytes
+        algorithm: one of CHECKSUMS
+        digest:    hex digest of the whole file
+    """
+    path: Path
+    size: int
+    algorithm: str
+    digest: str
+
+
+def manifest_path(output_dir: Path, base_name: str) -> Path:
+    """Manifest of the `base_name` files in `output_dir`."""
+    return output_dir / f"{base_name}.manifest.jsonl"
+
+
+def _read_manifest(path: Path) -> Dict[str, Dict[str, Any]]:
+    """Entries of an existing manifest by file name ({} if unreadable)."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return {e["path"]: e for e in map(json.loads, f)}
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning("Ignoring unreadable manifest %s: %s", path, e)
+        return {}
+
+
+def write_manifest(output_dirs: List[Path], base_name: str, algorithm: str,
+                   files: Dict[Path, int], sums: Dict[Path, FileSum]) -> None:
+    """
+    Write the manifest of every output directory: one JSON line per
+    data file with its name, size, line count and digest. Entries of
+    files not rewritten by this run are kept from the previous manifest
+    when they still match; files without a known digest are left out.
+    Written atomically (temporary file + rename).
+
+    Parameters:
+        output_dirs (List[Path]): Directories of the dataset.
+        base_name (str): Base name of the data files.
+        algorithm (str): Checksum algorithm of the run.
+        files (Dict[Path, int]): Every data file → number of lines.
+        sums (Dict[Path, FileSum]): Checksums computed by this run.
+    """
+    missing = 0
+    for d in output_dirs:
+        path = manifest_path(d, base_name)
+        old = _read_manifest(path)
+        entries = []
+        for p, lines in sorted(files.items()):
+            if p.parent != d:
+                continue
+            s = sums.get(p)
+            if s is not None:
+                entries.append({"path": p.name, "size": s.size,
+                                "lines": lines, "algorithm": s.algorithm,
+                                "digest": s.digest})
+                continue
+            e = old.get(p.name)
+            if e and e.get("lines") == lines \
+                    and e.get("algorithm") == algorithm \
+                    and p.exists() and e.get("size") == p.stat().st_size:
+                entries.append(e)
+            else:
+                missing += 1
+        fd, tmp = tempfile.mkstemp(dir=d, suffix=".tmp")
+        try:
+            os.fchmod(fd, new_file_mode())
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(e) + "\n" for e in entries)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    if missing:
+        logger.warning("%d files of dataset %r have no %s checksum from "
+                       "this run and are left out of the manifest",
+                       missing, base_name, algorithm)
+    logger.info("Wrote the %s manifest of %d files", algorithm,
+                len(files) - missing)
@@ -1,7 +1,12 @@
+import os
 import sys
 import argparse
-from typing import Dict
+from typing import Dict, List
 from magicgenerator.logger import get_logger
+from magicgenerator.formats import FORMAT_EXTENSIONS
+from magicgenerator.rate import parse_rate
+from magicgenerator.sinks import parse_sink
+from magicgenerator.budget import parse_size
 
 logger = get_logger(__name__)
 
@@ -22,6 +27,24 @@ class FatalArgumentParser(argparse.ArgumentParser):
         sys.exit(1)
 
 
+class _AppendOverridingDefault(argparse.Action):
+    """
+    Like action="append", except that the first value given on the
+    command line replaces the default list instead of extending it.
+    """
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        current = getattr(namespace, self.dest)
+        if current is self.default:
+            current = []
+        setattr(namespace, self.dest, current + [values])
+
+
+def _comma_list(value: str) -> List[str]:
+    """Split a comma-separated option value, dropping empty items."""
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
 def build_parser(defaults: Dict[str, str]) -> argparse.ArgumentParser:
     """
     Constructs and returns an argument parser for the magicgenerator tool,
@@ -40,9 +63,10 @@ def build_parser(defaults: Dict[str, str]) -> argparse.ArgumentParser:
 
     p.add_argument(
         "path_to_save_files",
-        nargs="?",
-        default=defaults["path_to_save_files"],
-        help="Output directory (relative or absolute)."
+        nargs="*",
+        default=defaults["path_to_save_files"].split(os.pathsep),
+        help="Output directory (relative or absolute); several "
+             "directories spread the files over them. "
              "(Default: %(default)s)"
     )
 
@@ -77,6 +101,22 @@ def build_parser(defaults: Dict[str, str]) -> argparse.ArgumentParser:
              "(Default: %(default)s)"
     )
 
+    p.add_argument(
+        "--cache_dir",
+        default=defaults["cache_dir"] or None,
+        help="Directory caching compiled schemas by content hash, so a "
+             "schema is only parsed once. (Default: no cache)"
+    )
+
+    p.add_argument(
+        "--format",
+        choices=list(FORMAT_EXTENSIONS),
+        default=defaults["format"],
+        help="Output format; csv/tsv get a header from the schema field "
+             "order; npy writes each file as a directory of typed column "
+             "arrays (.npy). (Default: %(default)s)"
+    )
+
     p.add_argument(
         "--data_lines",
         type=int,
@@ -85,6 +125,82 @@ def build_parser(defaults: Dict[str, str]) -> argparse.ArgumentParser:
              "(Default: %(default)s)"
     )
 
+    p.add_argument(
+        "--target_bytes",
+        type=parse_size,
+        default=parse_size(defaults["target_bytes"])
+        if defaults["target_bytes"] else None,
+        help="Fill each file up to this size (e.g. 256MB) instead of "
+             "--data_lines lines. (Default: %(default)s)"
+    )
+
+    p.add_argument(
+        "--total_bytes",
+        type=parse_size,
+        default=parse_size(defaults["total_bytes"])
+        if defaults["total_bytes"] else None,
+        help="Total size of the job; rolls over to the next file name "
+             "when a file reaches --target_bytes. (Default: %(default)s)"
+    )
+
+    p.add_argument(
+        "--partition_by",
+        default=defaults["partition_by"] or None,
+        help="Write each record to <path>/<field>=<value>/ according to "
+             "this field's value. (Default: %(default)s)"
+    )
+
+    p.add_argument(
+        "--max_open_partitions",
+        type=int,
+        default=int(defaults["max_open_partitions"]),
+        help="Partition files kept open at once (least recently used "
+             "are closed first). (Default: %(default)s)"
+    )
+
+    p.add_argument(
+        "--pool_size",
+        type=int,
+        default=int(defaults["pool_size"]),
+        help="Replay mode: encode this many distinct records once and "
+             "sample output lines from them (0 = off). "
+             "(Default: %(default)s)"
+    )
+
+    p.add_argument(
+        "--pool_patch",
+        type=_comma_list,
+        default=_comma_list(defaults["pool_patch"]),
+        help="Replay mode: comma-separated fields regenerated for every "
+             "line, e.g. timestamps. (Default: none)"
+    )
+
+    p.add_argument(
+        "--write_mode",
+        choices=["buffered", "dontneed", "direct"],
+        default=defaults["write_mode"],
+        help="buffered, or keep large files out of the page cache with "
+             "dontneed (writeback + POSIX_FADV_DONTNEED per chunk) or "
+             "direct (O_DIRECT). (Default: %(default)s)"
+    )
+
+    p.add_argument(
+        "--checksum",
+        choices=["blake2b", "sha256", "crc32"],
+        default=defaults["checksum"] or None,
+        help="Hash every file while it is written and list path, size, "
+             "line count and digest in <file_name>.manifest.jsonl in each "
+             "output directory. (Default: none)"
+    )
+
+    p.add_argument(
+        "--dir_assignment",
+        choices=["round_robin", "free_space"],
+        default=defaults["dir_assignment"],
+        help="How files are assigned to multiple output directories: "
+             "in turn, or by free space left. (Default: %(default)s)"
+    )
+
     p.add_argument(
         "--multiprocessing",
         type=int,
@@ -93,6 +209,33 @@ def build_parser(defaults: Dict[str, str]) -> argparse.ArgumentParser:
              "(Default: %(default)s)"
     )
 
+    p.add_argument(
+        "--estimate",
+        action="store_true",
+        default=defaults["estimate"].lower() == "true",
+        help="Dry run: encode a sample of records and report the projected "
+             "output size, duration and best --multiprocessing, without "
+             "writing anything. (Default: %(default)s)"
+    )
+
+    p.add_argument(
+        "--append",
+        action="store_true",
+        default=defaults["append"].lower() == "true",
+        help="Grow an existing dataset: add --data_lines lines to each of "
+             "its files (listed in the metadata written next to them). "
+             "(Default: %(default)s)"
+    )
+
+    p.add_argument(
+        "--add_files",
+        action="store_true",
+        default=defaults["add_files"].lower() == "true",
+        help="Grow an existing dataset: add --files_count new files, "
+             "numbered after its highest file index. "
+             "(Default: %(default)s)"
+    )
+
     p.add_argument(
         "--clear_path",
         action="store_true",
@@ -101,4 +244,214 @@ def build_parser(defaults: Dict[str, str]) -> argparse.ArgumentParser:
              "(Default: %(default)s)"
     )
 
+    p.add_argument(
+        "--rate",
+        type=parse_rate,
+        default=parse_rate(defaults["rate"]) if defaults["rate"] else None,
+        help="Stdout and sink mode: emit records at this pace, e.g. "
+             "50000/s or 3000/m (token bucket, batched writes). "
+             "(Default: unlimited)"
+    )
+
+    p.add_argument(
+        "--duration",
+        type=float,
+        default=float(defaults["duration"]) if defaults["duration"] else None,
+        help="With --rate: stop after this many seconds instead of after "
+             "--data_lines records; 0 = run until interrupted. "
+             "(Default: %(default)s)"
+    )
+
+    p.add_argument(
+        "--sink",
+        type=parse_sink,
+        action=_AppendOverridingDefault,
+        default=[parse_sink(v) for v in defaults["sink"].split()],
+        help="Send --data_lines records to unix:/path.sock, "
+             "tcp://host:port, fifo:/path, file:/path, stdout or "
+             "sqlite:/path/db.sqlite (table named after --file_name) "
+             "instead of writing files. Repeat to send the same records "
+             "to several sinks at once (not with sqlite). "
+             "(Default: none)"
+    )
+
+    p.add_argument(
+        "--sink_policy",
+        choices=["block", "drop", "spill"],
+        default=defaults["sink_policy"],
+        help="With several sinks, what a sink whose buffer is full does "
+             "with new batches: wait for it, drop them, or spill them "
+             "to a temporary file. (Default: %(default)s)"
+    )
+
+    p.add_argument(
+        "--sink_buffer",
+        type=int,
+        default=int(defaults["sink_buffer"]),
+        help="With several sinks, batches buffered in memory per sink. "
+             "(Default: %(default)s)"
+    )
+
+    p.add_argument(
+        "--spill_dir",
+        default=defaults["spill_dir"] or None,
+        help="Directory of the spill files of --sink_policy spill. "
+             "(Default: system temporary directory)"
+    )
+
+    p.add_argument(
+        "--sink_batch",
+        type=int,
+        default=int(defaults["sink_batch"]),
+        help="Records encoded and sent per sink write "
+             "(rows per executemany for sqlite). "
+             "(Default: %(default)s)"
+    )
+
+    p.add_argument(
+        "--sqlite_index",
+        type=_comma_list,
+        default=_comma_list(defaults["sqlite_index"]),
+        help="Comma-separated fields to index after a sqlite load. "
+             "(Default: none)"
+    )
+
+    _add_logging_args(p, defaults)
+    return p
+
+
+def _add_logging_args(p: argparse.ArgumentParser,
+                      defaults: Dict[str, str]) -> None:
+    """Add the logging options shared by every command."""
+    p.add_argument(
+        "--log_level",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        type=str.upper,
+        default=defaults["log_level"].upper(),
+        help="Minimum level of log messages. "
+             "(Default: %(default)s)"
+    )
+
+    p.add_argument(
+        "--log_file",
+        default=defaults["log_file"],
+        help="File that duplicates the log output."
+             "(Default: %(default)s)"
+    )
+
+    p.add_argument(
+        "--no_log_file",
+        action="store_true",
+        help="Log to stderr only, skipping the log file "
+             "(useful for high-throughput runs)."
+    )
+
+
+def build_serve_parser(defaults: Dict[str, str]) -> argparse.ArgumentParser:
+    """
+    Argument parser of `magicgenerator serve`, the long-running server.
+
+    Parameters:
+        defaults (Dict[str, str]): Dictionary of default values.
+
+    Returns:
+        argparse.ArgumentParser: Fully configured argument parser object.
+    """
+    p = FatalArgumentParser(
+        prog="magicgenerator serve",
+        description="Serve generated data over HTTP on a local TCP port "
+                    "or UNIX socket, keeping schemas and workers warm."
+    )
+
+    p.add_argument(
+        "--listen",
+        type=parse_sink,
+        default=parse_sink(defaults["listen"]),
+        help="Address to serve on: tcp://host:port or unix:/path.sock. "
+             "(Default: %(default)s)"
+    )
+
+    p.add_argument(
+        "--multiprocessing",
+        type=int,
+        default=int(defaults["multiprocessing"]),
+        help="Warm worker processes for large requests, 1 = off. "
+             "(Default: %(default)s)"
+    )
+
+    p.add_argument(
+        "--schema_cache",
+        type=int,
+        default=int(defaults["schema_cache"]),
+        help="Number of parsed schemas kept in memory. "
+             "(Default: %(default)s)"
+    )
+
+    _add_logging_args(p, defaults)
+    return p
+
+
+def build_verify_parser(defaults: Dict[str, str]) -> argparse.ArgumentParser:
+    """
+    Argument parser of `magicgenerator verify`, which checks generated
+    JSON Lines files against the schema.
+
+    Parameters:
+        defaults (Dict[str, str]): Dictionary of default values.
+
+    Returns:
+        argparse.ArgumentParser: Fully configured argument parser object.
+    """
+    p = FatalArgumentParser(
+        prog="magicgenerator verify",
+        description="Check that generated .jsonl files hold only records "
+                    "the data schema can produce."
+    )
+
+    p.add_argument(
+        "paths",
+        nargs="*",
+        default=defaults["path_to_save_files"].split(os.pathsep),
+        help="Files, or output directories searched (with their "
+             "partitions) for --file_name files. (Default: %(default)s)"
+    )
+
+    p.add_argument(
+        "--file_name",
+        default=defaults["file_name"],
+        help="Base file name of the outputs in the directories. "
+             "(Default: %(default)s)"
+    )
+
+    p.add_argument(
+        "--data_schema",
+        type=str,
+        default=defaults["data_schema"],
+        help="JSON schema string or path to a .json file. "
+             "(Default: %(default)s)"
+    )
+
+    p.add_argument(
+        "--multiprocessing",
+        type=int,
+        default=int(defaults["multiprocessing"]),
+        help="Worker processes; large files are split over them. "
+             "(Default: %(default)s)"
+    )
+
+    p.add_argument(
+        "--chunk_size",
+        type=parse_size,
+        default=parse_size(defaults["chunk_size"]),
+        help="Bytes read and parsed per step. (Default: %(default)s)"
+    )
+
+    p.add_argument(
+        "--max_errors",
+        type=int,
+        default=int(defaults["max_errors"]),
+        help="Invalid lines reported per file. (Default: %(default)s)"
+    )
+
+    _add_logging_args(p, defaults)
     return p
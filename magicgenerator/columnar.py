@@ -0,0 +1,273 @@
+import abc
+import json
+import random
+import sys
+import time
+from array import array
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+from magicgenerator.parser import SchemaField, flatten_schema
+from magicgenerator.serializer import compile_value
+
+# Layout description written next to the column files
+LAYOUT_NAME = "columns.json"
+
+# .npy format 1.0: magic, header length, then a Python dict literal
+# padded so the data starts 64-byte aligned (mmap friendly)
+_NPY_MAGIC = b"\x93NUMPY\x01\x00"
+_NPY_HEADER = 128
+
+# Byte order character of this machine in numpy dtype strings
+_ORDER = "<" if sys.byteorder == "little" else ">"
+
+
+def npy_header(descr: str, shape: Tuple[int, ...]) -> bytes:
+    """
+    Header of a C-ordered .npy array, always _NPY_HEADER bytes long
+    so it can be rewritten in place once the shape is known.
+    """
+    text = (f"{{'descr': {descr!r}, 'fortran_order': False, "
+            f"'shape': {shape!r}, }}").encode("latin1")
+    room = _NPY_HEADER - len(_NPY_MAGIC) - 2 - 1
+    if len(text) > room:
+        raise ValueError(f"npy header too long: {text!r}")
+    return (_NPY_MAGIC + (room + 1).to_bytes(2, "little")
+            + text.ljust(room) + b"\n")
+
+
+def _file_stem(name: str) -> str:
+    from urllib.parse import quote
+
+    # Dotted member names are fine; path separators are not
+    return quote(name, safe="")
+
+
+class _NpyFile:
+    """A 1-D .npy file appended to in pieces; the header is final on close."""
+
+    def __init__(self, path: Path, descr: str, itemsize: int):
+        self.path = path
+        self.descr = descr
+        self.itemsize = itemsize
+        self.nbytes = 0
+        self._f: BinaryIO = open(path, "wb")
+        self._f.write(npy_header(descr, (0,)))
+
+    def write(self, data: bytes) -> None:
+        self._f.write(data)
+        self.nbytes += len(data)
+
+    def close(self) -> str:
+        """Fix up the shape and close; return the file name."""
+        self._f.seek(0)
+        self._f.write(npy_header(self.descr, (self.nbytes // self.itemsize,)))
+        self._f.close()
+        return self.path.name
+
+
+class _Column(abc.ABC):
+    """One output column: generates `n` values per write() call."""
+
+    kind = ""
+
+    def __init__(self, out_dir: Path, name: str, field: SchemaField):
+        self.name = name
+        self.field = field
+        self.stem = out_dir / _file_stem(name)
+        self.files: List[_NpyFile] = []
+
+    def _open(self, suffix: str, descr: str, itemsize: int) -> _NpyFile:
+        f = _NpyFile(Path(f"{self.stem}{suffix}.npy"), descr, itemsize)
+        self.files.append(f)
+        return f
+
+    @abc.abstractmethod
+    def write(self, n: int) -> None:
+        """Generate and append the next `n` values."""
+
+    def close(self) -> Dict[str, Any]:
+        """Close the column's files; return its layout entry."""
+        return {"name": self.name, "kind": self.kind,
+                "files": [f.close() for f in self.files]}
+
+
+class _IntColumn(_Column):
+    """int fields as int64 values."""
+
+    kind = "int64"
+
+    def __init__(self, out_dir: Path, name: str, field: SchemaField):
+        super().__init__(out_dir, name, field)
+        self._data = self._open("", f"{_ORDER}i8", 8)
+
+    def _values(self, n: int) -> List[int]:
+        f = self.field
+        if f.sampler is not None:
+            return f.sampler.draw(n)
+        if f.mode == "constant":
+            return [f.const] * n
+        if f.mode == "choice":
+            return random.choices(f.args, k=n)
+        randint = random.randint
+        low, high = f.args if f.mode == "rand_range" else (0, 10000)
+        return [randint(low, high) for _ in range(n)]
+
+    def write(self, n: int) -> None:
+        self._data.write(array("q", self._values(n)).tobytes())
+
+
+class _TimestampColumn(_Column):
+    """timestamp fields as float64 seconds since the epoch."""
+
+    kind = "float64"
+
+    def __init__(self, out_dir: Path, name: str, field: SchemaField):
+        super().__init__(out_dir, name, field)
+        self._data = self._open("", f"{_ORDER}f8", 8)
+
+    def write(self, n: int) -> None:
+        now = time.time
+        self._data.write(array("d", [now() for _ in range(n)]).tobytes())
+
+
+class _NullColumn(_Column):
+    """
+    Always-null fields (int:"") hold no data at all: their layout entry
+    has no files and a null_count equal to the number of rows.
+    """
+
+    kind = "null"
+
+    def __init__(self, out_dir: Path, name: str, field: SchemaField):
+        super().__init__(out_dir, name, field)
+        self.rows = 0
+
+    def write(self, n: int) -> None:
+        self.rows += n
+
+    def close(self) -> Dict[str, Any]:
+        return {**super().close(), "null_count": self.rows}
+
+
+class _DictionaryColumn(_Column):
+    """
+    str choices, constants and empty strings: per-row uint8 / int32
+    indices into a dictionary of the distinct values (<name>.dict.npy,
+    fixed-width unicode). Rows are drawn as indices, no strings built.
+    """
+
+    kind = "dictionary"
+
+    def __init__(self, out_dir: Path, name: str, field: SchemaField):
+        super().__init__(out_dir, name, field)
+        self.values = list(field.args) if field.mode == "choice" \
+            else [field.const]
+        if len(self.values) <= 256:
+            self._codes = self._open("", "|u1", 1)
+            self._typecode = "B"
+        else:
+            self._codes = self._open("", f"{_ORDER}i4", 4)
+            self._typecode = "i"
+
+    def write(self, n: int) -> None:
+        if len(self.values) == 1:
+            codes = [0] * n
+        else:
+            codes = random.choices(range(len(self.values)), k=n)
+        self._codes.write(array(self._typecode, codes).tobytes())
+
+    def close(self) -> Dict[str, Any]:
+        width = max(1, max(len(v) for v in self.values))
+        encoding = "utf-32-le" if _ORDER == "<" else "utf-32-be"
+        d = self._open(".dict", f"{_ORDER}U{width}", 4 * width)
+        d.write(b"".join(v.encode(encoding).ljust(4 * width, b"\0")
+                         for v in self.values))
+        return super().close()
+
+
+class _UuidColumn(_Column):
+    """str:rand as fixed-width 36-byte ASCII strings."""
+
+    kind = "fixed"
+
+    def __init__(self, out_dir: Path, name: str, field: SchemaField):
+        super().__init__(out_dir, name, field)
+        self._data = self._open("", "|S36", 36)
+
+    def write(self, n: int) -> None:
+        import uuid
+
+        uuid4 = uuid.uuid4
+        self._data.write("".join([str(uuid4()) for _ in range(n)])
+                         .encode("ascii"))
+
+
+class _JsonColumn(_Column):
+    """
+    Arrays as offset-packed UTF-8 JSON text: row i is
+    data[offsets[i]:offsets[i + 1]] (<name>.offsets.npy, int64).
+    """
+
+    kind = "json"
+
+    def __init__(self, out_dir: Path, name: str, field: SchemaField):
+        super().__init__(out_dir, name, field)
+        self._fn = compile_value(field, as_json=True)
+        self._data = self._open(".data", "|u1", 1)
+        self._offsets = self._open(".offsets", f"{_ORDER}i8", 8)
+        self._offsets.write(array("q", [0]).tobytes())
+
+    def write(self, n: int) -> None:
+        fn, field = self._fn, self.field
+        texts = [fn(field).encode("utf-8") for _ in range(n)]
+        offsets = array("q")
+        end = self._data.nbytes
+        for t in texts:
+            end += len(t)
+            offsets.append(end)
+        self._data.write(b"".join(texts))
+        self._offsets.write(offsets.tobytes())
+
+
+def _column_class(field: SchemaField) -> type:
+    if field.mode == "array":
+        return _JsonColumn
+    if field.type == "timestamp":
+        return _TimestampColumn
+    if field.type == "str":
+        return _UuidColumn if field.mode == "rand_uuid" \
+            else _DictionaryColumn
+    return _NullColumn if field.mode == "empty" else _IntColumn
+
+
+def write_columns(schema_model: Dict[str, SchemaField], out_dir: Path,
+                  rows: int, batch: int,
+                  layout_extra: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Write `rows` records as one .npy file per column in `out_dir`
+    (object members flattened to dotted columns, as in csv), plus a
+    columns.json describing the layout. Every column is generated a
+    batch at a time straight into typed arrays; no records are built.
+    The files can be memory-mapped without copies
+    (numpy.load(path, mmap_mode="r")).
+
+    Parameters:
+        schema_model (Dict[str, SchemaField]): Field generation rules.
+        out_dir (Path): Directory of the columns (created if needed).
+        rows (int): Number of records.
+        batch (int): Values generated per column and step.
+        layout_extra (Optional[Dict[str, Any]]): Added to columns.json.
+    """
+    out_dir.mkdir(exist_ok=True)
+    columns = [_column_class(f)(out_dir, name, f)
+               for name, f in flatten_schema(schema_model)]
+    remaining = rows
+    while remaining > 0:
+        n = min(batch, remaining)
+        for column in columns:
+            column.write(n)
+        remaining -= n
+    layout = {"rows": rows, **(layout_extra or {}),
+              "columns": [column.close() for column in columns]}
+    with open(out_dir / LAYOUT_NAME, "w", encoding="utf-8") as f:
+        json.dump(layout, f, indent=1)
@@ -0,0 +1,133 @@
+import json
+import os
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional
+from magicgenerator.logger import get_logger
+from magicgenerator.utils import new_file_mode
+
+if TYPE_CHECKING:
+    from magicgenerator.checksum import FileSum
+
+logger = get_logger(__name__)
+
+# Bumped when the metadata layout changes
+METADATA_VERSION = 1
+
+
+def metadata_path(output_dir: Path, base_name: str) -> Path:
+    """
+    Metadata file of the `base_name` dataset in `output_dir` (a hidden
+    file, so it never matches the output name pattern).
+    """
+    return output_dir / f".{base_name}.meta.json"
+
+
+@dataclass
+class Dataset:
+    """
+    State of a generated dataset, kept next to its files so later runs
+    can grow it (--append / --add_files) without reading the data.
+
+    Attributes:
+        schema:        schema_hash of the schema the files were made with
+        output_format: "jsonl", "csv", "tsv" or "npy"
+        next_index:    index of the next file (one past the highest)
+        files:         path → number of records, per data file
+        sums:          path → checksum, of the files written by this run
+                       (not saved; see magicgenerator.checksum)
+    """
+    schema: str
+    output_format: str
+    next_index: int = 0
+    files: Dict[Path, int] = field(default_factory=dict)
+    sums: Dict[Path, "FileSum"] = field(default_factory=dict)
+
+    def record(self, path: Path, lines: int, append: bool = False,
+               checksum: Optional["FileSum"] = None) -> None:
+        """
+        Note `lines` records written to `path` (added if `append`),
+        and the file's checksum if one was computed.
+        """
+        self.files[path] = (self.files.get(path, 0) if append else 0) + lines
+        if checksum is not None:
+            self.sums[path] = checksum
+
+    @property
+    def total_lines(self) -> int:
+        """Records in the whole dataset."""
+        return sum(self.files.values())
+
+    def save(self, output_dirs: List[Path], base_name: str) -> None:
+        """
+        Write the metadata of every output directory, each listing the
+        files it holds. Written atomically (temporary file + rename).
+        """
+        for d in output_dirs:
+            entries = {
+                p.name: lines for p, lines in sorted(self.files.items())
+                if p.parent == d
+            }
+            payload = {
+                "version": METADATA_VERSION,
+                "schema": self.schema,
+                "format": self.output_format,
+                "next_index": self.next_index,
+                "files": entries,
+            }
+            fd, tmp = tempfile.mkstemp(dir=d, suffix=".tmp")
+            try:
+                os.fchmod(fd, new_file_mode())
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(payload, f, indent=1)
+                os.replace(tmp, metadata_path(d, base_name))
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        logger.info("Recorded %d files (%d lines) of dataset %r",
+                    len(self.files), self.total_lines, base_name)
+
+
+def load_dataset(output_dirs: List[Path],
+                 base_name: str) -> Optional[Dataset]:
+    """
+    Read the metadata of the `base_name` dataset from every output
+    directory and merge it.
+
+    Returns:
+        Optional[Dataset]: The dataset, or None if no directory has
+        metadata for it.
+
+    Raises:
+        ValueError: If a metadata file is unreadable, or the directories
+        hold files of different schemas or formats.
+    """
+    dataset: Optional[Dataset] = None
+    for d in output_dirs:
+        path = metadata_path(d, base_name)
+        try:
+            with open(path, encoding="utf-8") as f:
+                payload = json.load(f)
+            if payload.get("version") != METADATA_VERSION:
+                raise ValueError(f"unsupported version "
+                                 f"{payload.get('version')!r}")
+            schema = payload["schema"]
+            output_format = payload["format"]
+            next_index = int(payload["next_index"])
+            files = {d / name: int(n) for name, n in payload["files"].items()}
+        except FileNotFoundError:
+            continue
+        except (OSError, ValueError, KeyError, TypeError,
+                AttributeError) as e:
+            raise ValueError(f"unreadable dataset metadata {path}: {e}")
+
+        if dataset is None:
+            dataset = Dataset(schema, output_format)
+        elif (schema, output_format) != (dataset.schema,
+                                         dataset.output_format):
+            raise ValueError(f"{path} describes a different schema or "
+                             f"format than the other output directories")
+        dataset.next_index = max(dataset.next_index, next_index)
+        dataset.files.update(files)
+    return dataset
@@ -0,0 +1,209 @@
+import abc
+import math
+import random
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+from typing import List
+
+# Values drawn per refill of a sampler's buffer
+SAMPLE_BATCH = 1024
+
+# Largest zipf range sampled from a tabulated CDF (8 bytes per value);
+# wider ranges use rejection-inversion, which needs no table
+ZIPF_TABLE_MAX = 1 << 16
+
+# Drawn values must fit the int64 columns of the columnar formats
+INT64_MAX = (1 << 63) - 1
+ZIPF_MAX = INT64_MAX
+
+# Bounds of what random can return for a standard normal deviate
+# (|z| < 12.2 for normalvariate) and for an Exp(1) draw (53 * ln 2):
+# parameters are checked so even these extremes fit in int64
+_NORMAL_Z_MAX = 13.0
+_EXP_MAX = 37.0
+
+
+class Sampler(abc.ABC):
+    """
+    Base class for int distributions. Values are drawn `SAMPLE_BATCH`
+    at a time by draw(); calling the sampler pops one from that buffer,
+    so per-record cost is a list pop rather than a distribution call.
+    """
+
+    def __init__(self):
+        self._buf: List[int] = []
+
+    @abc.abstractmethod
+    def draw(self, n: int) -> List[int]:
+        """Draw `n` values at once."""
+
+    def __call__(self) -> int:
+        buf = self._buf
+        if not buf:
+            buf = self._buf = self.draw(SAMPLE_BATCH)
+        return buf.pop()
+
+    def __getstate__(self) -> dict:
+        # Never ship buffered values to pool workers: they would
+        # replay the same sequence in every process
+        state = self.__dict__.copy()
+        state["_buf"] = []
+        return state
+
+
+class NormalSampler(Sampler):
+    """Normal(mu, sigma), rounded to the nearest int."""
+
+    def __init__(self, mu: float, sigma: float):
+        super().__init__()
+        self.mu = mu
+        self.sigma = sigma
+
+    def draw(self, n: int) -> List[int]:
+        gauss, mu, sigma = random.gauss, self.mu, self.sigma
+        return [round(gauss(mu, sigma)) for _ in range(n)]
+
+
+class LognormalSampler(Sampler):
+    """Lognormal(mu, sigma) of the underlying normal, rounded."""
+
+    def __init__(self, mu: float, sigma: float):
+        super().__init__()
+        self.mu = mu
+        self.sigma = sigma
+
+    def draw(self, n: int) -> List[int]:
+        lognorm, mu, sigma = random.lognormvariate, self.mu, self.sigma
+        return [round(lognorm(mu, sigma)) for _ in range(n)]
+
+
+class ExpSampler(Sampler):
+    """Exponential with rate `lam`, floored (so 0 is possible)."""
+
+    def __init__(self, lam: float):
+        super().__init__()
+        self.lam = lam
+
+    def draw(self, n: int) -> List[int]:
+        expo, lam = random.expovariate, self.lam
+        return [int(expo(lam)) for _ in range(n)]
+
+
+class ZipfSampler(Sampler):
+    """
+    Bounded Zipf over 1..max_value with P(k) proportional to k ** -s.
+    Up to ZIPF_TABLE_MAX values the cumulative distribution is tabulated
+    once and each value is an inverse-CDF lookup (binary search) of a
+    uniform draw. Wider ranges use rejection-inversion sampling
+    (Hörmann & Derflinger 1996): O(1) memory and a few math calls per
+    value, accepting almost every candidate.
+    """
+
+    def __init__(self, s: float, max_value: int):
+        super().__init__()
+        self.s = s
+        self.max_value = max_value
+        self._cdf = None
+        if max_value <= ZIPF_TABLE_MAX:
+            self._cdf = array("d", accumulate(
+                k ** -s for k in range(1, max_value + 1)
+            ))
+        else:
+            self._h_x1 = self._h_integral(1.5) - 1
+            self._h_n = self._h_integral(max_value + 0.5)
+            self._squeeze = 2 - self._h_integral_inverse(
+                self._h_integral(2.5) - self._h(2)
+            )
+
+    def _h(self, x: float) -> float:
+        return math.exp(-self.s * math.log(x))
+
+    def _h_integral(self, x: float) -> float:
+        # Integral of _h, (x ** (1 - s) - 1) / (1 - s), stable near s = 1
+        log_x = math.log(x)
+        t = (1 - self.s) * log_x
+        ratio = math.expm1(t) / t if abs(t) > 1e-8 \
+            else 1 + t / 2 * (1 + t / 3 * (1 + t / 4))
+        return ratio * log_x
+
+    def _h_integral_inverse(self, x: float) -> float:
+        t = max(x * (1 - self.s), -1.0)
+        ratio = math.log1p(t) / t if abs(t) > 1e-8 \
+            else 1 - t * (0.5 - t * (1 / 3 - 0.25 * t))
+        return math.exp(ratio * x)
+
+    def draw(self, n: int) -> List[int]:
+        rnd = random.random
+        if self._cdf is not None:
+            cdf = self._cdf
+            total = cdf[-1]
+            # bisect_right gives the 0-based bucket; values are 1-based
+            return [
+                min(bisect_right(cdf, rnd() * total), self.max_value - 1) + 1
+                for _ in range(n)
+            ]
+
+        h, h_integral, inverse = self._h, self._h_integral, \
+            self._h_integral_inverse
+        h_x1, h_n, squeeze, top = self._h_x1, self._h_n, self._squeeze, \
+            self.max_value
+        out = []
+        while len(out) < n:
+            u = h_n + rnd() * (h_x1 - h_n)
+            x = inverse(u)
+            k = min(max(int(x + 0.5), 1), top)
+            if k - x <= squeeze or u >= h_integral(k + 0.5) - h(k):
+                out.append(k)
+        return out
+
+
+def build_sampler(name: str, params: List[float]) -> Sampler:
+    """
+    Create the sampler for a distribution spec, validating its parameters.
+
+    Parameters:
+        name (str): "normal", "lognormal", "exp" or "zipf".
+        params (List[float]): The numbers given in parentheses.
+
+    Returns:
+        Sampler: Ready-to-use sampler.
+
+    Raises:
+        ValueError: On a wrong number of parameters or invalid values.
+    """
+    expected = {"normal": 2, "lognormal": 2, "exp": 1, "zipf": 2}[name]
+    if len(params) != expected:
+        raise ValueError(f"{name} takes {expected} parameter(s)")
+    if not all(math.isfinite(p) for p in params):
+        raise ValueError("parameters must be finite numbers")
+
+    if name in {"normal", "lognormal"}:
+        mu, sigma = params
+        if sigma <= 0:
+            raise ValueError("sigma must be > 0")
+        if name == "normal":
+            too_wide = abs(mu) + _NORMAL_Z_MAX * sigma >= 2.0 ** 63
+        else:
+            too_wide = mu + _NORMAL_Z_MAX * sigma >= 63 * math.log(2)
+        if too_wide:
+            raise ValueError("values can exceed the int64 range")
+        cls = NormalSampler if name == "normal" else LognormalSampler
+        return cls(mu, sigma)
+
+    if name == "exp":
+        (lam,) = params
+        if lam <= 0:
+            raise ValueError("lambda must be > 0")
+        if _EXP_MAX / lam >= 2.0 ** 63:
+            raise ValueError("values can exceed the int64 range")
+        return ExpSampler(lam)
+
+    s, max_value = params
+    if s <= 0:
+        raise ValueError("s must be > 0")
+    if max_value < 1 or not float(max_value).is_integer():
+        raise ValueError("max must be a positive integer")
+    if max_value > ZIPF_MAX:
+        raise ValueError(f"max must be <= {ZIPF_MAX}")
+    return ZipfSampler(s, int(max_value))
@@ -0,0 +1,154 @@
+import math
+import os
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Optional, Tuple
+from magicgenerator.generator import DataGenerator, DEFAULT_WRITE_BATCH
+from magicgenerator.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Records encoded to measure size and speed (cut short after SAMPLE_SECONDS)
+SAMPLE_RECORDS = 50_000
+SAMPLE_SECONDS = 2.0
+
+
+@dataclass
+class Estimate:
+    """Projected size and duration of a generation job."""
+    files: int
+    records: int
+    total_bytes: int
+    bytes_per_record: float
+    records_per_second: float
+    workers: int
+    seconds: float
+
+
+def format_size(n: float) -> str:
+    """Human-readable decimal size, e.g. 1.50 GB."""
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if abs(n) < 1000 or unit == "TB":
+            break
+        n /= 1000
+    return f"{n:.0f} {unit}" if unit == "B" else f"{n:.2f} {unit}"
+
+
+def sample_throughput(
+        gen: DataGenerator,
+        records: int = SAMPLE_RECORDS,
+        max_seconds: float = SAMPLE_SECONDS
+) -> Tuple[float, float]:
+    """
+    Encode up to `records` records in write-sized batches (stopping after
+    `max_seconds`) and measure them; nothing is written anywhere.
+
+    Parameters:
+        gen (DataGenerator): Generator configured as for the real job.
+        records (int): Maximum number of records to encode.
+        max_seconds (float): Time limit of the sample.
+
+    Returns:
+        Tuple[float, float]: Bytes per record and records per second
+        of one process.
+    """
+    done = size = 0
+    start = time.perf_counter()
+    while done < records:
+        n = min(DEFAULT_WRITE_BATCH, records - done)
+        size += len(gen.encode_batch(n))
+        done += n
+        if time.perf_counter() - start >= max_seconds:
+            break
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    return size / done, done / elapsed
+
+
+def best_workers(files: int, cpus: int) -> int:
+    """
+    Fewest workers giving the shortest wall time: each worker writes
+    whole files, so the job takes ceil(files / workers) rounds and
+    workers beyond what the last round needs only add overhead.
+    """
+    rounds = math.ceil(files / max(cpus, 1))
+    return max(1, math.ceil(files / max(rounds, 1)))
+
+
+def estimate_job(
+        gen: DataGenerator,
+        files: int,
+        data_lines: int,
+        total_bytes: Optional[int] = None,
+        target_bytes: Optional[int] = None,
+        cpus: Optional[int] = None,
+        rate: Optional[float] = None,
+        sample: int = SAMPLE_RECORDS
+) -> Estimate:
+    """
+    Project the output of a job from a sample of real records.
+
+    Parameters:
+        gen (DataGenerator): Generator configured as for the real job.
+        files (int): Number of files (0 = one stream to stdout / a sink).
+        data_lines (int): Records per file (ignored for byte budgets).
+        total_bytes (Optional[int]): Job byte budget (--total_bytes).
+        target_bytes (Optional[int]): Per-file byte budget (--target_bytes).
+        cpus (Optional[int]): Available cores (default: os.cpu_count()).
+        rate (Optional[float]): Records per second the stream is paced at.
+        sample (int): Records to encode for the measurement.
+
+    Returns:
+        Estimate: Files, records, bytes, best worker count and wall time.
+    """
+    bytes_per_record, per_second = sample_throughput(gen, sample)
+    header = len(gen.encode_header())
+    cpus = cpus or os.cpu_count() or 1
+
+    if total_bytes or target_bytes:
+        files = max(files, 1)
+        total = total_bytes or target_bytes * files
+        target = target_bytes or math.ceil(total / files)
+        files = math.ceil(total / target)
+        records = int((total - header * files) / bytes_per_record)
+        per_file = records / files
+    else:
+        streams = max(files, 1)
+        records = streams * data_lines
+        total = int(records * bytes_per_record) + header * streams
+        per_file = data_lines
+        files = streams if files else 0
+
+    workers = best_workers(files, cpus) if files > 1 else 1
+    rounds = math.ceil(files / workers) if files else 1
+    seconds = rounds * per_file / per_second
+    if rate is not None and not files:
+        seconds = max(seconds, records / rate)
+
+    return Estimate(files, records, total, bytes_per_record, per_second,
+                    workers, seconds)
+
+
+def log_estimate(est: Estimate, free_bytes: Optional[int] = None) -> None:
+    """
+    Log an estimate, warning when it does not fit in `free_bytes`.
+    """
+    logger.info(
+        "Estimate: %d file(s), %d records, %s (%.1f bytes/record)",
+        est.files, est.records, format_size(est.total_bytes),
+        est.bytes_per_record
+    )
+    logger.info(
+        "Estimate: %.0f records/s per process; with --multiprocessing %d "
+        "the job takes ~%s",
+        est.records_per_second, est.workers,
+        timedelta(seconds=round(est.seconds))
+    )
+    if free_bytes is not None:
+        if est.total_bytes > free_bytes:
+            logger.warning("Estimate: output needs %s but only %s is free",
+                           format_size(est.total_bytes),
+                           format_size(free_bytes))
+        else:
+            logger.info("Estimate: %s free on the output device(s)",
+                        format_size(free_bytes))
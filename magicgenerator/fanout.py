@@ -0,0 +1,208 @@
+import os
+import tempfile
+import threading
+from collections import deque
+from typing import List, Optional, Tuple
+from magicgenerator.sinks import Sink
+from magicgenerator.logger import get_logger
+
+logger = get_logger(__name__)
+
+# What a sink whose buffer is full does with the next batch:
+# block - wait for room (the whole stream runs at this sink's pace)
+# drop  - discard the batch (whole batches, so lines stay intact)
+# spill - append it to a temporary file, replayed in order later
+POLICIES = ("block", "drop", "spill")
+
+# Batches buffered in memory per sink
+DEFAULT_BUFFER = 64
+
+# Spilled bytes read back per sink write (whole batches)
+SPILL_READ = 8 << 20
+
+
+class _Lane:
+    """
+    One sink of a FanOut: a bounded queue of batches drained by its own
+    writer thread, with the FanOut's backpressure policy applied when
+    the queue is full.
+    """
+
+    def __init__(self, sink: Sink, policy: str, max_buffer: int,
+                 spill_dir: Optional[str]):
+        self.sink = sink
+        self.policy = policy
+        self.max_buffer = max(1, max_buffer)
+        self.spill_dir = spill_dir
+        self.error: Optional[BaseException] = None
+        self.dropped = 0
+        self.dropped_bytes = 0
+        self.spilled_bytes = 0
+        self._items: deque = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        # Spill file (created on first use): batch sizes not yet read
+        # back, and the offsets of the next read and write
+        self._spill_fd = -1
+        self._spill_sizes: deque = deque()
+        self._spill_read = 0
+        self._spill_end = 0
+        self._thread = threading.Thread(
+            target=self._run, name=f"sink {sink}", daemon=True
+        )
+        self._thread.start()
+
+    def put(self, buf: bytes) -> None:
+        """Queue a batch, applying the policy if the buffer is full."""
+        with self._cond:
+            while True:
+                if self.error is not None:
+                    return
+                if self._spill_sizes:
+                    # Keep order: once spilling, later batches follow
+                    self._spill(buf)
+                    return
+                if len(self._items) < self.max_buffer:
+                    self._items.append(buf)
+                    self._cond.notify_all()
+                    return
+                if self.policy == "drop":
+                    self.dropped += 1
+                    self.dropped_bytes += len(buf)
+                    return
+                if self.policy == "spill":
+                    self._spill(buf)
+                    return
+                self._cond.wait()
+
+    def _spill(self, buf: bytes) -> None:
+        # Called with the lock held
+        if self._spill_fd < 0:
+            fd, path = tempfile.mkstemp(prefix="magicgenerator-spill-",
+                                        dir=self.spill_dir)
+            os.unlink(path)
+            self._spill_fd = fd
+            logger.warning("Sink %s is falling behind, spilling to disk",
+                           self.sink)
+        view = memoryview(buf)
+        offset = self._spill_end
+        while view:
+            written = os.pwrite(self._spill_fd, view, offset)
+            view = view[written:]
+            offset += written
+        self._spill_end = offset
+        self._spill_sizes.append(len(buf))
+        self.spilled_bytes += len(buf)
+        self._cond.notify_all()
+
+    def _next(self) -> Optional[bytes]:
+        """Next data to write, in order; None once closed and drained."""
+        with self._cond:
+            while not (self._items or self._spill_sizes or self._closed):
+                self._cond.wait()
+            if self._items:
+                buf = self._items.popleft()
+                self._cond.notify_all()
+                return buf
+            if not self._spill_sizes:
+                return None
+            offset = self._spill_read
+            length = 0
+            while self._spill_sizes and (
+                    not length or length + self._spill_sizes[0] <= SPILL_READ):
+                length += self._spill_sizes.popleft()
+            self._spill_read += length
+        # put only ever writes past _spill_end, so this range is stable
+        data = os.pread(self._spill_fd, length, offset)
+        with self._cond:
+            if not self._spill_sizes and self._spill_read == self._spill_end:
+                # Drained: new batches go to memory again and the file
+                # space is reused
+                self._spill_read = self._spill_end = 0
+                os.ftruncate(self._spill_fd, 0)
+        return data
+
+    def _run(self) -> None:
+        while (buf := self._next()) is not None:
+            try:
+                self.sink.write(buf)
+            except Exception as e:
+                with self._cond:
+                    self.error = e
+                    self._items.clear()
+                    self._spill_sizes.clear()
+                    self._cond.notify_all()
+                logger.error("Sink %s failed: %s", self.sink, e)
+                return
+
+    def close(self) -> None:
+        """Write everything still buffered, then stop the thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        if self._spill_fd >= 0:
+            os.close(self._spill_fd)
+            self._spill_fd = -1
+
+
+class FanOut(Sink):
+    """
+    Sends every batch to several sinks at once. The batches are encoded
+    once; each sink has its own writer thread and a buffer of
+    `max_buffer` batches, so a slow sink only holds the others back
+    when the "block" policy says so. A failing sink is logged and
+    dropped from the stream while the others continue.
+
+    Parameters:
+        sinks (List[Sink]): Opened sinks (closed by their owner).
+        policy (str): What a sink with a full buffer does with new
+            batches: "block", "drop" or "spill" (see POLICIES).
+        max_buffer (int): Batches buffered in memory per sink.
+        spill_dir (Optional[str]): Directory of spill files
+            (default: the system temporary directory).
+    """
+
+    def __init__(self, sinks: List[Sink], policy: str = "block",
+                 max_buffer: int = DEFAULT_BUFFER,
+                 spill_dir: Optional[str] = None):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown backpressure policy {policy!r}")
+        self._lanes = [_Lane(s, policy, max_buffer, spill_dir)
+                       for s in sinks]
+        self._closed = False
+
+    def __str__(self) -> str:
+        return " + ".join(str(lane.sink) for lane in self._lanes)
+
+    def write(self, buf: bytes) -> None:
+        """
+        Queue `buf` for every sink still working.
+
+        Raises:
+            OSError: Once every sink has failed (nothing left to feed).
+        """
+        for lane in self._lanes:
+            lane.put(buf)
+        if all(lane.error is not None for lane in self._lanes):
+            raise OSError(f"all sinks failed ({self._lanes[0].error})")
+
+    @property
+    def failed(self) -> List[Tuple[Sink, BaseException]]:
+        """(sink, error) of every sink that failed."""
+        return [(lane.sink, lane.error) for lane in self._lanes
+                if lane.error is not None]
+
+    def close(self) -> None:
+        """Drain every sink's buffer and log what the policy discarded."""
+        if self._closed:
+            return
+        self._closed = True
+        for lane in self._lanes:
+            lane.close()
+            if lane.dropped:
+                logger.warning("Sink %s dropped %d batches (%d bytes)",
+                               lane.sink, lane.dropped, lane.dropped_bytes)
+            if lane.spilled_bytes:
+                logger.info("Sink %s spilled %d bytes to disk",
+                            lane.sink, lane.spilled_bytes)
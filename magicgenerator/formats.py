@@ -0,0 +1,11 @@
+# Output format tables shared by the generator and the file helpers;
+# kept free of imports so low-level modules can use them cheaply
+
+# Supported output formats → file extension ("npy" outputs are
+# directories holding one .npy file per column)
+FORMAT_EXTENSIONS = {
+    "jsonl": ".jsonl", "csv": ".csv", "tsv": ".tsv", "npy": ".columns"
+}
+
+# Formats written column by column rather than as lines
+COLUMNAR_FORMATS = {"npy"}
@@ -1,14 +1,50 @@
 import time
-import uuid
 import random
+import csv
+import io
 import json
 from pathlib import Path
-from typing import Any, Dict
-from magicgenerator.parser import SchemaField
+from typing import (
+    TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence, Tuple
+)
+from magicgenerator.formats import FORMAT_EXTENSIONS, COLUMNAR_FORMATS
+from magicgenerator.parser import SchemaField, flatten_schema
+from magicgenerator.serializer import (
+    compile_json_lines,
+    compile_record,
+    compile_value
+)
+from magicgenerator.partition import PartitionWriter, DEFAULT_MAX_OPEN
+from magicgenerator.writers import open_output
 from magicgenerator.logger import get_logger
 
+if TYPE_CHECKING:
+    from magicgenerator.checksum import Checksum, FileSum
+    from magicgenerator.sinks import Sink
+
 logger = get_logger(__name__)
 
+# Records encoded and sent per sink write
+DEFAULT_SINK_BATCH = 1000
+
+# Records encoded per write when producing files
+DEFAULT_WRITE_BATCH = 1000
+
+# Placeholder written into pooled rows where a patched field goes
+_PATCH_TOKEN = "@@MG_PATCH_{}@@"
+
+# csv.writer options per delimited format
+_DELIMITED_DIALECTS = {
+    "csv": {"delimiter": ",", "lineterminator": "\n"},
+    "tsv": {"delimiter": "\t", "lineterminator": "\n"},
+}
+
+
+def _uuid4() -> str:
+    # uuid drags in platform & co. (several ms); import it on first use
+    import uuid
+    return str(uuid.uuid4())
+
 
 class DataGenerator:
     """Given a parsed schema model, produce records & files."""
@@ -18,47 +54,594 @@ class DataGenerator:
     _GEN_MAP = {
         "timestamp": lambda field: str(time.time()),
         "empty": lambda field: field.const, # we set const="" or const=None in parser
-        "rand_uuid": lambda field: str(uuid.uuid4()),
+        "rand_uuid": lambda field: _uuid4(),
         "rand_int": lambda field: random.randint(0, 10000),
         "rand_range": lambda field: random.randint(*field.args),
         "choice": lambda field: random.choice(field.args),
-        "constant": lambda field: field.const
+        "constant": lambda field: field.const,
+        # Distribution modes draw from the field's buffered sampler
+        "normal": lambda field: field.sampler(),
+        "lognormal": lambda field: field.sampler(),
+        "exp": lambda field: field.sampler(),
+        "zipf": lambda field: field.sampler()
     }
 
-    def __init__(self, schema_model: Dict[str,SchemaField]):
+    def __init__(self, schema_model: Dict[str,SchemaField],
+                 output_format: str = "jsonl", pool_size: int = 0,
+                 pool_patch: Sequence[str] = (),
+                 write_mode: str = "buffered",
+                 checksum: Optional[str] = None):
+        """
+        Parameters:
+            schema_model (Dict[str, SchemaField]): Field generation rules.
+            output_format (str): "jsonl", "csv", "tsv", or "npy"
+                (columns, files only; see magicgenerator.columnar).
+            pool_size (int): If > 0, encoded output is sampled from a pool
+                of this many pre-encoded records instead of generating
+                every record (replay mode).
+            pool_patch (Sequence[str]): Fields regenerated for every
+                replayed record (e.g. timestamps, sequence IDs).
+            write_mode (str): How files are written: "buffered",
+                or "dontneed" / "direct" to keep them out of the page
+                cache (see magicgenerator.writers).
+            checksum (Optional[str]): Digest files are hashed with while
+                they are written ("blake2b", "sha256" or "crc32"); the
+                result of each file is left in `last_sum`.
+        """
+        if output_format not in FORMAT_EXTENSIONS:
+            raise ValueError(f"unknown output format {output_format!r}")
         self.schema = schema_model
+        self.output_format = output_format
+        # Output columns: the top-level fields for JSON; for csv/tsv the
+        # leaf fields of nested objects ("user.id"), arrays as JSON text
+        delimited = output_format != "jsonl"
+        fields = (flatten_schema(schema_model) if delimited
+                  else list(schema_model.items()))
+        self.columns = [name for name, _ in fields]
+        unknown = [name for name in pool_patch if name not in self.columns]
+        if unknown:
+            raise ValueError(f"pool_patch fields not in schema: {unknown}")
+        # (handler, field) pairs in column order, for row generation
+        self._plan = [
+            (self._handler(field, delimited), field) for _, field in fields
+        ]
+        # Whole-record code compiled from the schema once (nested fields
+        # cost no per-record tree walk; JSON lines skip the dict)
+        self._record = compile_record(schema_model)
+        self._json_lines = (
+            None if delimited else compile_json_lines(schema_model)
+        )
+        self.write_mode = write_mode
+        self.checksum = checksum
+        self.last_sum: Optional["FileSum"] = None
+        self.pool_size = pool_size
+        self.pool_patch = list(pool_patch)
+        # Built lazily on the first encoded batch
+        self._pool: Optional[List[Any]] = None
+        self._patch_plan: List[Any] = []
+        self._pool_used: set = set()
+        self.pool_emitted = 0
+
+
+    @classmethod
+    def _handler(cls, field: SchemaField, delimited: bool) -> Any:
+        """Generation function of one output column."""
+        if field.mode in {"object", "array"}:
+            # Tabular formats hold an array as one JSON value
+            return compile_value(field, as_json=delimited)
+        return cls._GEN_MAP[field.mode]
 
 
     def generate_record(self) -> Dict[str, Any]:
         """
         Given a dict of field_name -> SchemaField, produce one dict of
-        field_name → generated value.
+        field_name → generated value (nested objects as dicts, arrays
+        as lists).
 
         Returns:
             Dict[str, Any]: Record with generated values per field.
         """
-        record = {}
-        for name, field in self.schema.items():
-            fn = self._GEN_MAP[field.mode]
-            record[name] = fn(field)
-        return record
+        return self._record()
+
+
+    def generate_row(self) -> List[Any]:
+        """
+        Produce one record as a list of values in column order,
+        without building a dict (used by the delimited formats).
+
+        Returns:
+            List[Any]: Generated values per column (see `columns`).
+        """
+        return [fn(field) for fn, field in self._plan]
+
+
+    @property
+    def extension(self) -> str:
+        """File extension matching the output format (e.g. ".csv")."""
+        return FORMAT_EXTENSIONS[self.output_format]
+
+
+    def _check_lines(self) -> None:
+        """Columnar formats have no line encoding."""
+        if self.output_format in COLUMNAR_FORMATS:
+            raise ValueError(f"{self.output_format} output can only be "
+                             f"written to files")
+
+
+    def encode_header(self) -> bytes:
+        """
+        Header line for the output format: the schema field names for
+        csv/tsv, nothing for JSON Lines.
+
+        Returns:
+            bytes: Encoded header line, or b"".
+        """
+        self._check_lines()
+        if self.output_format == "jsonl":
+            return b""
+        buf = io.StringIO()
+        csv.writer(
+            buf, **_DELIMITED_DIALECTS[self.output_format]
+        ).writerow(self.columns)
+        return buf.getvalue().encode("utf-8")
+
+
+    def iter_records(
+            self,
+            count: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield generated records one by one.
+
+        Parameters:
+            count (Optional[int]): Number of records; None = endless.
+
+        Yields:
+            Dict[str, Any]: One record per iteration.
+        """
+        gen = self.generate_record
+        if count is None:
+            while True:
+                yield gen()
+        for _ in range(count):
+            yield gen()
+
+
+    def iter_batches(
+            self,
+            size: int,
+            count: Optional[int] = None
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield lists of up to `size` records (the last one may be shorter).
+
+        Parameters:
+            size (int): Records per batch.
+            count (Optional[int]): Total number of records; None = endless.
+
+        Yields:
+            List[Dict[str, Any]]: One batch per iteration.
+
+        Raises:
+            ValueError: If `size` is less than 1.
+        """
+        if size < 1:
+            raise ValueError(f"batch size must be >= 1, got {size}")
+        gen = self.generate_record
+        remaining = count
+        while remaining is None or remaining > 0:
+            n = size if remaining is None else min(size, remaining)
+            yield [gen() for _ in range(n)]
+            if remaining is not None:
+                remaining -= n
+
+
+    def _encode_value(self, value: Any) -> bytes:
+        """Encode a single field value as it appears inside a line."""
+        if self.output_format == "jsonl":
+            return json.dumps(value).encode("utf-8")
+        buf = io.StringIO()
+        csv.writer(
+            buf, **_DELIMITED_DIALECTS[self.output_format]
+        ).writerow([value])
+        return buf.getvalue()[:-1].encode("utf-8")
+
+
+    def _build_pool(self) -> List[Any]:
+        """
+        Generate and encode `pool_size` records once. Without patched
+        fields each entry is a finished line; with them, each entry is
+        the list of line segments around the patched values.
+        """
+        logger.info("Building a replay pool of %d records", self.pool_size)
+        names = self.columns
+        patch_idx = [names.index(name) for name in self.pool_patch]
+        tokens = []
+        for k in range(len(patch_idx)):
+            token = _PATCH_TOKEN.format(k)
+            # JSON quotes the placeholder string; csv leaves it bare
+            tokens.append((
+                json.dumps(token) if self.output_format == "jsonl" else token
+            ).encode("utf-8"))
+
+        # Patched fields are placed in schema order, so sort by position
+        order = sorted(range(len(patch_idx)), key=lambda k: patch_idx[k])
+        pool = []
+        for _ in range(self.pool_size):
+            row = self.generate_row()
+            for k, i in enumerate(patch_idx):
+                row[i] = _PATCH_TOKEN.format(k)
+            line = self.encode_rows([row])
+            if not patch_idx:
+                pool.append(line)
+                continue
+            segments = []
+            for k in order:
+                head, line = line.split(tokens[k], 1)
+                segments.append(head)
+            segments.append(line)
+            pool.append(segments)
+        self._patch_plan = [self._plan[patch_idx[k]] for k in order]
+        return pool
+
+
+    def _encode_from_pool(self, size: int) -> bytes:
+        """Encode `size` records by sampling the replay pool."""
+        if self._pool is None:
+            self._pool = self._build_pool()
+        pool = self._pool
+        picks = random.choices(range(len(pool)), k=size)
+        self.pool_emitted += size
+        if len(self._pool_used) < len(pool):
+            self._pool_used.update(picks)
+
+        if not self.pool_patch:
+            return b"".join([pool[i] for i in picks])
+
+        enc = self._encode_value
+        plan = self._patch_plan
+        parts = []
+        for i in picks:
+            segments = pool[i]
+            parts.append(segments[0])
+            for (fn, field), seg in zip(plan, segments[1:]):
+                parts.append(enc(fn(field)))
+                parts.append(seg)
+        return b"".join(parts)
+
+
+    def pool_stats(self) -> Tuple[int, int, float]:
+        """
+        Replay statistics so far.
+
+        Returns:
+            Tuple[int, int, float]: Records emitted from the pool,
+            distinct pool entries used, and the duplicate ratio
+            (share of emitted records that repeat an earlier entry,
+            not counting patched fields).
+        """
+        emitted = self.pool_emitted
+        distinct = len(self._pool_used)
+        ratio = 1 - distinct / emitted if emitted else 0.0
+        return emitted, distinct, ratio
+
+
+    def log_pool_stats(self, target: Any) -> None:
+        """Log the replay statistics for `target` (file, sink, ...)."""
+        if self.pool_size:
+            emitted, distinct, ratio = self.pool_stats()
+            logger.info(
+                "%s: %d records from %d distinct pool entries "
+                "(duplicate ratio %.2f%%)",
+                target, emitted, distinct, ratio * 100
+            )
+
+
+    def encode_batch(self, size: int) -> bytes:
+        """
+        Generate `size` records and encode them as one UTF-8 buffer
+        of newline-terminated lines in the output format
+        (JSON objects, or delimited rows written with csv.writerows).
+        In replay mode (pool_size > 0) lines are sampled from the pool.
+
+        Parameters:
+            size (int): Number of records in the batch.
+
+        Returns:
+            bytes: Ready-to-write buffer.
+        """
+        self._check_lines()
+        if self.pool_size:
+            return self._encode_from_pool(size)
+
+        if self.output_format != "jsonl":
+            buf = io.StringIO()
+            row = self.generate_row
+            csv.writer(
+                buf, **_DELIMITED_DIALECTS[self.output_format]
+            ).writerows([row() for _ in range(size)])
+            return buf.getvalue().encode("utf-8")
+
+        return self._json_lines(size).encode("utf-8")
+
+
+    def encode_rows(self, rows: List[List[Any]]) -> bytes:
+        """
+        Encode already generated rows (values in schema field order)
+        as one buffer in the output format.
+
+        Parameters:
+            rows (List[List[Any]]): Rows from generate_row().
+
+        Returns:
+            bytes: Ready-to-write buffer.
+        """
+        self._check_lines()
+        if self.output_format != "jsonl":
+            buf = io.StringIO()
+            csv.writer(
+                buf, **_DELIMITED_DIALECTS[self.output_format]
+            ).writerows(rows)
+            return buf.getvalue().encode("utf-8")
+
+        dumps = json.dumps
+        names = self.columns
+        return "".join(
+            [dumps(dict(zip(names, row))) + "\n" for row in rows]
+        ).encode("utf-8")
+
+
+    def iter_encoded(
+            self,
+            size: int,
+            count: Optional[int] = None
+    ) -> Iterator[bytes]:
+        """
+        Yield ready-to-write buffers of up to `size` records
+        in the output format (no header).
+
+        Parameters:
+            size (int): Records per buffer.
+            count (Optional[int]): Total number of records; None = endless.
+
+        Yields:
+            bytes: Newline-terminated, UTF-8 encoded lines.
+
+        Raises:
+            ValueError: If `size` is less than 1.
+        """
+        if size < 1:
+            raise ValueError(f"batch size must be >= 1, got {size}")
+        remaining = count
+        while remaining is None or remaining > 0:
+            n = size if remaining is None else min(size, remaining)
+            yield self.encode_batch(n)
+            if remaining is not None:
+                remaining -= n
+
+
+    def _start_checksum(self, path: Path,
+                        existing: bool) -> Optional["Checksum"]:
+        """Running digest for a file about to be written, if enabled."""
+        self.last_sum = None
+        if self.checksum is None:
+            return None
+        from magicgenerator.checksum import Checksum, hash_file
+
+        if existing:
+            # Digests cannot be resumed, so the old content is read once
+            logger.info("Hashing the existing content of %s", path)
+            return hash_file(path, self.checksum)
+        return Checksum(self.checksum)
+
+
+    def _finish_checksum(self, path: Path,
+                         checksum: Optional["Checksum"]) -> None:
+        if checksum is not None:
+            from magicgenerator.checksum import FileSum
+
+            self.last_sum = FileSum(path, checksum.size, checksum.algorithm,
+                                    checksum.hexdigest())
 
 
     def write_jsonl_file(
             self,
             output_path: Path,
-            data_lines: int
+            data_lines: int,
+            append: bool = False
     ) -> None:
         """
-        Write `data_lines` JSON‐Lines to `output_path`.
+        Write `data_lines` records to `output_path` in the output format
+        (JSON‐Lines by default; csv/tsv files start with a header; npy
+        writes the directory of columns).
 
         Parameters:
             output_path (Path): Where to write the file.
             data_lines (int): Number of lines (records) to write.
+            append (bool): Add the lines after the existing content of
+                `output_path` (a non-empty file keeps its header).
+
+        With `checksum` set, every buffer is hashed as it is written and
+        the file's digest is left in `last_sum`.
+        """
+        logger.info("%s %d lines → %s", "Appending" if append
+                    else "Generating", data_lines, output_path)
+        if self.output_format in COLUMNAR_FORMATS:
+            from magicgenerator.columnar import write_columns
+
+            if append:
+                raise ValueError(f"cannot append to "
+                                 f"{self.output_format} output")
+            write_columns(self.schema, output_path, data_lines,
+                          DEFAULT_WRITE_BATCH)
+            return
+        existing = append and output_path.exists() \
+            and output_path.stat().st_size > 0
+        checksum = self._start_checksum(output_path, existing)
+        with open_output(output_path, self.write_mode, append=append) as f:
+            if checksum is not None:
+                from magicgenerator.checksum import ChecksumWriter
+
+                f = ChecksumWriter(f, checksum)
+            if not existing:
+                f.write(self.encode_header())
+            for buf in self.iter_encoded(DEFAULT_WRITE_BATCH, data_lines):
+                f.write(buf)
+        self._finish_checksum(output_path, checksum)
+
+
+    def write_jsonl_bytes(
+            self,
+            output_path: Path,
+            max_bytes: int
+    ) -> Tuple[int, int]:
+        """
+        Write records to `output_path` until the next record would take
+        the file past `max_bytes` (the header counts towards it). Sizes
+        are tracked from the encoded buffers as they are written; the
+        file is never re-measured.
+
+        Parameters:
+            output_path (Path): Where to write the file.
+            max_bytes (int): Size budget of the file.
+
+        Returns:
+            Tuple[int, int]: Number of records and bytes written
+            (the digest, with `checksum` set, is left in `last_sum`).
+
+        Raises:
+            ValueError: If `max_bytes` cannot even hold the header.
+        """
+        header = self.encode_header()
+        if len(header) > max_bytes:
+            raise ValueError(f"{max_bytes} bytes cannot hold the "
+                             f"{len(header)}-byte header of {output_path}")
+        logger.info("Generating up to %d bytes → %s", max_bytes, output_path)
+        lines = 0
+        written = 0
+        batch = DEFAULT_WRITE_BATCH
+        checksum = self._start_checksum(output_path, False)
+        with open_output(output_path, self.write_mode, max_bytes) as f:
+            if checksum is not None:
+                from magicgenerator.checksum import ChecksumWriter
+
+                f = ChecksumWriter(f, checksum)
+            f.write(header)
+            written = header_len = len(header)
+            while True:
+                room = max_bytes - written
+                if lines:
+                    # Near the end, only generate about what still fits
+                    avg = (written - header_len) / lines
+                    batch = min(DEFAULT_WRITE_BATCH, int(room // avg) + 1)
+                buf = self.encode_batch(batch)
+                if len(buf) > room:
+                    # Keep the whole records that still fit, then stop
+                    cut, records = self._whole_records(buf, room)
+                    f.write(buf[:cut])
+                    lines += records
+                    written += cut
+                    break
+                f.write(buf)
+                lines += batch
+                written += len(buf)
+        self._finish_checksum(output_path, checksum)
+        return lines, written
+
+
+    def _whole_records(self, buf: bytes, room: int) -> Tuple[int, int]:
+        """
+        Length and number of the leading whole records of an encoded
+        batch that fit in `room` bytes. JSON escapes newlines, so every
+        newline ends a record; csv/tsv values may hold quoted newlines,
+        so delimited batches are walked record by record with csv.reader.
+        """
+        if self.output_format == "jsonl":
+            cut = buf.rfind(b"\n", 0, room) + 1
+            return cut, buf.count(b"\n", 0, cut)
+
+        consumed = 0
+
+        def physical_lines() -> Iterator[str]:
+            nonlocal consumed
+            for line in io.StringIO(buf.decode("utf-8"), newline=""):
+                consumed += len(line.encode("utf-8"))
+                yield line
+
+        cut = records = 0
+        reader = csv.reader(physical_lines(),
+                            **_DELIMITED_DIALECTS[self.output_format])
+        for _ in reader:
+            if consumed > room:
+                break
+            cut = consumed
+            records += 1
+        return cut, records
+
+
+    def write_partitioned(
+            self,
+            output_dir: Path,
+            filename: str,
+            data_lines: int,
+            field: str,
+            max_open: int = DEFAULT_MAX_OPEN
+    ) -> List[Path]:
+        """
+        Write `data_lines` records split by the value of `field`, each
+        partition going to `output_dir/<field>=<value>/<filename>`.
+        Every batch is grouped by value and each group is encoded and
+        handed to the partition's buffered writer in one piece.
+
+        Parameters:
+            output_dir (Path): Root of the partitioned layout.
+            filename (str): File name used inside every partition.
+            data_lines (int): Number of records to write.
+            field (str): Schema field to partition by.
+            max_open (int): Maximum number of open partition files.
+
+        Returns:
+            List[Path]: One written file per partition value.
+        """
+        logger.info("Generating %d lines → %s/%s=*/%s",
+                    data_lines, output_dir, field, filename)
+        index = self.columns.index(field)
+        row = self.generate_row
+        with PartitionWriter(output_dir, field, filename,
+                             self.encode_header(), max_open) as writer:
+            remaining = data_lines
+            while remaining > 0:
+                n = min(DEFAULT_WRITE_BATCH, remaining)
+                groups: Dict[Any, List[List[Any]]] = {}
+                for r in [row() for _ in range(n)]:
+                    groups.setdefault(r[index], []).append(r)
+                for value, rows in groups.items():
+                    writer.write(value, self.encode_rows(rows))
+                remaining -= n
+        return writer.paths
+
+
+    def write_sink(
+            self,
+            sink: "Sink",
+            data_lines: int,
+            batch_size: int = DEFAULT_SINK_BATCH
+    ) -> None:
+        """
+        Send `data_lines` records to `sink` in the output format,
+        one write per batch (csv/tsv start with a header).
+
+        Parameters:
+            sink (Sink): Opened socket / FIFO sink.
+            data_lines (int): Number of lines (records) to send.
+            batch_size (int): Records encoded and sent per write.
         """
-        logger.info("Generating %d lines → %s", data_lines, output_path)
-        with output_path.open("w", encoding="utf-8") as f:
-            for i in range(data_lines):
-                rec = self.generate_record()
-                f.write(json.dumps(rec))
-                f.write("\n")
+        logger.info(
+            "Sending %d lines → %s in batches of %d",
+            data_lines, sink, batch_size
+        )
+        header = self.encode_header()
+        if header:
+            sink.write(header)
+        for buf in self.iter_encoded(batch_size, data_lines):
+            sink.write(buf)
@@ -1,51 +1,219 @@
+import atexit
 import logging
+import queue
 import sys
-from typing import Optional
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, List, Optional
 
+DEFAULT_LOG_FILE = "logfile.log"
+DEFAULT_LOG_LEVEL = "INFO"
 
-def get_logger(
-        name: str = "magicgenerator",
-        log_file: Optional[str] = "logfile.log"
-) -> logging.Logger:
+
+class _ListenerQueueHandler(QueueHandler):
+    """
+    QueueHandler that makes sure a listener is draining its queue.
+    In the main process the listener is started on the first record,
+    so importing the package never touches stderr or the log file.
+    """
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if _listener is None and not _is_worker:
+            with _start_lock:
+                if _listener is None:
+                    configure_logging(logging.getLevelName(_level), _log_file)
+        self.queue.put_nowait(record)
+
+
+# Every magicgenerator logger shares this one handler, so emitting a
+# record is just a queue put; formatting and disk I/O happen on the
+# listener thread. While pools run, the handler's queue is a
+# multiprocessing queue shared with their workers, so the one listener
+# drains both (see create_worker_log_queue).
+_handler = _ListenerQueueHandler(queue.SimpleQueue())
+_listener: Optional[QueueListener] = None
+# Pools currently logging into the shared multiprocessing queue
+_worker_queue_users = 0
+_loggers: Dict[str, logging.Logger] = {}
+_level = logging.getLevelName(DEFAULT_LOG_LEVEL)
+# No log file until configure_logging() asks for one (the CLI does),
+# so library users never get a logfile.log in their working directory
+_log_file: Optional[str] = None
+_is_worker = False
+_start_lock = threading.Lock()
+
+
+def _build_handlers() -> List[logging.Handler]:
+    """
+    Create the sink handlers owned by a listener:
+    stderr always, plus the log file unless it is disabled.
+    """
+    formatter = logging.Formatter(
+        "%(asctime)s - %(levelname)s - %(message)s"
+    )
+
+    # Console handler -> stderr
+    # so stdout stays purely for program output
+    console_handler = logging.StreamHandler(sys.stderr)
+    console_handler.setFormatter(formatter)
+    handlers: List[logging.Handler] = [console_handler]
+
+    # File handler (optional); delay=True so the file is only
+    # created once something is actually written to it
+    if _log_file:
+        file_handler = logging.FileHandler(_log_file, delay=True)
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+    return handlers
+
+
+def _start_listener(q: Any) -> QueueListener:
+    listener = QueueListener(q, *_build_handlers())
+    listener.start()
+    return listener
+
+
+def _stop_listener(listener: QueueListener) -> None:
+    listener.stop()
+    for h in listener.handlers:
+        h.close()
+
+
+def shutdown_logging() -> None:
+    """
+    Stop the listener, flushing every queued record to its sinks.
+    Safe to call multiple times; the next record restarts it.
+    """
+    global _listener
+    if _listener is not None:
+        _stop_listener(_listener)
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+def configure_logging(
+        level: str = DEFAULT_LOG_LEVEL,
+        log_file: Optional[str] = DEFAULT_LOG_FILE
+) -> None:
+    """
+    (Re)configure process-wide logging.
+
+    Parameters:
+        level (str): Minimum level name (DEBUG, INFO, WARNING, ERROR).
+        log_file (Optional[str]): Path to a file for duplicating logs.
+                                Pass None or "" to disable file logging.
+    """
+    global _level, _log_file, _listener
+    _level = logging.getLevelName(level.upper())
+    _log_file = log_file or None
+    for lg in _loggers.values():
+        lg.setLevel(_level)
+
+    shutdown_logging()
+    _listener = _start_listener(_handler.queue)
+
+
+def _swap_queue(q: Any) -> None:
+    """
+    Point the shared handler at `q`, flushing what is queued so far
+    and moving the running listener over to the new queue.
+    """
+    global _listener
+    running = _listener is not None
+    shutdown_logging()
+    _handler.queue = q
+    if running:
+        _listener = _start_listener(q)
+
+
+def create_worker_log_queue() -> Any:
     """
-    Return a logger that writes INFO+ messages to stderr
-    and also to a file by default.
+    Return the queue pool workers log into: the main listener's own
+    queue, switched to a multiprocessing queue while any pool runs, so
+    worker records reach the same single set of sinks.
+
+    Returns:
+        multiprocessing.Queue: Pass it, together with get_log_level(),
+        to init_worker_logging through the pool initializer.
+    """
+    global _worker_queue_users
+    with _start_lock:
+        if _worker_queue_users == 0:
+            import multiprocessing
+
+            _swap_queue(multiprocessing.Queue(-1))
+        _worker_queue_users += 1
+        return _handler.queue
+
+
+def stop_worker_log_queue(q: Any) -> None:
+    """
+    Release a queue from create_worker_log_queue once its pool has
+    shut down (call it from a finally block). When no pool is left,
+    pending records are flushed and the main process goes back to its
+    in-process queue.
+    """
+    global _worker_queue_users
+    with _start_lock:
+        if _worker_queue_users == 0 or q is not _handler.queue:
+            return
+        _worker_queue_users -= 1
+        if _worker_queue_users == 0:
+            _swap_queue(queue.SimpleQueue())
+            q.close()
+            q.join_thread()
+
+
+def init_worker_logging(q: Any, level: int) -> None:
+    """
+    Pool initializer: route this worker's records to the parent's
+    listener instead of writing to any sink directly.
+
+    Parameters:
+        q: Queue returned by create_worker_log_queue in the parent.
+        level (int): Numeric log level to apply in the worker.
+    """
+    global _listener, _level, _is_worker
+    # A forked worker inherits the parent's listener object
+    # but not its thread, so forget it rather than stopping it
+    _listener = None
+    _is_worker = True
+    _level = level
+    _handler.queue = q
+    for lg in _loggers.values():
+        lg.setLevel(level)
+
+
+def get_log_level() -> int:
+    """Return the numeric level currently applied to all loggers."""
+    return _level
+
+
+def get_logger(name: str = "magicgenerator") -> logging.Logger:
+    """
+    Return a logger that hands INFO+ (or the configured level) records
+    to the shared queue; a listener thread writes them to stderr and,
+    once configure_logging() enabled it, to a log file.
 
     Parameters:
         name (str): The logger’s namespace (e.g., module name).
                     Defaults to 'magicgenerator'.
-        log_file (Optional[str]): Path to a file for duplicating logs.
-                                Pass None to disable file logging.
 
     Returns:
         logging.Logger: The configured logger instance.
     """
     logger = logging.getLogger(name)
 
-    # This check ensures we only add handlers once.
-    # Without it, calling get_logger() multiple times would attach
-    # multiple StreamHandlers/FileHandlers
-    # and log each message repeatedly.
+    # This check ensures we only add the handler once.
+    # Without it, calling get_logger() multiple times would
+    # enqueue (and log) each message repeatedly.
     if not logger.handlers:
-        logger.setLevel(logging.INFO)
-
-        formatter = logging.Formatter(
-            "%(asctime)s - %(levelname)s - %(message)s"
-        )
-
-        # Console handler -> stderr
-        # so stdout stays purely for program output
-        console_handler = logging.StreamHandler(sys.stderr)
-        console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
-
-        # File handler (optional)
-        if log_file:
-            file_handler = logging.FileHandler(log_file)
-            file_handler.setFormatter(formatter)
-            logger.addHandler(file_handler)
+        logger.setLevel(_level)
+        logger.addHandler(_handler)
 
         # Prevent messages bubbling up to the root logger
         logger.propagate = False
+        _loggers[name] = logger
 
     return logger
@@ -2,13 +2,34 @@ import re
 import sys
 import json
 from pathlib import Path
-from dataclasses import dataclass
-from typing import Dict, Any, Literal
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Literal, Tuple, Union
 from magicgenerator.logger import get_logger
+from magicgenerator.distributions import build_sampler
 
 logger = get_logger(__name__)
 
 
+# "rand(min, max)" for ints
+_RAND_RANGE_PATTERN = re.compile(r"""
+    rand\(              # literal 'rand('
+    \s*                 # optional whitespace
+    (\d+)               # first group: one or more digits (min value)
+    \s*,\s*             # comma, optionally surrounded by whitespace
+    (\d+)               # second group: one or more digits (max value)
+    \s*                 # optional whitespace
+    \)                  # literal closing parenthesis ')'
+""", re.VERBOSE)
+
+# Element count of an array field: "n" or "rand(min, max)"
+_ARRAY_COUNT_PATTERN = re.compile(r"(\d+)|rand\(\s*(\d+)\s*,\s*(\d+)\s*\)")
+
+# "name(p1, p2, ...)" for the int distributions
+_DISTRIBUTION_PATTERN = re.compile(
+    r"(normal|lognormal|exp|zipf)\(\s*([^()]*?)\s*\)"
+)
+
+
 @dataclass
 class SchemaField:
     """
@@ -20,33 +41,73 @@ class SchemaField:
         args:   extra parameters,
                 for rand_range → [min, max], for choice → list[Any], else []
         const:  only used if mode == "constant" -> the literal value
+        sampler: only used for distribution modes (normal, lognormal,
+                exp, zipf) -> precomputed batch sampler, see
+                magicgenerator.distributions
+        items:  only used for nested fields -> for "object" the
+                Dict[str, SchemaField] of its members, for "array" the
+                SchemaField of its elements (args = [min, max] count)
     """
-    type:   Literal["timestamp", "str", "int"]
+    type:   Literal["timestamp", "str", "int", "object", "array"]
     mode:   Literal[
         "timestamp", "empty", "rand_uuid",
-        "rand_int", "rand_range", "choice", "constant"
+        "rand_int", "rand_range", "choice", "constant",
+        "normal", "lognormal", "exp", "zipf",
+        "object", "array"
     ]
     args: list[Any]
     const: Any = None
+    sampler: Any = field(default=None, compare=False, repr=False)
+    items: Any = None
+
+
+# A raw schema maps field names to spec strings or nested raw schemas
+RawSchema = Dict[str, Union[str, "RawSchema"]]
+
+
+def flatten_schema(schema_model: Dict[str, SchemaField],
+                   prefix: str = "") -> List[Tuple[str, SchemaField]]:
+    """
+    Leaf fields of a (possibly nested) schema model in schema order,
+    object members named by their dotted path (e.g. "user.id").
+    Arrays are leaves: tabular outputs store them as one JSON value.
+    """
+    leaves = []
+    for name, f in schema_model.items():
+        if f.mode == "object":
+            leaves.extend(flatten_schema(f.items, f"{prefix}{name}."))
+        else:
+            leaves.append((f"{prefix}{name}", f))
+    return leaves
+
+
+def schema_hash(raw_schema: RawSchema) -> str:
+    """Content hash of a raw schema, independent of key order."""
+    # hashlib loads OpenSSL; only runs that hash a schema pay for it
+    import hashlib
+
+    canonical = json.dumps(raw_schema, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
 
 
 class SchemaParser:
     """Encapsulates everything around loading & parsing a schema."""
 
     @staticmethod
-    def load_schema(schema_arg: str) -> Dict[str, str]:
+    def load_schema(schema_arg: str) -> RawSchema:
         """
         Accepts either:
             - a path to a .json schema file, or
             - an inline JSON string.
 
         Returns:
-            Dict[str, str]: Dictionary mapping
-                            field names to their generation spec strings.
+            RawSchema: Dictionary mapping field names to their generation
+                       spec strings (or, for nested objects, to a
+                       dictionary of the same form).
 
         Raises:
             SystemExit: If the file is unreadable, the input is not valid JSON,
-            or the result is not a str-to-str dictionary.
+            or the result is not a str-to-str (or nested) dictionary.
         """
         schema_path = Path(schema_arg)
 
@@ -76,21 +137,32 @@ class SchemaParser:
             )
             sys.exit(1)
 
+        SchemaParser._check_entries(schema)
+
+        logger.info("Schema has %d fields", len(schema))
+        return schema
+
+
+    @staticmethod
+    def _check_entries(schema: Dict[str, Any]) -> None:
+        """
+        Exit unless every value is a spec string or a nested object
+        of the same form.
+        """
         for key, val in schema.items():
             # we assume keys are strings because
             # JSON object keys are always strings
             # so only need to check values:
-            if not isinstance(val, str):
+            if isinstance(val, dict):
+                SchemaParser._check_entries(val)
+            elif not isinstance(val, str):
                 logger.error(
-                    "Schema entries must be str -> str;"
+                    "Schema entries must be str -> str (or nested objects);"
                     "got key=%r (%s), val=%r (%s)",
                     key, type(key).__name__, val, type(val).__name__
                 )
                 sys.exit(1)
 
-        logger.info("Schema has %d fields", len(schema))
-        return schema
-
 
     @staticmethod
     def _parse_timestamp(field_name: str, right: str) -> SchemaField:
@@ -165,6 +237,8 @@ class SchemaParser:
             - "" → empty (None)
             - "rand" → random int
             - "rand(min,max)" → random int in range
+            - "normal(mu,sigma)", "lognormal(mu,sigma)", "exp(lambda)",
+              "zipf(s,max)" → int drawn from that distribution
             - '[1, 2, 3]' → choice list
             - numeric string → constant int
 
@@ -180,20 +254,22 @@ class SchemaParser:
         if right == "rand":
             return SchemaField("int", "rand_int", [], None)
 
-        pattern = re.compile(r"""
-            rand\(              # literal 'rand('
-            \s*                 # optional whitespace
-            (\d+)               # first group: one or more digits (min value)
-            \s*,\s*             # comma, optionally surrounded by whitespace
-            (\d+)               # second group: one or more digits (max value)
-            \s*                 # optional whitespace
-            \)                  # literal closing parenthesis ')'
-        """, re.VERBOSE)
         # Attempt to match against the input string `right`
-        if match := pattern.fullmatch(right):
+        if match := _RAND_RANGE_PATTERN.fullmatch(right):
             min_val, max_val = map(int, match.groups())
             return SchemaField("int", "rand_range", [min_val, max_val])
 
+        if match := _DISTRIBUTION_PATTERN.fullmatch(right):
+            name, raw_params = match.groups()
+            try:
+                params = [float(p) for p in raw_params.split(",")]
+                sampler = build_sampler(name, params)
+            except ValueError as e:
+                logger.error("Field %s: invalid %s(%s): %s",
+                             field_name, name, raw_params, e)
+                sys.exit(1)
+            return SchemaField("int", name, params, sampler=sampler)
+
         if right.startswith("["):
             try:
                 items = json.loads(right)
@@ -214,6 +290,69 @@ class SchemaParser:
         return SchemaField("int", "constant", [], const=val)
 
 
+    @staticmethod
+    def _parse_array(field_name: str, right: str) -> SchemaField:
+        """
+        Parses an array specification "<count>:<element spec>", where the
+        count is "n" or "rand(min,max)" and the element spec is any field
+        spec (arrays nest) or an inline JSON object schema.
+
+        Returns:
+            SchemaField: mode "array", args [min, max], items = element.
+
+        Raises:
+            SystemExit: On a malformed count or element spec.
+        """
+        count, sep, elem = right.partition(":")
+        match = _ARRAY_COUNT_PATTERN.fullmatch(count.strip())
+        if not sep or not match:
+            logger.error(
+                "Field %s: expected array:<n or rand(min,max)>:<spec>, "
+                "got %r", field_name, "array:" + right
+            )
+            sys.exit(1)
+        n, low, high = match.groups()
+        bounds = [int(n), int(n)] if n is not None else [int(low), int(high)]
+        if bounds[0] > bounds[1]:
+            logger.error("Field %s: array count min > max", field_name)
+            sys.exit(1)
+
+        elem = elem.strip()
+        elem_name = f"{field_name}[]"
+        if elem.startswith("{"):
+            try:
+                members = json.loads(elem)
+            except json.JSONDecodeError as e:
+                logger.error("Field %s: bad JSON object %s", elem_name, e)
+                sys.exit(1)
+            SchemaParser._check_entries(members)
+            item = SchemaParser._parse_object(elem_name, members)
+        else:
+            item = SchemaParser.parse_field_spec(elem_name, elem)
+        return SchemaField("array", "array", bounds, items=item)
+
+
+    @classmethod
+    def _parse_object(cls, field_name: str, raw: RawSchema) -> SchemaField:
+        """Parses a nested object: every member is parsed recursively."""
+        return SchemaField("object", "object", [], items={
+            name: cls._parse_entry(f"{field_name}.{name}", spec)
+            for name, spec in raw.items()
+        })
+
+
+    @classmethod
+    def _parse_entry(cls, field_name: str, spec: Any) -> SchemaField:
+        """Parses one schema entry: a spec string or a nested object."""
+        if isinstance(spec, dict):
+            return cls._parse_object(field_name, spec)
+        if not isinstance(spec, str):
+            logger.error("Field %s: spec must be a string or an object, "
+                         "got %s", field_name, type(spec).__name__)
+            sys.exit(1)
+        return cls.parse_field_spec(field_name, spec)
+
+
     @staticmethod
     def parse_field_spec(field_name: str, raw: str) -> SchemaField:
         """
@@ -236,12 +375,15 @@ class SchemaParser:
         left = left.strip()
         right = right.strip()
 
-        if left not in {"timestamp", "str", "int"}:
+        if left not in {"timestamp", "str", "int", "array"}:
             logger.error(
-                "Field %s: unknown type %r (allowed: timestamp, str, int)",
+                "Field %s: unknown type %r "
+                "(allowed: timestamp, str, int, array)",
                 field_name, left)
             sys.exit(1)
 
+        if left == "array":
+            return SchemaParser._parse_array(field_name, right)
         if left == "timestamp":
             return SchemaParser._parse_timestamp(field_name, right)
         if left == "str":
@@ -251,17 +393,20 @@ class SchemaParser:
 
 
     @classmethod
-    def build_schema_model(cls, raw_schema: Dict[str, str]) -> Dict[str, SchemaField]:
+    def build_schema_model(cls, raw_schema: RawSchema) -> Dict[str, SchemaField]:
         """
         Transforms a raw schema dictionary into a validated schema model.
+        Nested objects become "object" fields whose `items` hold the
+        parsed members; DataGenerator compiles the whole tree into one
+        generation plan.
 
         Parameters:
-            raw_schema (Dict[str, str]): Field-to-spec mapping from input schema.
+            raw_schema (RawSchema): Field-to-spec mapping from input schema.
 
         Returns:
             Dict[str, SchemaField]: Field-to-SchemaField mapping for generation.
         """
         model = {}
-        for field, spec in raw_schema.items():
-            model[field] = cls.parse_field_spec(field, spec)
+        for name, spec in raw_schema.items():
+            model[name] = cls._parse_entry(name, spec)
         return model
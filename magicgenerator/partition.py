@@ -0,0 +1,122 @@
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List
+from urllib.parse import quote
+
+# Directory name used for records whose partition value is empty/None
+NULL_PARTITION = "__null__"
+
+# Buffered bytes per partition before they are written out
+DEFAULT_PARTITION_BUFFER = 1 << 20
+
+# Open file handles kept across partitions (least recently used closed first)
+DEFAULT_MAX_OPEN = 64
+
+
+def partition_dir_name(field: str, value: Any) -> str:
+    """
+    Hive-style directory name for a partition, e.g. "region=eu".
+    Characters that are unsafe in a path segment are %-escaped.
+    """
+    if value is None or value == "":
+        return f"{field}={NULL_PARTITION}"
+    return f"{field}={quote(str(value), safe='')}"
+
+
+class PartitionWriter:
+    """
+    Writes one file per partition value under
+    `output_dir/<field>=<value>/<filename>`.
+
+    Encoded lines are buffered per partition and written in large
+    chunks; at most `max_open` files are open at once, the least
+    recently written one being closed when another must be opened.
+    A partition file is truncated (and given `header`) the first time
+    this writer touches it and appended to after an eviction.
+    """
+
+    def __init__(self, output_dir: Path, field: str, filename: str,
+                 header: bytes = b"", max_open: int = DEFAULT_MAX_OPEN,
+                 buffer_bytes: int = DEFAULT_PARTITION_BUFFER):
+        self.output_dir = output_dir
+        self.field = field
+        self.filename = filename
+        self.header = header
+        self.max_open = max(1, max_open)
+        self.buffer_bytes = buffer_bytes
+        self._handles: "OrderedDict[Path, BinaryIO]" = OrderedDict()
+        self._buffers: Dict[Path, List[bytes]] = {}
+        self._buffered: Dict[Path, int] = {}
+        self._paths: Dict[Any, Path] = {}
+        self._created = set()
+
+    @property
+    def paths(self) -> List[Path]:
+        """Files written so far, one per partition value."""
+        return list(self._paths.values())
+
+    def _path_for(self, value: Any) -> Path:
+        path = self._paths.get(value)
+        if path is None:
+            directory = self.output_dir / partition_dir_name(self.field, value)
+            directory.mkdir(exist_ok=True)
+            path = directory / self.filename
+            self._paths[value] = path
+        return path
+
+    def _handle(self, path: Path) -> BinaryIO:
+        f = self._handles.get(path)
+        if f is not None:
+            self._handles.move_to_end(path)
+            return f
+        if len(self._handles) >= self.max_open:
+            _, oldest = self._handles.popitem(last=False)
+            oldest.close()
+        if path in self._created:
+            f = open(path, "ab")
+        else:
+            f = open(path, "wb")
+            f.write(self.header)
+            self._created.add(path)
+        self._handles[path] = f
+        return f
+
+    def _flush(self, path: Path) -> None:
+        chunks = self._buffers.pop(path, None)
+        self._buffered.pop(path, None)
+        if chunks:
+            self._handle(path).write(b"".join(chunks))
+
+    def write(self, value: Any, data: bytes) -> None:
+        """Queue encoded lines belonging to the partition `value`."""
+        path = self._path_for(value)
+        self._buffers.setdefault(path, []).append(data)
+        size = self._buffered.get(path, 0) + len(data)
+        self._buffered[path] = size
+        if size >= self.buffer_bytes:
+            self._flush(path)
+
+    def close(self) -> None:
+        """Write out every buffer and close all handles."""
+        for path in list(self._buffers):
+            self._flush(path)
+        while self._handles:
+            _, f = self._handles.popitem()
+            f.close()
+
+    def __enter__(self) -> "PartitionWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def partition_dirs(output_dir: Path, field: str) -> List[Path]:
+    """Existing `<field>=<value>` directories in `output_dir`."""
+    prefix = f"{field}="
+    with os.scandir(output_dir) as it:
+        return [
+            Path(entry.path) for entry in it
+            if entry.name.startswith(prefix) and entry.is_dir()
+        ]
@@ -0,0 +1,157 @@
+import argparse
+import time
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Optional
+from magicgenerator.generator import DataGenerator
+from magicgenerator.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Seconds per unit accepted after the slash in "--rate N/<unit>"
+_RATE_UNITS = {"s": 1.0, "m": 60.0, "h": 3600.0}
+
+# How often the pacing loop wakes up to emit a batch
+DEFAULT_TICK = 0.005
+
+# How often progress is reported while streaming
+REPORT_INTERVAL = 10.0
+
+
+def parse_rate(value: str) -> float:
+    """
+    Parses a rate given as "N", "N/s", "N/m" or "N/h" into records
+    per second. Used as an argparse `type`.
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is malformed or not > 0.
+    """
+    number, _, unit = value.strip().partition("/")
+    try:
+        per_second = float(number) / _RATE_UNITS[unit.strip() or "s"]
+    except (ValueError, KeyError):
+        raise argparse.ArgumentTypeError(
+            f"invalid rate {value!r} (expected N or N/s, N/m, N/h)"
+        )
+    if per_second <= 0:
+        raise argparse.ArgumentTypeError(f"rate must be > 0 (got {value!r})")
+    return per_second
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `rate` tokens per second.
+
+    Refill is computed from the monotonic clock on every call, so the
+    long-run rate does not drift with sleep inaccuracy; `capacity`
+    bounds how much a stalled consumer can be caught up in one burst.
+    """
+
+    def __init__(
+            self,
+            rate: float,
+            capacity: Optional[float] = None,
+            clock: Callable[[], float] = time.monotonic,
+            sleep: Callable[[float], None] = time.sleep
+    ):
+        self.rate = rate
+        # Default: allow catching up on one second worth of records
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = 0.0
+        self._last = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._last) * self.rate
+        )
+        self._last = now
+
+    def take(self, max_tokens: int, tick: float = DEFAULT_TICK) -> int:
+        """
+        Blocks until at least one whole token is available, then takes
+        as many as possible, up to `max_tokens`.
+
+        Returns:
+            int: Number of tokens taken (>= 1 when max_tokens >= 1).
+        """
+        self._refill()
+        while self._tokens < 1.0:
+            # Sleep at least one tick so records are emitted in batches
+            wait = max(tick, (1.0 - self._tokens) / self.rate)
+            self._sleep(wait)
+            self._refill()
+        n = min(int(self._tokens), max_tokens)
+        self._tokens -= n
+        return n
+
+
+@dataclass
+class RateReport:
+    """Outcome of a rate-controlled stream."""
+    emitted: int
+    elapsed: float
+    target_rate: float
+
+    @property
+    def achieved_rate(self) -> float:
+        return self.emitted / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def _log_report(report: RateReport) -> None:
+    logger.info(
+        "Emitted %d records in %.2fs: achieved %.1f/s (target %.1f/s)",
+        report.emitted, report.elapsed,
+        report.achieved_rate, report.target_rate
+    )
+
+
+def stream_at_rate(
+        gen: DataGenerator,
+        out: BinaryIO,
+        rate: float,
+        limit: Optional[int] = None,
+        duration: Optional[float] = None,
+        tick: float = DEFAULT_TICK
+) -> RateReport:
+    """
+    Writes encoded records to `out` paced by a token bucket. All records
+    allowed since the previous tick are generated and written in one
+    write() call, so the cost of sleeping is paid per batch, not per line.
+
+    Parameters:
+        gen (DataGenerator): Source of records.
+        out (BinaryIO): Stream to write to (e.g. sys.stdout.buffer).
+        rate (float): Target records per second.
+        limit (Optional[int]): Stop after this many records.
+        duration (Optional[float]): Stop after this many seconds.
+        Without a limit and a duration the stream runs until interrupted.
+
+    Returns:
+        RateReport: Records emitted, elapsed time and target rate.
+    """
+    bucket = TokenBucket(rate)
+    start = time.monotonic()
+    next_report = start + REPORT_INTERVAL
+    emitted = 0
+    report = RateReport(0, 0.0, rate)
+    out.write(gen.encode_header())
+    try:
+        while limit is None or emitted < limit:
+            remaining = limit - emitted if limit is not None else int(rate) + 1
+            n = bucket.take(remaining, tick)
+            now = time.monotonic()
+            if duration is not None and now - start >= duration:
+                break
+            out.write(gen.encode_batch(n))
+            out.flush()
+            emitted += n
+            if now >= next_report:
+                _log_report(RateReport(emitted, now - start, rate))
+                next_report = now + REPORT_INTERVAL
+    finally:
+        report.emitted = emitted
+        report.elapsed = time.monotonic() - start
+        _log_report(report)
+    return report
@@ -0,0 +1,196 @@
+import gc
+import hashlib
+import hmac
+import io
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from magicgenerator.parser import SchemaParser, SchemaField, schema_hash
+from magicgenerator.logger import get_logger
+from magicgenerator.utils import new_file_mode
+
+logger = get_logger(__name__)
+
+# File extension of cached schema models
+ARTIFACT_SUFFIX = ".schema"
+
+# Layout of the cached models; bump whenever SchemaField or the
+# artifact layout below changes, so older artifacts are never reused
+CACHE_FORMAT = 3
+
+# Artifacts start with this tag and an HMAC-SHA256 of the pickled model
+_MAGIC = b"MGSCHEMA"
+_DIGEST_SIZE = hashlib.sha256().digest_size
+
+# String lists at least this long (choice values) are stored as one
+# joined string: splitting it is much faster than unpickling each item
+_JOIN_MIN = 64
+
+# Per-user secret the artifacts are signed with; kept outside the cache
+# directory, so a shared --cache_dir cannot be used to forge artifacts
+KEY_FILE = "~/.config/magicgenerator/cache.key"
+
+
+def schema_key(schema_text: bytes) -> str:
+    """
+    Cache key of a schema: hash of its exact text and CACHE_FORMAT,
+    so a change of the model layout never reuses old artifacts.
+    """
+    h = hashlib.sha256(schema_text)
+    h.update(b"\0" + str(CACHE_FORMAT).encode("ascii"))
+    return h.hexdigest()
+
+
+def _schema_text(schema_arg: str) -> bytes:
+    """Raw bytes of a schema given as a file path or inline JSON."""
+    path = Path(schema_arg)
+    if path.is_file():
+        return path.read_bytes()
+    return schema_arg.encode("utf-8")
+
+
+def _signing_key() -> bytes:
+    """
+    The user's artifact signing key, created (mode 0600) on first use.
+    Created under a temporary name and linked into place, so concurrent
+    runs agree on one key.
+    """
+    path = Path(KEY_FILE).expanduser()
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(os.urandom(32))
+        try:
+            os.link(tmp, path)
+        except FileExistsError:
+            pass
+    finally:
+        os.unlink(tmp)
+    return path.read_bytes()
+
+
+class _Pickler(pickle.Pickler):
+    """Pickles long string lists as one "\\0"-joined string."""
+
+    def persistent_id(self, obj):
+        if type(obj) is list and len(obj) >= _JOIN_MIN \
+                and all(type(v) is str and "\0" not in v for v in obj):
+            return "\0".join(obj)
+        return None
+
+
+class _Unpickler(pickle.Unpickler):
+    """Counterpart of _Pickler: splits joined string lists again."""
+
+    def persistent_load(self, pid):
+        return pid.split("\0")
+
+
+def read_artifact(
+        path: Path
+) -> Optional[Tuple[Dict[str, SchemaField], str]]:
+    """
+    Load a cached schema model and the schema_hash of its raw schema.
+    Only artifacts signed with this user's key are unpickled, so a
+    writable cache directory cannot inject code.
+
+    Returns:
+        Optional[Tuple[Dict[str, SchemaField], str]]: The model and
+        schema hash, or None if the artifact is missing, unreadable or
+        not signed with this user's key.
+    """
+    try:
+        data = path.read_bytes()
+        head = len(_MAGIC) + _DIGEST_SIZE
+        payload = memoryview(data)[head:]
+        digest = hmac.new(_signing_key(), payload, "sha256").digest()
+        if data[:len(_MAGIC)] != _MAGIC \
+                or not hmac.compare_digest(data[len(_MAGIC):head], digest):
+            raise ValueError("bad signature")
+        # Unpickling allocates many objects at once; collecting
+        # meanwhile would only rescan them
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return _Unpickler(io.BytesIO(payload)).load()
+        finally:
+            if enabled:
+                gc.enable()
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, pickle.UnpicklingError) as e:
+        logger.warning("Ignoring unreadable schema cache %s: %s", path, e)
+        return None
+
+
+def write_artifact(path: Path, model: Dict[str, SchemaField],
+                   raw_hash: str) -> None:
+    """
+    Store a signed schema model atomically (temporary file + rename),
+    so concurrent runs never read a half-written artifact.
+    """
+    buf = io.BytesIO()
+    _Pickler(buf, pickle.HIGHEST_PROTOCOL).dump((model, raw_hash))
+    payload = buf.getvalue()
+    digest = hmac.new(_signing_key(), payload, "sha256").digest()
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        os.fchmod(fd, new_file_mode())
+        with os.fdopen(fd, "wb") as f:
+            f.write(_MAGIC + digest + payload)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def load_schema_model(schema_arg: str,
+                      cache_dir: Path) -> Tuple[Dict[str, SchemaField], str]:
+    """
+    Parse a schema (file path or inline JSON), reusing the compiled
+    model cached in `cache_dir` when the same schema text was parsed
+    before with the same CACHE_FORMAT. A cache hit reads no JSON at all.
+
+    Parameters:
+        schema_arg (str): As accepted by SchemaParser.load_schema.
+        cache_dir (Path): Directory of cached artifacts (created if needed).
+
+    Returns:
+        Tuple[Dict[str, SchemaField], str]: Field-to-SchemaField mapping
+        and the schema_hash of the raw schema.
+
+    Raises:
+        SystemExit: If the schema is invalid (see SchemaParser).
+    """
+    try:
+        key = schema_key(_schema_text(schema_arg))
+    except OSError as e:
+        logger.warning("Cannot read schema for caching: %s", e)
+        key = None
+
+    path = cache_dir / f"{key}{ARTIFACT_SUFFIX}"
+    if key is not None:
+        cached = read_artifact(path)
+        if cached is not None:
+            logger.info("Loaded schema model from cache %s", path)
+            return cached
+
+    raw_schema = SchemaParser.load_schema(schema_arg)
+    model = SchemaParser.build_schema_model(raw_schema)
+    raw_hash = schema_hash(raw_schema)
+    if key is not None:
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            write_artifact(path, model, raw_hash)
+            logger.info("Cached schema model as %s", path)
+        except (OSError, pickle.PicklingError) as e:
+            logger.warning("Could not cache schema model in %s: %s",
+                           cache_dir, e)
+    return model, raw_hash
@@ -0,0 +1,160 @@
+import json
+import random
+import time
+from typing import Any, Callable, Dict, List, Tuple
+from magicgenerator.parser import SchemaField
+
+# Python expression generating a value, per scalar mode
+# ({} is the name the field's data is bound to in the compiled code)
+_VALUE_EXPR = {
+    "timestamp": "str(time())",
+    "empty": "{}",
+    "rand_uuid": "str(uuid4())",
+    "rand_int": "randint(0, 10000)",
+    "choice": "choice({})",
+    "constant": "{}",
+    "normal": "{}()",
+    "lognormal": "{}()",
+    "exp": "{}()",
+    "zipf": "{}()",
+}
+
+# A piece of a JSON line: (True, literal text) or (False, expression)
+_Part = Tuple[bool, str]
+
+
+class _Compiler:
+    """
+    Turns a schema model into Python source once, so generating a
+    record runs straight-line code: no walk over the field tree, and
+    for JSON no intermediate dict, with constant text (keys,
+    punctuation, constants, encoded choices) baked in ahead of time.
+    """
+
+    def __init__(self):
+        self.ns: Dict[str, Any] = {
+            "time": time.time,
+            "randint": random.randint,
+            "choice": random.choice,
+            "_join": ", ".join,
+        }
+
+    def bind(self, value: Any) -> str:
+        """Make `value` available to the compiled code; return its name."""
+        name = f"_v{len(self.ns)}"
+        self.ns[name] = value
+        return name
+
+    def _data(self, f: SchemaField) -> str:
+        if f.mode in {"empty", "constant"}:
+            return self.bind(f.const)
+        if f.mode == "rand_uuid" and "uuid4" not in self.ns:
+            import uuid
+            self.ns["uuid4"] = uuid.uuid4
+        if f.sampler is not None:
+            return self.bind(f.sampler)
+        return self.bind(f.args)
+
+    def _count(self, f: SchemaField) -> str:
+        low, high = f.args
+        return str(low) if low == high else f"randint({low}, {high})"
+
+    def value(self, f: SchemaField) -> str:
+        """Expression building the Python value of `f`."""
+        if f.mode == "object":
+            members = ", ".join(
+                f"{name!r}: {self.value(m)}" for name, m in f.items.items()
+            )
+            return "{" + members + "}"
+        if f.mode == "array":
+            return (f"[{self.value(f.items)} "
+                    f"for _ in range({self._count(f)})]")
+        if f.mode == "rand_range":
+            low, high = f.args
+            return f"randint({low}, {high})"
+        return _VALUE_EXPR[f.mode].format(self._data(f))
+
+    def json_parts(self, f: SchemaField) -> List[_Part]:
+        """Pieces of the JSON text of `f` (same text as json.dumps)."""
+        if f.mode == "object":
+            parts: List[_Part] = [(True, "{")]
+            for k, (name, m) in enumerate(f.items.items()):
+                key = json.dumps(name) + ": "
+                parts.append((True, (", " if k else "") + key))
+                parts.extend(self.json_parts(m))
+            parts.append((True, "}"))
+            return parts
+        if f.mode == "array":
+            elem = join_parts(self.json_parts(f.items))
+            count = self._count(f)
+            return [(True, "["),
+                    (False, f"_join([{elem} for _ in range({count})])"),
+                    (True, "]")]
+        if f.mode in {"empty", "constant"}:
+            return [(True, json.dumps(f.const))]
+        if f.mode == "choice":
+            encoded = [json.dumps(item) for item in f.args]
+            return [(False, f"choice({self.bind(encoded)})")]
+        if f.mode in {"timestamp", "rand_uuid"}:
+            # Never contain characters JSON would escape
+            return [(True, '"'), (False, self.value(f)), (True, '"')]
+        # ints
+        return [(False, f"str({self.value(f)})")]
+
+    def function(self, params: str, body: str) -> Callable:
+        source = f"def _compiled({params}):\n    return {body}\n"
+        exec(compile(source, "<magicgenerator schema>", "exec"), self.ns)
+        return self.ns.pop("_compiled")
+
+
+def join_parts(parts: List[_Part]) -> str:
+    """Expression concatenating literal and generated pieces."""
+    merged: List[_Part] = []
+    for is_literal, text in parts:
+        if is_literal and merged and merged[-1][0]:
+            merged[-1] = (True, merged[-1][1] + text)
+        else:
+            merged.append((is_literal, text))
+    if len(merged) == 1:
+        is_literal, text = merged[0]
+        return repr(text) if is_literal else text
+    return "''.join((" + ", ".join(
+        repr(text) if is_literal else text for is_literal, text in merged
+    ) + "))"
+
+
+def _object(schema_model: Dict[str, SchemaField]) -> SchemaField:
+    return SchemaField("object", "object", [], items=schema_model)
+
+
+def compile_json_lines(
+        schema_model: Dict[str, SchemaField]
+) -> Callable[[int], str]:
+    """
+    Compile a function returning `n` newline-terminated JSON records
+    as one string, identical to json.dumps of generate_record() output.
+    """
+    c = _Compiler()
+    line = join_parts(c.json_parts(_object(schema_model)) + [(True, "\n")])
+    return c.function("n", f"''.join([{line} for _ in range(n)])")
+
+
+def compile_record(
+        schema_model: Dict[str, SchemaField]
+) -> Callable[[], Dict[str, Any]]:
+    """Compile a function building one record as a (nested) dict."""
+    c = _Compiler()
+    return c.function("", c.value(_object(schema_model)))
+
+
+def compile_value(field: SchemaField,
+                  as_json: bool = False) -> Callable[[SchemaField], Any]:
+    """
+    Compile a generator for one (possibly nested) field, with the same
+    call signature as the DataGenerator._GEN_MAP handlers. With
+    `as_json`, the value is returned as its JSON text (how tabular
+    formats store arrays).
+    """
+    c = _Compiler()
+    body = join_parts(c.json_parts(field)) if as_json else c.value(field)
+    return c.function("field", body)
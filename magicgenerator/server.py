@@ -0,0 +1,486 @@
+import json
+import os
+import socketserver
+import stat
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, Optional, Tuple
+from magicgenerator.generator import DataGenerator, DEFAULT_WRITE_BATCH
+from magicgenerator.parser import (
+    RawSchema,
+    SchemaParser,
+    SchemaField,
+    schema_hash
+)
+from magicgenerator.sinks import SinkSpec
+from magicgenerator.logger import (
+    get_logger,
+    get_log_level,
+    create_worker_log_queue,
+    stop_worker_log_queue,
+    init_worker_logging
+)
+
+logger = get_logger(__name__)
+
+# Parsed schemas kept in memory (least recently used dropped first)
+DEFAULT_SCHEMA_CACHE = 128
+
+# Requests with at least this many lines are split over the worker pool
+PARALLEL_MIN_LINES = 100_000
+
+# Lines encoded per worker task
+PARALLEL_CHUNK = 50_000
+
+_CONTENT_TYPES = {
+    "jsonl": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "tsv": "text/tab-separated-values; charset=utf-8",
+}
+
+
+class RequestError(Exception):
+    """A request that cannot be served (answered with 400)."""
+
+
+def _options_key(key: str, options: dict) -> Tuple[str, str]:
+    """Cache key of a generator compiled for a schema and options."""
+    return key, json.dumps(options, sort_keys=True)
+
+
+class SchemaCache:
+    """
+    Thread-safe LRU of parsed schema models keyed by schema_hash, so a
+    schema is only parsed the first time a client sends it, and of the
+    generators compiled from them for each set of request options.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_SCHEMA_CACHE):
+        self.max_size = max(1, max_size)
+        self._models: "OrderedDict[str, Dict[str, SchemaField]]" = \
+            OrderedDict()
+        self._generators: \
+            "OrderedDict[Tuple[str, str], DataGenerator]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, raw_schema: RawSchema
+            ) -> Tuple[str, Dict[str, SchemaField], bool]:
+        """
+        Return (hash, schema model, cache hit) for `raw_schema`.
+
+        Raises:
+            RequestError: If the schema is invalid.
+        """
+        key = schema_hash(raw_schema)
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return key, model, True
+        try:
+            model = SchemaParser.build_schema_model(raw_schema)
+        except SystemExit:
+            # The parser has already logged the reason
+            raise RequestError("invalid schema")
+        with self._lock:
+            self.misses += 1
+            self._models[key] = model
+            if len(self._models) > self.max_size:
+                self._models.popitem(last=False)
+        return key, model, False
+
+    def generator(self, key: str, model: Dict[str, SchemaField],
+                  options: dict) -> DataGenerator:
+        """
+        Return the generator compiled for schema `key` with `options`,
+        compiling it on first use.
+
+        Raises:
+            RequestError: If the options do not fit the schema.
+        """
+        cache_key = _options_key(key, options)
+        with self._lock:
+            gen = self._generators.get(cache_key)
+            if gen is not None:
+                self._generators.move_to_end(cache_key)
+                return gen
+        try:
+            gen = DataGenerator(model, **options)
+        except ValueError as e:
+            raise RequestError(str(e))
+        with self._lock:
+            self._generators[cache_key] = gen
+            if len(self._generators) > self.max_size:
+                self._generators.popitem(last=False)
+        return gen
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+
+def _warm_up() -> int:
+    # Long enough that the pool has to start every worker
+    time.sleep(0.05)
+    return os.getpid()
+
+
+# Per worker process: compiled generators by (schema hash, options),
+# so a schema is parsed and compiled once per worker, not per chunk
+_worker_generators: "OrderedDict[Tuple[str, str], DataGenerator]" = \
+    OrderedDict()
+
+
+def _encode_chunk(key: str, raw_schema: RawSchema, options: dict,
+                  lines: int) -> bytes:
+    """
+    Pool task: `lines` encoded records (no header). The schema travels
+    as its hash plus the raw JSON schema; only a worker that has not
+    seen the hash yet parses it and compiles a generator.
+    """
+    cache_key = _options_key(key, options)
+    gen = _worker_generators.get(cache_key)
+    if gen is None:
+        model = SchemaParser.build_schema_model(raw_schema)
+        gen = _worker_generators[cache_key] = DataGenerator(model, **options)
+        if len(_worker_generators) > DEFAULT_SCHEMA_CACHE:
+            _worker_generators.popitem(last=False)
+    else:
+        _worker_generators.move_to_end(cache_key)
+    return b"".join(gen.iter_encoded(DEFAULT_WRITE_BATCH, lines))
+
+
+def _parse_request(body: bytes) -> Tuple[RawSchema, int, dict]:
+    """
+    Decode a /generate request body:
+    {"schema": {...}, "data_lines": N, "format": "jsonl",
+     "pool_size": 0, "pool_patch": []}
+
+    Raises:
+        RequestError: On malformed JSON or invalid values.
+    """
+    try:
+        req = json.loads(body or b"{}")
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise RequestError(f"request body is not JSON: {e}")
+    if not isinstance(req, dict):
+        raise RequestError("request body must be a JSON object")
+
+    raw_schema = req.get("schema")
+    if isinstance(raw_schema, str):
+        try:
+            raw_schema = json.loads(raw_schema)
+        except json.JSONDecodeError as e:
+            raise RequestError(f"schema is not JSON: {e}")
+    if not isinstance(raw_schema, dict):
+        # Entries are validated by the parser (spec strings or objects)
+        raise RequestError("schema must be an object of field: spec strings")
+
+    lines = req.get("data_lines", 1000)
+    if not isinstance(lines, int) or lines < 0:
+        raise RequestError("data_lines must be an integer >= 0")
+
+    output_format = req.get("format", "jsonl")
+    if not isinstance(output_format, str):
+        raise RequestError("format must be a string")
+    pool_patch = req.get("pool_patch", [])
+    if not isinstance(pool_patch, list) \
+            or not all(isinstance(name, str) for name in pool_patch):
+        raise RequestError("pool_patch must be a list of field names")
+
+    options = {
+        "output_format": output_format,
+        "pool_size": req.get("pool_size", 0),
+        "pool_patch": tuple(pool_patch),
+    }
+    if options["output_format"] not in _CONTENT_TYPES:
+        raise RequestError(f"unknown format {options['output_format']!r}")
+    if not isinstance(options["pool_size"], int) or options["pool_size"] < 0:
+        raise RequestError("pool_size must be an integer >= 0")
+    return raw_schema, lines, options
+
+
+def _content_length(value: Optional[str]) -> int:
+    """
+    Parse a Content-Length header (missing = empty body).
+
+    Raises:
+        RequestError: If the value is not an integer >= 0.
+    """
+    try:
+        length = int(value or 0)
+    except ValueError:
+        length = -1
+    if length < 0:
+        raise RequestError(f"invalid Content-Length {value!r}")
+    return length
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """
+    POST /generate streams the requested lines back with chunked
+    transfer encoding; GET /health reports the cache state.
+    """
+
+    protocol_version = "HTTP/1.1"
+    server: Any
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug("%s %s", self.requestline, format % args)
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _reject(self, error: RequestError) -> None:
+        logger.warning("Rejected request: %s", error)
+        self._send_json(400, {"error": str(error)})
+
+    def do_GET(self) -> None:
+        if self.path != "/health":
+            self._send_json(404, {"error": "not found"})
+            return
+        cache = self.server.generator.cache
+        self._send_json(200, {
+            "status": "ok",
+            "workers": self.server.generator.workers,
+            "cached_schemas": len(cache),
+            "cache_hits": cache.hits,
+            "cache_misses": cache.misses,
+        })
+
+    def do_POST(self) -> None:
+        if self.path != "/generate":
+            self._send_json(404, {"error": "not found"})
+            return
+        start = time.perf_counter()
+        try:
+            length = _content_length(self.headers.get("Content-Length"))
+        except RequestError as e:
+            # The body cannot be skipped without its length
+            self.close_connection = True
+            self._reject(e)
+            return
+        body = self.rfile.read(length)
+        try:
+            key, hit, chunks = self.server.generator.prepare(body)
+        except RequestError as e:
+            self._reject(e)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", chunks.content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("X-Schema-Hash", key)
+        self.send_header("X-Schema-Cache", "hit" if hit else "miss")
+        self.end_headers()
+        sent = 0
+        try:
+            for buf in chunks:
+                if buf:
+                    self.wfile.write(b"%x\r\n%b\r\n" % (len(buf), buf))
+                    sent += len(buf)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            logger.info("Client went away after %d bytes", sent)
+            self.close_connection = True
+            return
+        logger.info("Served %d lines (%d bytes) in %.3fs",
+                    chunks.lines, sent, time.perf_counter() - start)
+
+
+class _Chunks:
+    """Iterable of encoded buffers for one request."""
+
+    def __init__(self, it: Iterator[bytes], lines: int, content_type: str):
+        self._it = it
+        self.lines = lines
+        self.content_type = content_type
+
+    def __iter__(self) -> Iterator[bytes]:
+        return self._it
+
+
+def _remove_stale_socket(path: str) -> None:
+    """
+    Remove the socket a previous server left at `path`.
+
+    Raises:
+        FileExistsError: If `path` exists and is not a socket (never
+        deleted, it may be a user's file).
+    """
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"{path} exists and is not a socket")
+    os.unlink(path)
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn,
+                      socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class GeneratorServer:
+    """
+    Long-running generator: keeps parsed schemas cached by content hash
+    and a warm process pool, and serves generated lines over HTTP on a
+    TCP address or a UNIX socket.
+
+    Parameters:
+        listen (SinkSpec): "tcp" (host, port) or "unix" (socket path)
+            address; port 0 picks a free port.
+        workers (int): Size of the warm pool; 1 generates in the
+            request thread only.
+        cache_size (int): Maximum number of cached schemas.
+
+    Raises:
+        OSError: If the address cannot be bound; FileExistsError if a
+        unix socket path is taken by something that is not a socket.
+    """
+
+    def __init__(self, listen: SinkSpec, workers: int = 1,
+                 cache_size: int = DEFAULT_SCHEMA_CACHE):
+        if listen.kind not in {"tcp", "unix"}:
+            raise ValueError(f"cannot listen on {listen}")
+        self.listen = listen
+        self.workers = max(1, workers)
+        self.cache = SchemaCache(cache_size)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._log_queue = None
+        if listen.kind == "unix":
+            _remove_stale_socket(listen.target)
+            self._httpd: Any = _UnixHTTPServer(listen.target, _Handler)
+        else:
+            self._httpd = ThreadingHTTPServer(
+                (listen.target, listen.port), _Handler
+            )
+            self._httpd.daemon_threads = True
+        self._httpd.generator = self
+
+        if self.workers > 1:
+            self._log_queue = create_worker_log_queue()
+            self._pool = self._start_pool()
+            try:
+                pids = {f.result() for f in [self._pool.submit(_warm_up)
+                                             for _ in range(self.workers)]}
+            except BaseException:
+                self.close()
+                raise
+            logger.info("Started %d pool workers", len(pids))
+
+    def _start_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=init_worker_logging,
+            initargs=(self._log_queue, get_log_level())
+        )
+
+    def _replace_broken_pool(self, broken: ProcessPoolExecutor) -> None:
+        """Start a new pool, unless another request already has."""
+        with self._pool_lock:
+            if self._pool is not broken:
+                return
+            logger.error("A pool worker died, starting a new pool")
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._pool = self._start_pool()
+
+    @property
+    def address(self) -> str:
+        """Address actually listened on (with the real port for tcp)."""
+        if self.listen.kind == "unix":
+            return f"unix:{self.listen.target}"
+        host, port = self._httpd.server_address[:2]
+        return f"tcp://{host}:{port}"
+
+    def prepare(self, body: bytes) -> Tuple[str, bool, _Chunks]:
+        """
+        Validate a request and set up its output stream.
+
+        Returns:
+            Tuple[str, bool, _Chunks]: Schema hash, cache hit, buffers.
+
+        Raises:
+            RequestError: If the request is invalid.
+        """
+        raw_schema, lines, options = _parse_request(body)
+        key, model, hit = self.cache.get(raw_schema)
+        gen = self.cache.generator(key, model, options)
+        content_type = _CONTENT_TYPES[gen.output_format]
+        return key, hit, _Chunks(
+            self._stream(gen, key, raw_schema, options, lines),
+            lines, content_type
+        )
+
+    def _stream(self, gen: DataGenerator, key: str, raw_schema: RawSchema,
+                options: dict, lines: int) -> Iterator[bytes]:
+        yield gen.encode_header()
+        pool = self._pool
+        if pool is None or options["pool_size"] \
+                or lines < PARALLEL_MIN_LINES:
+            yield from gen.iter_encoded(DEFAULT_WRITE_BATCH, lines)
+            return
+
+        # Keep a bounded number of chunks in flight, yielded in order
+        pending: deque = deque()
+        remaining = lines
+        done = 0
+        try:
+            while remaining or pending:
+                while remaining and len(pending) < 2 * self.workers:
+                    n = min(PARALLEL_CHUNK, remaining)
+                    pending.append((n, pool.submit(
+                        _encode_chunk, key, raw_schema, options, n
+                    )))
+                    remaining -= n
+                n, future = pending.popleft()
+                yield future.result()
+                done += n
+        except BrokenProcessPool:
+            self._replace_broken_pool(pool)
+            # Finish this response in the request thread
+            yield from gen.iter_encoded(DEFAULT_WRITE_BATCH, lines - done)
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+    def serve_forever(self) -> None:
+        """Serve requests until shutdown() is called."""
+        logger.info("Serving on %s", self.address)
+        self._httpd.serve_forever()
+
+    def shutdown(self) -> None:
+        """Stop serve_forever (call from another thread)."""
+        self._httpd.shutdown()
+
+    def close(self) -> None:
+        """Close the socket and stop the worker pool."""
+        self._httpd.server_close()
+        if self.listen.kind == "unix":
+            _remove_stale_socket(self.listen.target)
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            try:
+                pool.shutdown(cancel_futures=True)
+            finally:
+                stop_worker_log_queue(self._log_queue)
+
+    def __enter__(self) -> "GeneratorServer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,206 @@
+import abc
+import argparse
+import os
+import stat
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+from magicgenerator.logger import get_logger
+
+# socket is only needed once a socket sink is opened; parsing --sink
+# happens on every CLI start
+if TYPE_CHECKING:
+    import socket
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class SinkSpec:
+    """
+    A parsed --sink value.
+
+    Attributes:
+        kind:     "unix", "tcp", "fifo", "file", "stdout" or "sqlite"
+        target:   socket / FIFO / file / database path, host for tcp,
+                  "-" for stdout
+        port:     only used if kind == "tcp"
+    """
+    kind: str
+    target: str
+    port: int = 0
+
+    def __str__(self) -> str:
+        if self.kind == "tcp":
+            return f"tcp://{self.target}:{self.port}"
+        if self.kind == "stdout":
+            return "stdout"
+        return f"{self.kind}:{self.target}"
+
+
+def parse_sink(value: str) -> SinkSpec:
+    """
+    Parses "unix:/path.sock", "tcp://host:port", "fifo:/path",
+    "file:/path", "stdout" (or "-") or "sqlite:/path/db.sqlite".
+    Used as an argparse `type`.
+
+    Raises:
+        argparse.ArgumentTypeError: On an unknown scheme or bad address.
+    """
+    if value.startswith("tcp://"):
+        host, sep, port = value[len("tcp://"):].rpartition(":")
+        if not sep or not host or not port.isdigit():
+            raise argparse.ArgumentTypeError(
+                f"invalid tcp sink {value!r} (expected tcp://host:port)"
+            )
+        return SinkSpec("tcp", host.strip("[]"), int(port))
+
+    if value in {"stdout", "-"}:
+        return SinkSpec("stdout", "-")
+
+    kind, sep, path = value.partition(":")
+    if sep and kind in {"unix", "fifo", "file", "sqlite"} and path:
+        return SinkSpec(kind, path)
+
+    raise argparse.ArgumentTypeError(
+        f"invalid sink {value!r} "
+        "(expected unix:/path.sock, tcp://host:port, fifo:/path, "
+        "file:/path, stdout or sqlite:/path/db.sqlite)"
+    )
+
+
+class Sink(abc.ABC):
+    """Destination for encoded JSON-lines batches."""
+
+    spec: SinkSpec
+
+    def __str__(self) -> str:
+        return str(self.spec)
+
+    @abc.abstractmethod
+    def write(self, buf: bytes) -> None:
+        """Write one batch of complete lines."""
+
+    @abc.abstractmethod
+    def close(self) -> None:
+        """Release the destination once everything was written."""
+
+    def flush(self) -> None:
+        """Batches are written through unbuffered; nothing to flush."""
+
+    def __enter__(self) -> "Sink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class SocketSink(Sink):
+    """Streams batches over a connected UNIX or TCP socket."""
+
+    def __init__(self, spec: SinkSpec, sock: "socket.socket"):
+        self.spec = spec
+        self._sock = sock
+
+    def write(self, buf: bytes) -> None:
+        self._sock.sendall(buf)
+
+    def close(self) -> None:
+        import socket
+
+        try:
+            # Let the peer see EOF once everything was sent
+            self._sock.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+        self._sock.close()
+
+
+class FifoSink(Sink):
+    """Writes batches to a named pipe with raw os.write calls."""
+
+    def __init__(self, spec: SinkSpec, fd: int):
+        self.spec = spec
+        self._fd = fd
+
+    def write(self, buf: bytes) -> None:
+        view = memoryview(buf)
+        while view:
+            written = os.write(self._fd, view)
+            view = view[written:]
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class FileSink(Sink):
+    """Writes batches to a regular file (created or truncated)."""
+
+    def __init__(self, spec: SinkSpec):
+        self.spec = spec
+        self._f = open(spec.target, "wb")
+
+    def write(self, buf: bytes) -> None:
+        self._f.write(buf)
+
+    def close(self) -> None:
+        self._f.close()
+
+
+class StdoutSink(Sink):
+    """Writes batches to standard output (flushed, never closed)."""
+
+    def __init__(self, spec: SinkSpec):
+        self.spec = spec
+        self._out = sys.stdout.buffer
+
+    def write(self, buf: bytes) -> None:
+        self._out.write(buf)
+
+    def close(self) -> None:
+        self._out.flush()
+
+
+def open_sink(spec: SinkSpec) -> Sink:
+    """
+    Connects to / opens the byte-stream destination described by `spec`
+    (sqlite sinks are loaded through magicgenerator.sqlite_loader).
+    A missing FIFO is created; opening it blocks until a reader attaches.
+
+    Returns:
+        Sink: Ready-to-write sink.
+
+    Raises:
+        OSError: If the socket cannot connect, the file cannot be
+        created or the path is not a FIFO.
+    """
+    if spec.kind == "file":
+        return FileSink(spec)
+    if spec.kind == "stdout":
+        return StdoutSink(spec)
+
+    import socket
+
+    if spec.kind == "tcp":
+        sock = socket.create_connection((spec.target, spec.port))
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return SocketSink(spec, sock)
+
+    if spec.kind == "unix":
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(spec.target)
+        except OSError:
+            sock.close()
+            raise
+        return SocketSink(spec, sock)
+
+    path = Path(spec.target)
+    if not path.exists():
+        os.mkfifo(path)
+        logger.info("Created FIFO %s", path)
+    elif not stat.S_ISFIFO(path.stat().st_mode):
+        raise OSError(f"{path} exists and is not a FIFO")
+    logger.info("Waiting for a reader on FIFO %s", path)
+    return FifoSink(spec, os.open(path, os.O_WRONLY))
@@ -0,0 +1,152 @@
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List
+from magicgenerator.generator import DataGenerator
+from magicgenerator.parser import SchemaField, flatten_schema
+from magicgenerator.logger import get_logger
+
+logger = get_logger(__name__)
+
+# SchemaField.type → SQLite column type
+# (timestamps are generated as numeric strings; REAL affinity stores
+# them as floats; arrays are stored as JSON text)
+_COLUMN_TYPES = {"timestamp": "REAL", "str": "TEXT", "int": "INTEGER",
+                 "array": "TEXT"}
+
+# Rows committed per transaction; keeps the WAL from growing
+# to the size of the whole load
+_ROWS_PER_TRANSACTION = 100_000
+
+# Pragmas for the target database: WAL, no fsync per commit, big cache
+_LOAD_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=OFF",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+)
+
+# Shards are throw-away files merged at the end: no journal at all
+_SHARD_PRAGMAS = (
+    "PRAGMA journal_mode=OFF",
+    "PRAGMA synchronous=OFF",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+)
+
+
+def _quote(identifier: str) -> str:
+    """Quote an SQL identifier (table / column name)."""
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def shard_path(db_path: Path, i: int) -> Path:
+    """Path of the i-th worker shard next to `db_path`."""
+    return db_path.with_name(f"{db_path.name}.shard{i}")
+
+
+def _connect(db_path: Path, pragmas: Iterable[str]) -> sqlite3.Connection:
+    # isolation_level=None: transactions are opened explicitly below
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    for pragma in pragmas:
+        conn.execute(pragma)
+    return conn
+
+
+def create_table(conn: sqlite3.Connection, table: str,
+                 schema_model: Dict[str, SchemaField]) -> None:
+    """
+    Create `table` (if missing) with one column per schema field,
+    typed from SchemaField.type, in schema order (nested object
+    members as "parent.member" columns).
+    """
+    columns = ", ".join(
+        f"{_quote(name)} {_COLUMN_TYPES[field.type]}"
+        for name, field in flatten_schema(schema_model)
+    )
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {_quote(table)} ({columns})")
+
+
+def load_rows(db_path: Path, table: str,
+              schema_model: Dict[str, SchemaField], rows: int,
+              batch_size: int, shard: bool = False) -> int:
+    """
+    Generate `rows` records into `table` of `db_path` with executemany
+    batches inside explicit transactions.
+
+    Parameters:
+        db_path (Path): Database file (created if missing).
+        table (str): Target table name.
+        schema_model (Dict[str, SchemaField]): Field generation rules.
+        rows (int): Number of rows to insert.
+        batch_size (int): Rows per executemany call.
+        shard (bool): Use the journal-less pragmas of a worker shard.
+
+    Returns:
+        int: Number of rows inserted.
+    """
+    logger.info("Loading %d rows → %s (%s)", rows, db_path, table)
+    # Rows in the tabular column layout: flattened objects, JSON arrays
+    gen = DataGenerator(schema_model, "csv")
+    row = gen.generate_row
+    insert = (
+        f"INSERT INTO {_quote(table)} VALUES "
+        f"({', '.join('?' * len(gen.columns))})"
+    )
+    conn = _connect(db_path, _SHARD_PRAGMAS if shard else _LOAD_PRAGMAS)
+    try:
+        create_table(conn, table, schema_model)
+        done = 0
+        while done < rows:
+            conn.execute("BEGIN")
+            tx_end = min(rows, done + _ROWS_PER_TRANSACTION)
+            while done < tx_end:
+                n = min(batch_size, tx_end - done)
+                conn.executemany(insert, [row() for _ in range(n)])
+                done += n
+            conn.execute("COMMIT")
+    finally:
+        conn.close()
+    return done
+
+
+def merge_shards(db_path: Path, table: str,
+                 schema_model: Dict[str, SchemaField],
+                 shards: List[Path]) -> None:
+    """
+    Attach each worker shard to `db_path`, copy its rows into `table`
+    in one transaction, then delete the shard file.
+    """
+    conn = _connect(db_path, _LOAD_PRAGMAS)
+    try:
+        create_table(conn, table, schema_model)
+        for path in shards:
+            conn.execute("ATTACH DATABASE ? AS shard", (str(path),))
+            conn.execute("BEGIN")
+            conn.execute(
+                f"INSERT INTO main.{_quote(table)} "
+                f"SELECT * FROM shard.{_quote(table)}"
+            )
+            conn.execute("COMMIT")
+            conn.execute("DETACH DATABASE shard")
+            path.unlink()
+            logger.info("Merged shard %s", path)
+    finally:
+        conn.close()
+
+
+def create_indexes(db_path: Path, table: str, fields: List[str]) -> None:
+    """
+    Build one index per field once the data is loaded, which is much
+    cheaper than maintaining them during the inserts.
+    """
+    conn = _connect(db_path, _LOAD_PRAGMAS)
+    try:
+        for field in fields:
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS "
+                f"{_quote(f'idx_{table}_{field}')} "
+                f"ON {_quote(table)} ({_quote(field)})"
+            )
+            logger.info("Created index on %s(%s)", table, field)
+    finally:
+        conn.close()
@@ -1,10 +1,16 @@
+import math
+import re
 import sys
 import os
 from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
 from magicgenerator.logger import get_logger
+from magicgenerator.formats import FORMAT_EXTENSIONS, COLUMNAR_FORMATS
 
 logger = get_logger(__name__)
 
+_T = TypeVar("_T")
+
 
 def validate_output_path(path_str: str) -> Path:
     """
@@ -38,6 +44,105 @@ def validate_output_path(path_str: str) -> Path:
     return p
 
 
+def validate_output_paths(path_strs: List[str]) -> List[Path]:
+    """
+    Validates (and creates if necessary) every output directory.
+    Duplicates are dropped, keeping the first occurrence.
+
+    Parameters:
+        path_strs (List[str]): The paths to validate or create.
+
+    Returns:
+        List[Path]: Valid output directories, in the given order.
+
+    Raises:
+        SystemExit: If any path is invalid (see validate_output_path).
+    """
+    dirs: List[Path] = []
+    for path_str in path_strs:
+        p = validate_output_path(path_str)
+        if p.resolve() not in {d.resolve() for d in dirs}:
+            dirs.append(p)
+    return dirs
+
+
+def group_by_device(dirs: List[Path]) -> Dict[int, List[Path]]:
+    """
+    Groups directories by the device (st_dev) they live on, so work
+    can be split per device rather than per directory.
+
+    Returns:
+        Dict[int, List[Path]]: Device id → its directories.
+    """
+    groups: Dict[int, List[Path]] = {}
+    for d in dirs:
+        groups.setdefault(os.stat(d).st_dev, []).append(d)
+    return groups
+
+
+def share_workers(groups: List[List[_T]],
+                  workers: int) -> Tuple[List[List[_T]], List[int]]:
+    """
+    Splits `workers` processes over per-device groups of work, so the
+    pools together never run more than `workers` processes. With fewer
+    workers than groups, groups are merged round-robin until each one
+    gets a worker of its own.
+
+    Parameters:
+        groups (List[List[_T]]): Work items of each device.
+        workers (int): Total number of processes (at least 1 is used).
+
+    Returns:
+        Tuple[List[List[_T]], List[int]]: The (possibly merged) groups
+        and the number of workers of each.
+    """
+    workers = max(workers, 1)
+    if len(groups) > workers:
+        merged: List[List[_T]] = [[] for _ in range(workers)]
+        for i, group in enumerate(groups):
+            merged[i % workers].extend(group)
+        groups = merged
+    share, extra = divmod(workers, len(groups))
+    return groups, [share + (i < extra) for i in range(len(groups))]
+
+
+def assign_dirs(dirs: List[Path], count: int,
+                strategy: str = "round_robin",
+                disk_usage: Optional[Callable[[Path], Any]] = None
+                ) -> List[Path]:
+    """
+    Picks an output directory for each of `count` files.
+
+    Parameters:
+        dirs (List[Path]): Candidate output directories.
+        count (int): Number of files to place.
+        strategy (str): "round_robin", or "free_space" to spread files in
+            proportion to the free space of each directory's filesystem.
+        disk_usage (Optional[Callable[[Path], Any]]): Returns an object
+            with a `free` attribute for a directory
+            (default: shutil.disk_usage).
+
+    Returns:
+        List[Path]: Directory of file i at index i.
+    """
+    if strategy == "round_robin" or len(dirs) == 1:
+        return [dirs[i % len(dirs)] for i in range(count)]
+
+    if disk_usage is None:
+        import shutil
+
+        disk_usage = shutil.disk_usage
+    free = [disk_usage(d).free for d in dirs]
+    assigned = [0] * len(dirs)
+    result = []
+    for _ in range(count):
+        # The directory whose free space per assigned file is largest
+        k = max(range(len(dirs)), key=lambda j: free[j] / (assigned[j] + 1))
+        assigned[k] += 1
+        result.append(dirs[k])
+    return result
+
+
 def validate_min(name: str, value: int, minimum: int = 0) -> None:
     """
     Ensure an integer flag is >= minimum; exit on error.
@@ -52,7 +157,23 @@ def validate_min(name: str, value: int, minimum: int = 0) -> None:
         SystemExit: If value is less than the specified minimum.
     """
     if value < minimum:
-        logger.error("%s must be >= %d (got %d)", name, minimum, value)
+        logger.error("%s must be >= %d (got %s)", name, minimum, value)
+        sys.exit(1)
+
+
+def validate_finite(name: str, value: float) -> None:
+    """
+    Ensure a float flag is a finite number (not nan or inf); exit on error.
+
+    Parameters:
+        name (str): Name of the argument (for logging).
+        value (float): Value to validate.
+
+    Raises:
+        SystemExit: If value is nan or infinite.
+    """
+    if not math.isfinite(value):
+        logger.error("%s must be a finite number (got %s)", name, value)
         sys.exit(1)
 
 
@@ -81,23 +202,130 @@ def cap_multiprocessing(requested: int):
     return requested
 
 
+# Mode of newly created files under the process umask (see new_file_mode)
+_new_file_mode: Optional[int] = None
+
+
+def new_file_mode() -> int:
+    """
+    Mode open() gives a new file: 0o666 minus the umask. Files made
+    with tempfile.mkstemp are always 0o600, so atomically written
+    files are chmod-ed to this before they replace the target.
+
+    Returns:
+        int: Permission bits, e.g. 0o644 under the usual 022 umask.
+    """
+    global _new_file_mode
+    if _new_file_mode is None:
+        # The umask can only be read by setting it
+        umask = os.umask(0o22)
+        os.umask(umask)
+        _new_file_mode = 0o666 & ~umask
+    return _new_file_mode
+
+
+# Every suffix `_generate_one` can attach: "count" and "random" produce
+# digits, "uuid" produces the canonical uuid4 string
+_SUFFIX_PATTERN = (
+    r"(?:_(?:\d+|"
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
+    r"))?"
+)
+
+# Deleting is dominated by syscall latency, so threads overlap well
+# even with the GIL; batches keep the number of futures small
+_CLEAR_WORKERS = 16
+_CLEAR_BATCH = 1024
+
+
+def output_name_pattern(base_name: str) -> "re.Pattern[str]":
+    """
+    Builds a regex matching exactly the file names the generator produces
+    for `base_name` (with or without suffix, in any output format).
+
+    Parameters:
+        base_name (str): Base file name used for generation.
+
+    Returns:
+        re.Pattern[str]: Compiled pattern, to be used with fullmatch().
+    """
+    extensions = "|".join(
+        re.escape(ext) for ext in FORMAT_EXTENSIONS.values()
+    )
+    return re.compile(
+        re.escape(base_name) + _SUFFIX_PATTERN + f"(?:{extensions})"
+    )
+
+
+def _unlink_batch(paths: List[str]) -> Tuple[int, List[Tuple[str, OSError]]]:
+    """
+    Deletes a batch of files (and columnar output directories),
+    collecting failures instead of raising.
+
+    Returns:
+        Tuple[int, List[Tuple[str, OSError]]]: Number of deleted files and
+        the (path, error) pairs for files that could not be removed.
+    """
+    deleted = 0
+    errors = []
+    for path in paths:
+        try:
+            try:
+                os.unlink(path)
+            except IsADirectoryError:
+                import shutil
+
+                shutil.rmtree(path)
+            deleted += 1
+        except OSError as e:
+            errors.append((path, e))
+    return deleted, errors
+
+
 def clear_old_files(output_dir: Path, base_name: str) -> None:
     """
-    Deletes previously generated files in the output directory that
-    start with the given base name.
+    Deletes previously generated files in the output directory whose
+    names match the generator's naming pattern for `base_name`
+    (including the directories of columnar outputs).
+
+    The directory is scanned once with os.scandir (file type comes from
+    the directory entry, no extra stat per file) and the matches are
+    removed in parallel batches. A single summary line is logged.
 
     Parameters:
         output_dir (Path): Directory to search for old files.
-        base_name (str): Filenames to be deleted.
+        base_name (str): Base name of the files to be deleted.
     """
+    pattern = output_name_pattern(base_name)
+    dir_extensions = tuple(FORMAT_EXTENSIONS[f] for f in COLUMNAR_FORMATS)
+    with os.scandir(output_dir) as it:
+        paths = [
+            entry.path for entry in it
+            if pattern.fullmatch(entry.name)
+            and (entry.is_file(follow_symlinks=False)
+                 or (entry.name.endswith(dir_extensions)
+                     and entry.is_dir(follow_symlinks=False)))
+        ]
+    if not paths:
+        return
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    batches = [
+        paths[i:i + _CLEAR_BATCH] for i in range(0, len(paths), _CLEAR_BATCH)
+    ]
     deleted = 0
-    for p in output_dir.iterdir():
-        if p.is_file() and p.name.startswith(base_name):
-            try:
-                p.unlink()
-                deleted += 1
-                logger.info("Deleted old file %s", p)
-            except Exception as e:
-                logger.error("Failed to delete %s: %s", p, e)
-    if deleted:
-        logger.info("Cleared %d old files", deleted)
+    errors = []
+    workers = min(_CLEAR_WORKERS, len(batches))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(_unlink_batch, batches)
+        for batch_deleted, batch_errors in results:
+            deleted += batch_deleted
+            errors.extend(batch_errors)
+
+    logger.info("Cleared %d old files from %s", deleted, output_dir)
+    if errors:
+        path, e = errors[0]
+        logger.error(
+            "Failed to delete %d files (first: %s: %s)", len(errors), path, e
+        )
@@ -0,0 +1,387 @@
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from magicgenerator.parser import SchemaField
+from magicgenerator.logger import (
+    get_logger,
+    get_log_level,
+    create_worker_log_queue,
+    stop_worker_log_queue,
+    init_worker_logging
+)
+
+logger = get_logger(__name__)
+
+# Bytes read per call
+DEFAULT_CHUNK = 8 << 20
+
+# Files larger than this are split into byte ranges checked in parallel
+RANGE_SIZE = 256 << 20
+
+# Error messages kept per file
+DEFAULT_MAX_ERRORS = 10
+
+_UUID_PATTERN = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
+)
+
+# Bounds of the int modes that have them (None = unbounded)
+_INT_BOUNDS = {
+    "rand_int": lambda f: (0, 10000),
+    "rand_range": lambda f: tuple(f.args),
+    "normal": lambda f: (None, None),
+    "lognormal": lambda f: (0, None),
+    "exp": lambda f: (0, None),
+    "zipf": lambda f: (1, int(f.args[1])),
+}
+
+# Returns an error message, or None if the value is valid
+Check = Callable[[Any], Optional[str]]
+
+_DECODER = json.JSONDecoder()
+
+
+def _member(path: str, name: str) -> str:
+    return f"{path}.{name}" if path else name
+
+
+def field_check(f: SchemaField, path: str = "") -> Check:
+    """
+    Build the validator of one (possibly nested) schema field: the
+    value must be what DataGenerator can produce for it.
+
+    Parameters:
+        f (SchemaField): Field to validate values of.
+        path (str): Dotted field name used in error messages.
+
+    Returns:
+        Check: Function returning an error message or None.
+    """
+    if f.mode == "object":
+        members = [(name, field_check(m, _member(path, name)))
+                   for name, m in f.items.items()]
+        keys = set(f.items)
+
+        def check(v):
+            if type(v) is not dict:
+                return f"{path or 'record'}: expected an object, got {v!r}"
+            if v.keys() != keys:
+                return (f"{path or 'record'}: fields {sorted(v)} "
+                        f"!= {sorted(keys)}")
+            for name, member in members:
+                err = member(v[name])
+                if err:
+                    return err
+            return None
+        return check
+
+    if f.mode == "array":
+        low, high = f.args
+        element = field_check(f.items, f"{path}[]")
+
+        def check(v):
+            if type(v) is not list:
+                return f"{path}: expected an array, got {v!r}"
+            if not low <= len(v) <= high:
+                return f"{path}: {len(v)} elements, not in [{low}, {high}]"
+            for x in v:
+                err = element(x)
+                if err:
+                    return err
+            return None
+        return check
+
+    if f.mode in {"empty", "constant"}:
+        const = f.const
+
+        def check(v):
+            if v != const or type(v) is not type(const):
+                return f"{path}: {v!r} != {const!r}"
+            return None
+        return check
+
+    if f.mode == "choice":
+        allowed = set(f.args)
+        kind = str if f.type == "str" else int
+
+        def check(v):
+            if type(v) is not kind or v not in allowed:
+                return f"{path}: {v!r} not one of {f.args!r}"
+            return None
+        return check
+
+    if f.mode == "timestamp":
+        def check(v):
+            try:
+                if type(v) is str:
+                    float(v)
+                    return None
+            except ValueError:
+                pass
+            return f"{path}: {v!r} is not a timestamp"
+        return check
+
+    if f.mode == "rand_uuid":
+        def check(v):
+            if type(v) is not str or not _UUID_PATTERN.fullmatch(v):
+                return f"{path}: {v!r} is not a uuid4"
+            return None
+        return check
+
+    low, high = _INT_BOUNDS[f.mode](f)
+
+    def check(v):
+        if type(v) is not int:
+            return f"{path}: {v!r} is not an int"
+        if (low is not None and v < low) or (high is not None and v > high):
+            return f"{path}: {v} not in [{low}, {high}]"
+        return None
+    return check
+
+
+def record_check(schema_model: Dict[str, SchemaField]) -> Check:
+    """Validator of whole records (exactly the schema's fields)."""
+    return field_check(SchemaField("object", "object", [], items=schema_model))
+
+
+@dataclass
+class FileReport:
+    """
+    Result of verifying one file (or one byte range of it).
+
+    Attributes:
+        path:    verified file
+        lines:   number of lines read
+        invalid: lines that are not valid records
+        errors:  (line number, message) of the first invalid lines
+    """
+    path: Path
+    lines: int = 0
+    invalid: int = 0
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+
+
+def _parse_lines(body: bytes) -> Optional[List[Any]]:
+    """
+    Decode newline-separated JSON values in one pass over the block.
+
+    Returns:
+        Optional[List[Any]]: One value per line, or None if any line is
+        not exactly one complete JSON value.
+    """
+    try:
+        text = body.decode("utf-8")
+        decode = _DECODER.raw_decode
+        records = []
+        pos, end = 0, len(text)
+        while True:
+            record, pos = decode(text, pos)
+            records.append(record)
+            if pos == end:
+                return records
+            if text[pos] != "\n":
+                return None
+            pos += 1
+    except ValueError:
+        return None
+
+
+class _RangeChecker:
+    """Checks newline-terminated blocks of one byte range."""
+
+    def __init__(self, report: FileReport, check: Check, max_errors: int):
+        self.report = report
+        self.check = check
+        self.max_errors = max_errors
+
+    def _fail(self, line: int, message: str) -> None:
+        self.report.invalid += 1
+        if len(self.report.errors) < self.max_errors:
+            self.report.errors.append((line, message))
+
+    def block(self, data: bytes) -> None:
+        """
+        Check the complete lines in `data`. The whole block is decoded
+        in one pass that must find exactly one JSON value per line;
+        only a block that fails is re-read line by line to locate the
+        bad records.
+        """
+        count = data.count(b"\n") + (not data.endswith(b"\n"))
+        first = self.report.lines + 1
+        self.report.lines += count
+        body = data[:-1] if data.endswith(b"\n") else data
+        records = _parse_lines(body)
+        check = self.check
+        if records is not None and not any(map(check, records)):
+            return
+
+        for k, line in enumerate(body.split(b"\n")):
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                self._fail(first + k, f"not a JSON record: {e}")
+                continue
+            err = check(record)
+            if err:
+                self._fail(first + k, err)
+
+
+def check_range(path: Path, start: int, end: int,
+                schema_model: Dict[str, SchemaField],
+                chunk: int = DEFAULT_CHUNK,
+                max_errors: int = DEFAULT_MAX_ERRORS) -> FileReport:
+    """
+    Verify the lines of `path` that start in [start, end), reading
+    `chunk` bytes at a time (a line crossing `end` is finished here,
+    one crossing `start` belongs to the previous range).
+
+    Returns:
+        FileReport: Counts, with line numbers relative to the range.
+    """
+    report = FileReport(path)
+    checker = _RangeChecker(report, record_check(schema_model), max_errors)
+    with open(path, "rb") as f:
+        pos = start
+        if start:
+            f.seek(start - 1)
+            pos += len(f.readline()) - 1
+        pending = b""
+        while pos < end:
+            buf = f.read(min(chunk, end - pos))
+            if not buf:
+                break
+            pos += len(buf)
+            data = pending + buf if pending else buf
+            cut = data.rfind(b"\n") + 1
+            if cut:
+                checker.block(data[:cut])
+            pending = data[cut:]
+        if pending:
+            checker.block(pending + f.readline())
+    return report
+
+
+def _ranges(size: int, range_size: int) -> List[Tuple[int, int]]:
+    if size <= range_size:
+        return [(0, size)]
+    return [(s, min(s + range_size, size)) for s in range(0, size, range_size)]
+
+
+def _merge(parts: List[FileReport], max_errors: int) -> FileReport:
+    """Combine the range reports of one file, in file order."""
+    report = FileReport(parts[0].path)
+    for part in parts:
+        report.errors.extend((report.lines + line, msg)
+                             for line, msg in part.errors)
+        report.lines += part.lines
+        report.invalid += part.invalid
+    del report.errors[max_errors:]
+    return report
+
+
+def verify_files(paths: List[Path], schema_model: Dict[str, SchemaField],
+                 workers: int = 1, chunk: int = DEFAULT_CHUNK,
+                 max_errors: int = DEFAULT_MAX_ERRORS,
+                 range_size: int = RANGE_SIZE) -> List[FileReport]:
+    """
+    Stream every file through the record validator, on a process pool
+    when `workers` > 1. Large files are split into byte ranges so one
+    big file still uses every worker.
+
+    Parameters:
+        paths (List[Path]): JSON Lines files to verify.
+        schema_model (Dict[str, SchemaField]): Schema they were made with.
+        workers (int): Worker processes; 1 verifies in this process.
+        chunk (int): Bytes read per call.
+        max_errors (int): Error messages kept per file.
+        range_size (int): Bytes per parallel task of a large file.
+
+    Returns:
+        List[FileReport]: One report per file, in the order given.
+    """
+    tasks = [(i, path, start, end)
+             for i, path in enumerate(paths)
+             for start, end in _ranges(os.path.getsize(path), range_size)]
+    parts: List[List[FileReport]] = [[] for _ in paths]
+    if workers <= 1 or len(tasks) == 1:
+        for i, path, start, end in tasks:
+            parts[i].append(check_range(path, start, end, schema_model,
+                                        chunk, max_errors))
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        log_queue = create_worker_log_queue()
+        try:
+            with ProcessPoolExecutor(
+                    max_workers=min(workers, len(tasks)),
+                    initializer=init_worker_logging,
+                    initargs=(log_queue, get_log_level())
+            ) as executor:
+                futures = [
+                    (i, executor.submit(check_range, path, start, end,
+                                        schema_model, chunk, max_errors))
+                    for i, path, start, end in tasks
+                ]
+                # Submitted in file order, so each file's ranges stay ordered
+                for i, future in futures:
+                    parts[i].append(future.result())
+        finally:
+            stop_worker_log_queue(log_queue)
+    return [_merge(p, max_errors) for p in parts]
+
+
+def log_reports(reports: List[FileReport]) -> bool:
+    """
+    Log per-file line counts and errors, then a summary.
+
+    Returns:
+        bool: True if every record of every file is valid.
+    """
+    for r in reports:
+        if not r.invalid:
+            logger.info("%s: %d lines OK", r.path, r.lines)
+            continue
+        logger.error("%s: %d of %d lines invalid", r.path, r.invalid, r.lines)
+        for line, msg in r.errors:
+            logger.error("  line %d: %s", line, msg)
+        if r.invalid > len(r.errors):
+            logger.error("  ... and %d more", r.invalid - len(r.errors))
+
+    lines = sum(r.lines for r in reports)
+    invalid = sum(r.invalid for r in reports)
+    bad_files = sum(1 for r in reports if r.invalid)
+    if invalid:
+        logger.error("Verified %d files, %d lines: %d invalid lines in "
+                     "%d files", len(reports), lines, invalid, bad_files)
+    else:
+        logger.info("Verified %d files, %d lines: all valid",
+                    len(reports), lines)
+    return not invalid
+
+
+def collect_files(paths: List[str], base_name: str) -> List[Path]:
+    """
+    Files to verify: given files as-is, and in given directories (and
+    their partition subdirectories) the .jsonl files named like the
+    generator names `base_name` outputs.
+
+    Returns:
+        List[Path]: Sorted, without duplicates.
+    """
+    from magicgenerator.utils import output_name_pattern
+
+    pattern = output_name_pattern(base_name)
+    found = set()
+    for p in map(Path, paths):
+        if not p.is_dir():
+            found.add(p)
+            continue
+        for root, _, names in os.walk(p):
+            found.update(
+                Path(root) / name for name in names
+                if name.endswith(".jsonl") and pattern.fullmatch(name)
+            )
+    return sorted(found)
@@ -0,0 +1,263 @@
+import errno
+import mmap
+import os
+from pathlib import Path
+from typing import Any, BinaryIO, Optional, Union
+from magicgenerator.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Supported --write_mode values
+WRITE_MODES = ("buffered", "dontneed", "direct")
+
+# Bytes staged before each write + writeback step (multiple of the page size)
+DEFAULT_CHUNK = 8 << 20
+
+# O_DIRECT needs buffer addresses, sizes and offsets aligned to the
+# logical block size; 4096 covers every common device
+DIRECT_ALIGN = 4096
+
+# Page-cache dropping is POSIX-only; elsewhere dontneed only syncs
+_HAS_FADVISE = hasattr(os, "posix_fadvise")
+
+# sync_file_range(2) flags
+_SYNC_WAIT_BEFORE = 1
+_SYNC_WRITE = 2
+_SYNC_WAIT_AFTER = 4
+
+
+def _load_sync_file_range() -> Optional[Any]:
+    """
+    sync_file_range is Linux-only and not exposed by the os module;
+    look it up in libc, or return None to fall back to fdatasync.
+    """
+    import ctypes
+    import ctypes.util
+
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        fn = libc.sync_file_range
+    except (OSError, AttributeError, TypeError):
+        return None
+    fn.argtypes = [ctypes.c_int, ctypes.c_int64, ctypes.c_int64, ctypes.c_uint]
+    fn.restype = ctypes.c_int
+    return fn
+
+
+# Looked up by the first StreamingWriter: find_library may run ldconfig,
+# which buffered-mode runs should not pay for at import
+_sync_file_range: Any = None
+_sync_file_range_loaded = False
+
+
+class StreamingWriter:
+    """
+    Write-only file that keeps large sequential writes out of the page
+    cache, so multi-terabyte jobs do not evict everything else on the
+    host or stall on a burst of dirty-page writeback.
+
+    Modes:
+        dontneed: data is written in `chunk` sized pieces; each piece is
+                  submitted for writeback right away (sync_file_range),
+                  and once the previous piece has reached the disk its
+                  pages are dropped with posix_fadvise(DONTNEED).
+        direct:   O_DIRECT writes from a page-aligned staging buffer,
+                  bypassing the page cache entirely. Falls back to
+                  dontneed where the filesystem refuses O_DIRECT.
+
+    When `expected_size` is known the file is preallocated with
+    posix_fallocate and trimmed to the real size on close.
+    """
+
+    def __init__(self, path: Union[str, Path], mode: str = "dontneed",
+                 chunk: int = DEFAULT_CHUNK,
+                 expected_size: Optional[int] = None,
+                 append: bool = False):
+        global _sync_file_range, _sync_file_range_loaded
+        if mode not in ("dontneed", "direct"):
+            raise ValueError(f"unknown streaming write mode {mode!r}")
+        if not _sync_file_range_loaded:
+            _sync_file_range = _load_sync_file_range()
+            _sync_file_range_loaded = True
+        self.path = Path(path)
+        self.chunk = max(DIRECT_ALIGN, chunk - chunk % DIRECT_ALIGN)
+        flags = os.O_WRONLY | os.O_CREAT
+        flags |= os.O_APPEND if append else os.O_TRUNC
+        self._direct = mode == "direct"
+        if self._direct and append:
+            self._direct = False
+            logger.warning("Direct writes cannot append to %s, "
+                           "using dontneed", self.path)
+        elif self._direct and not hasattr(os, "O_DIRECT"):
+            self._direct = False
+            logger.warning("O_DIRECT not available for %s, using dontneed",
+                           self.path)
+        self._fd = self._open(flags)
+        self._pos = os.lseek(self._fd, 0, os.SEEK_END)
+        self._pending: Optional[tuple] = None
+        self._preallocated = False
+        if expected_size:
+            self._preallocate(expected_size)
+        if self._direct:
+            self._stage: Any = mmap.mmap(-1, self.chunk)
+        else:
+            self._stage = bytearray()
+        self._staged = 0
+
+    def _open(self, flags: int) -> int:
+        if self._direct:
+            try:
+                return os.open(self.path, flags | os.O_DIRECT, 0o666)
+            except OSError as e:
+                if e.errno != errno.EINVAL:
+                    raise
+                self._drop_direct("open")
+        return os.open(self.path, flags, 0o666)
+
+    def _drop_direct(self, where: str) -> None:
+        logger.warning("Filesystem of %s refused O_DIRECT (%s), "
+                       "using dontneed", self.path, where)
+        self._direct = False
+
+    def _preallocate(self, size: int) -> None:
+        try:
+            os.posix_fallocate(self._fd, self._pos, size)
+            self._preallocated = True
+        except (OSError, AttributeError) as e:
+            logger.debug("Preallocation of %s skipped: %s", self.path, e)
+
+    def _write_all(self, data: Any) -> None:
+        view = memoryview(data)
+        while view:
+            written = os.write(self._fd, view)
+            view = view[written:]
+
+    def _writeback(self, offset: int, length: int, wait: bool) -> None:
+        """
+        Start writeback of [offset, offset+length) and drop the pages of
+        the previously submitted range once it is on disk.
+        """
+        if _sync_file_range is not None:
+            _sync_file_range(self._fd, offset, length, _SYNC_WRITE)
+            ranges = [self._pending] if self._pending else []
+            self._pending = (offset, length)
+            if wait:
+                ranges.append(self._pending)
+                self._pending = None
+            for off, ln in ranges:
+                _sync_file_range(
+                    self._fd, off, ln,
+                    _SYNC_WAIT_BEFORE | _SYNC_WRITE | _SYNC_WAIT_AFTER
+                )
+                self._drop_pages(off, ln)
+        else:
+            getattr(os, "fdatasync", os.fsync)(self._fd)
+            self._drop_pages(offset, length)
+
+    def _drop_pages(self, offset: int, length: int) -> None:
+        """Evict an already written range from the page cache."""
+        if _HAS_FADVISE:
+            os.posix_fadvise(self._fd, offset, length,
+                             os.POSIX_FADV_DONTNEED)
+
+    def _flush_stage(self, final: bool = False) -> None:
+        if not self._staged:
+            return
+        if self._direct:
+            length = self._staged
+            if final and length % DIRECT_ALIGN:
+                # O_DIRECT can only write whole blocks: zero-pad the tail
+                # and trim the file back to its real size on close
+                padded = length + DIRECT_ALIGN - length % DIRECT_ALIGN
+                self._stage[length:padded] = bytes(padded - length)
+                length = padded
+            try:
+                self._write_all(memoryview(self._stage)[:length])
+            except OSError as e:
+                if e.errno != errno.EINVAL:
+                    raise
+                # Some filesystems accept O_DIRECT at open but not on write
+                import fcntl
+
+                fl = fcntl.fcntl(self._fd, fcntl.F_GETFL)
+                fcntl.fcntl(self._fd, fcntl.F_SETFL, fl & ~os.O_DIRECT)
+                self._drop_direct("write")
+                self._write_all(memoryview(self._stage)[:self._staged])
+        else:
+            self._write_all(self._stage)
+            self._writeback(self._pos, self._staged, wait=final)
+            self._stage = bytearray()
+        self._pos += self._staged
+        self._staged = 0
+
+    def write(self, data: bytes) -> int:
+        """Stage `data`; full chunks are written out as they complete."""
+        n = len(data)
+        if not self._direct:
+            self._stage += data
+            self._staged += n
+            if self._staged >= self.chunk:
+                self._flush_stage()
+            return n
+
+        view = memoryview(data)
+        while view:
+            take = min(len(view), self.chunk - self._staged)
+            self._stage[self._staged:self._staged + take] = view[:take]
+            self._staged += take
+            view = view[take:]
+            if self._staged == self.chunk:
+                self._flush_stage()
+                if not self._direct:
+                    # O_DIRECT was dropped mid-write: stage the rest normally
+                    self._stage.close()
+                    self._stage = bytearray(view)
+                    self._staged = len(view)
+                    break
+        return n
+
+    def close(self) -> None:
+        """Write the tail, trim the file to its real size and close it."""
+        if self._fd < 0:
+            return
+        try:
+            self._flush_stage(final=True)
+            if self._pending:
+                self._writeback(*self._pending, wait=True)
+            if self._direct or self._preallocated:
+                os.ftruncate(self._fd, self._pos)
+        finally:
+            os.close(self._fd)
+            self._fd = -1
+            if isinstance(self._stage, mmap.mmap):
+                self._stage.close()
+
+    def __enter__(self) -> "StreamingWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def open_output(path: Path, write_mode: str = "buffered",
+                expected_size: Optional[int] = None,
+                append: bool = False) -> BinaryIO:
+    """
+    Open `path` for writing generated data.
+
+    Parameters:
+        path (Path): File to create / truncate.
+        write_mode (str): "buffered" (regular buffered file),
+            "dontneed" or "direct" (see StreamingWriter).
+        expected_size (Optional[int]): Known upper bound of the file
+            size, used to preallocate in the streaming modes.
+        append (bool): Write after the current end of an existing file
+            instead of truncating it (direct falls back to dontneed).
+
+    Returns:
+        BinaryIO: Writable binary file object (a context manager).
+    """
+    if write_mode == "buffered":
+        return path.open("ab" if append else "wb")
+    return StreamingWriter(path, write_mode, expected_size=expected_size,
+                           append=append)
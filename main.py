@@ -1,145 +1,1065 @@
-import json
+import os
+import sys
 import random
-import uuid
+import math
 from pathlib import Path
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import TYPE_CHECKING, List, Optional, Tuple
+from contextlib import ExitStack
 
 from magicgenerator.config import read_defaults
-from magicgenerator.generator import DataGenerator
-from magicgenerator.parser import SchemaParser, SchemaField
-from magicgenerator.cli import build_parser
-from magicgenerator.logger import get_logger
+from magicgenerator.generator import DataGenerator, DEFAULT_WRITE_BATCH
+from magicgenerator.formats import COLUMNAR_FORMATS
+from magicgenerator.parser import (
+    SchemaParser,
+    SchemaField,
+    flatten_schema,
+    schema_hash
+)
+from magicgenerator.cli import (
+    build_parser,
+    build_serve_parser,
+    build_verify_parser
+)
+from magicgenerator.partition import DEFAULT_MAX_OPEN, partition_dirs
+from magicgenerator.logger import (
+    get_logger,
+    configure_logging,
+    get_log_level,
+    create_worker_log_queue,
+    stop_worker_log_queue,
+    init_worker_logging
+)
 from magicgenerator.utils import (
-    validate_output_path,
+    validate_output_paths,
+    group_by_device,
+    share_workers,
+    assign_dirs,
     validate_min,
+    validate_finite,
     cap_multiprocessing,
     clear_old_files
 )
 
+# Modules only some modes need (process pools, sqlite, sinks, the
+# server, ...) are imported where they are used, so a small run does
+# not pay for them at start-up (see tests/test_startup.py)
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+    from magicgenerator.budget import ByteBudget
+    from magicgenerator.checksum import FileSum
+    from magicgenerator.dataset import Dataset
+    from magicgenerator.sinks import Sink, SinkSpec
 
-def _generate_one(i: int, output_dir: Path, base_name: str, file_prefix: str,
-                  data_lines: int, schema_model: dict[str, SchemaField],
-                  add_suffix: bool):
+logger = get_logger()
+
+
+def _output_path(i: int, output_dir: Path, base_name: str, file_prefix: str,
+                 add_suffix: bool, extension: str = ".jsonl") -> Path:
     """
-    Generates a single .jsonl file with synthetic data.
+    Builds the path of the i-th output file.
 
     Parameters:
         i (int): Index of the file (used for "count" prefix).
         output_dir (Path): Output directory path.
         base_name (str): Base name for the output file.
         file_prefix (str): File prefix mode ("count", "random", or "uuid").
-        data_lines (int): Number of records to generate.
-        schema_model (dict[str, SchemaField]): Field generation rules.
         add_suffix (bool): Whether to add a suffix to the file name.
+        extension (str): File extension of the output format.
 
     Returns:
-        Path: Path to the generated output file.
+        Path: Path of the output file.
     """
     if file_prefix == "count":
         suffix = str(i + 1)
     elif file_prefix == "random":
         suffix = str(random.randint(0, 10000))
     else:
+        import uuid
         suffix = str(uuid.uuid4())
 
     filename = (
-        f"{base_name}_{suffix}.jsonl" if add_suffix
-        else f"{base_name}.jsonl"
+        f"{base_name}_{suffix}{extension}" if add_suffix
+        else f"{base_name}{extension}"
     )
-    out_path = output_dir / filename
-    gen = DataGenerator(schema_model)
-    gen.write_jsonl_file(out_path, data_lines)
-    return out_path
+    return output_dir / filename
+
+
+def _generate_one(i: int, output_dir: Path, base_name: str, file_prefix: str,
+                  data_lines: int, schema_model: dict[str, SchemaField],
+                  add_suffix: bool, gen_options: Optional[dict] = None,
+                  partition_by: Optional[str] = None,
+                  max_open_partitions: int = DEFAULT_MAX_OPEN
+                  ) -> Tuple[Path, Optional["FileSum"]]:
+    """
+    Generates a single .jsonl (or .csv/.tsv) file with synthetic data.
+
+    Parameters:
+        i (int): Index of the file (used for "count" prefix).
+        output_dir (Path): Output directory path.
+        base_name (str): Base name for the output file.
+        file_prefix (str): File prefix mode ("count", "random", or "uuid").
+        data_lines (int): Number of records to generate.
+        schema_model (dict[str, SchemaField]): Field generation rules.
+        add_suffix (bool): Whether to add a suffix to the file name.
+        gen_options (Optional[dict]): Extra DataGenerator arguments
+            (output_format, pool_size, pool_patch, write_mode, checksum).
+        partition_by (Optional[str]): Field whose value routes each record
+            to `output_dir/<field>=<value>/`; None writes a flat file.
+        max_open_partitions (int): Open file limit when partitioning.
+
+    Returns:
+        Tuple[Path, Optional[FileSum]]: Path to the generated output file
+        (`output_dir/<field>=*/<name>` when partitioned) and its
+        checksum (None without one, and for partitioned output).
+    """
+    gen = DataGenerator(schema_model, **(gen_options or {}))
+    out_path = _output_path(i, output_dir, base_name, file_prefix,
+                            add_suffix, gen.extension)
+    if partition_by is None:
+        gen.write_jsonl_file(out_path, data_lines)
+        gen.log_pool_stats(out_path)
+        return out_path, gen.last_sum
+
+    paths = gen.write_partitioned(output_dir, out_path.name, data_lines,
+                                  partition_by, max_open_partitions)
+    logger.info("Wrote %s into %d partitions", out_path.name, len(paths))
+    return output_dir / f"{partition_by}=*" / out_path.name, None
+
+
+# Set in each pool worker by _init_worker when the job is byte-budgeted
+_worker_budget: Optional["ByteBudget"] = None
+
+
+def _init_worker(log_queue, log_level: int,
+                 budget: Optional["ByteBudget"] = None) -> None:
+    """
+    Pool initializer: route logging to the parent and
+    attach the shared byte budget, if any.
+    """
+    global _worker_budget
+    init_worker_logging(log_queue, log_level)
+    _worker_budget = budget
+
+
+def _generate_until_budget(output_dirs: List[Path], base_name: str,
+                           file_prefix: str,
+                           schema_model: dict[str, SchemaField],
+                           add_suffix: bool,
+                           gen_options: Optional[dict] = None,
+                           budget: Optional["ByteBudget"] = None
+                           ) -> List[Tuple[Path, int, Optional["FileSum"]]]:
+    """
+    Keeps claiming file indices from the shared byte budget and writing
+    each file up to its share, until the job budget is used up.
+
+    Parameters:
+        output_dirs (List[Path]): Directories this worker writes to
+            (file i goes to output_dirs[i % len(output_dirs)]).
+        base_name (str): Base name for the output files.
+        file_prefix (str): File prefix mode ("count", "random", or "uuid").
+        schema_model (dict[str, SchemaField]): Field generation rules.
+        add_suffix (bool): Whether to add a suffix to the file names.
+        gen_options (Optional[dict]): Extra DataGenerator arguments
+            (output_format, pool_size, pool_patch, write_mode, checksum).
+        budget (Optional[ByteBudget]): Shared budget; defaults to the one
+            attached by the pool initializer.
+
+    Returns:
+        List[Tuple[Path, int, Optional[FileSum]]]: Path, number of lines
+        and checksum of each file this worker generated.
+    """
+    budget = budget or _worker_budget
+    gen = DataGenerator(schema_model, **(gen_options or {}))
+    header_len = len(gen.encode_header())
+    paths = []
+    while (claim := budget.claim()) is not None:
+        i, max_bytes = claim
+        if max_bytes < header_len:
+            # The rest of the job cannot even hold a header
+            budget.exhaust()
+            break
+        out_path = _output_path(
+            i, output_dirs[i % len(output_dirs)], base_name, file_prefix,
+            add_suffix, gen.extension
+        )
+        lines, written = gen.write_jsonl_bytes(out_path, max_bytes)
+        if not lines:
+            # What is left cannot hold a single line
+            out_path.unlink()
+            budget.exhaust()
+            break
+        budget.refund(max_bytes - written)
+        logger.info("Completed %s (%d lines, %d bytes)",
+                    out_path, lines, written)
+        paths.append((out_path, lines, gen.last_sum))
+    gen.log_pool_stats(f"{len(paths)} files")
+    return paths
+
+
+def _device_pools(stack: ExitStack, sizes: List[int],
+                  initargs: tuple) -> List["ProcessPoolExecutor"]:
+    """
+    Opens one process pool per device group, registered on `stack`.
+    Keeping each device's workers in their own pool bounds the number
+    of writers queueing on any single device.
+
+    Parameters:
+        stack (ExitStack): Owns the pools (shut down on exit).
+        sizes (List[int]): Number of workers of each pool.
+        initargs (tuple): Arguments for _init_worker.
+
+    Returns:
+        List[ProcessPoolExecutor]: One executor per group.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    return [
+        stack.enter_context(ProcessPoolExecutor(
+            max_workers=size, initializer=_init_worker, initargs=initargs
+        ))
+        for size in sizes
+    ]
+
+
+def _run_byte_budget(args, output_dirs: List[Path],
+                     schema_model: dict[str, SchemaField],
+                     dataset: "Dataset") -> None:
+    """
+    Generates files sized by --target_bytes / --total_bytes.
+
+    Without --total_bytes the job is files_count files of target_bytes;
+    without --target_bytes, total_bytes is split over files_count files.
+    Workers claim file indices dynamically from one shared budget; with
+    several output devices each device gets its own group of workers,
+    writing round-robin into that device's directories. With
+    --add_files, indices continue after the dataset's last file.
+    Completed files are recorded in `dataset`.
+    """
+    from concurrent.futures import as_completed
+    from magicgenerator.budget import ByteBudget
+
+    files = max(args.files_count, 1)
+    total = args.total_bytes or args.target_bytes * files
+    target = args.target_bytes or math.ceil(total / files)
+    header = DataGenerator(schema_model, args.format).encode_header()
+    if len(header) >= target:
+        logger.error("--target_bytes %d cannot hold the %d-byte header "
+                     "and a record", target, len(header))
+        sys.exit(1)
+    first = dataset.next_index if args.add_files else 0
+    budget = ByteBudget(total, target, first)
+    add_suffix = total > target or args.add_files
+    logger.info("Byte budget: %d bytes in files of up to %d bytes",
+                total, target)
+
+    groups = list(group_by_device(output_dirs).values())
+    workers = min(max(args.multiprocessing, 1), math.ceil(total / target))
+    if workers == 1 and len(groups) == 1:
+        written = _generate_until_budget(
+            output_dirs, args.file_name, args.file_prefix, schema_model,
+            add_suffix, _gen_options(args), budget
+        )
+        for path, lines, checksum in written:
+            dataset.record(path, lines, checksum=checksum)
+        dataset.next_index = max(dataset.next_index, budget.next_index)
+        return
+
+    groups, sizes = share_workers(groups, workers)
+    with ExitStack() as stack:
+        # Released after the pools below have shut down
+        log_queue = create_worker_log_queue()
+        stack.callback(stop_worker_log_queue, log_queue)
+        pools = _device_pools(stack, sizes,
+                              (log_queue, get_log_level(), budget))
+        futures = [
+            executor.submit(
+                _generate_until_budget,
+                dirs,
+                args.file_name,
+                args.file_prefix,
+                schema_model,
+                add_suffix,
+                _gen_options(args)
+            )
+            for executor, dirs, size in zip(pools, groups, sizes)
+            for _ in range(size)
+        ]
+        for future in as_completed(futures):
+            try:
+                for path, lines, checksum in future.result():
+                    dataset.record(path, lines, checksum=checksum)
+            except Exception as e:
+                logger.error("Worker failed to generate files: %s", e)
+    dataset.next_index = max(dataset.next_index, budget.next_index)
+
+
+def _run_files(args, output_dirs: List[Path],
+               schema_model: dict[str, SchemaField],
+               dataset: Optional["Dataset"] = None) -> None:
+    """
+    Generates files_count files of data_lines lines, spread over the
+    output directories by --dir_assignment. Files are grouped by the
+    device of their directory and each group runs in its own pool.
+    With --add_files, indices continue after the dataset's last file.
+    Completed files are recorded in `dataset` (None when partitioned).
+    """
+    from concurrent.futures import as_completed
+
+    first = dataset.next_index if args.add_files else 0
+    targets = assign_dirs(output_dirs, first + args.files_count,
+                          args.dir_assignment)
+    by_device: dict[int, List[int]] = {}
+    for i in range(first, len(targets)):
+        by_device.setdefault(os.stat(targets[i]).st_dev, []).append(i)
+    groups, sizes = share_workers(list(by_device.values()),
+                                  args.multiprocessing)
+
+    # Workers hand their records to a single listener in this process
+    with ExitStack() as stack:
+        # Released after the pools below have shut down
+        log_queue = create_worker_log_queue()
+        stack.callback(stop_worker_log_queue, log_queue)
+        pools = _device_pools(
+            stack, [min(size, len(g)) for g, size in zip(groups, sizes)],
+            (log_queue, get_log_level())
+        )
+        futures = [
+            executor.submit(
+                _generate_one,
+                i,
+                targets[i],
+                args.file_name,
+                args.file_prefix,
+                args.data_lines,
+                schema_model,
+                add_suffix=True,
+                gen_options=_gen_options(args),
+                partition_by=args.partition_by,
+                max_open_partitions=args.max_open_partitions
+            )
+            for executor, indices in zip(pools, groups)
+            for i in indices
+        ]
+
+        for future in as_completed(futures):
+            try:
+                path, checksum = future.result()
+                logger.info("Completed %s", path)
+                if dataset is not None:
+                    dataset.record(path, args.data_lines, checksum=checksum)
+            except Exception as e:
+                logger.error("Worker failed to generate a file: %s", e)
+    if dataset is not None:
+        dataset.next_index = max(dataset.next_index, len(targets))
+
+
+def _append_one(path: Path, data_lines: int,
+                schema_model: dict[str, SchemaField],
+                gen_options: Optional[dict] = None
+                ) -> Tuple[Path, Optional["FileSum"]]:
+    """
+    Appends `data_lines` records to an existing output file.
+
+    Returns:
+        Tuple[Path, Optional[FileSum]]: Path of the grown file and its
+        new checksum, if enabled.
+    """
+    gen = DataGenerator(schema_model, **(gen_options or {}))
+    gen.write_jsonl_file(path, data_lines, append=True)
+    gen.log_pool_stats(path)
+    return path, gen.last_sum
+
+
+def _run_append(args, dataset: "Dataset",
+                schema_model: dict[str, SchemaField]) -> None:
+    """
+    --append: adds data_lines records to every file of the dataset,
+    one pool per device when several workers are used. Only the new
+    records are generated; the existing content is never read.
+    """
+    from concurrent.futures import as_completed
+
+    paths = [p for p in sorted(dataset.files) if p.is_file()]
+    missing = len(dataset.files) - len(paths)
+    if missing:
+        logger.warning("%d files of dataset %r are gone, skipping them",
+                       missing, args.file_name)
+    if not paths:
+        logger.warning("Dataset %r has no files to append to", args.file_name)
+        return
+
+    by_device: dict[int, List[Path]] = {}
+    for p in paths:
+        by_device.setdefault(os.stat(p.parent).st_dev, []).append(p)
+    groups = list(by_device.values())
+    if args.multiprocessing <= 1 and len(groups) == 1:
+        for p in paths:
+            _, checksum = _append_one(p, args.data_lines, schema_model,
+                                      _gen_options(args))
+            dataset.record(p, args.data_lines, append=True,
+                           checksum=checksum)
+        return
+
+    groups, sizes = share_workers(groups, args.multiprocessing)
+    with ExitStack() as stack:
+        # Released after the pools below have shut down
+        log_queue = create_worker_log_queue()
+        stack.callback(stop_worker_log_queue, log_queue)
+        pools = _device_pools(
+            stack, [min(size, len(g)) for g, size in zip(groups, sizes)],
+            (log_queue, get_log_level())
+        )
+        futures = {
+            executor.submit(
+                _append_one,
+                p,
+                args.data_lines,
+                schema_model,
+                _gen_options(args)
+            ): p
+            for executor, group in zip(pools, groups)
+            for p in group
+        }
+        for future in as_completed(futures):
+            try:
+                _, checksum = future.result()
+                dataset.record(futures[future], args.data_lines, append=True,
+                               checksum=checksum)
+            except Exception as e:
+                logger.error("Worker failed to append to %s: %s",
+                             futures[future], e)
+
+
+def _load_sqlite_shard(i: int, db_path: Path, table: str,
+                       schema_model: dict[str, SchemaField], rows: int,
+                       batch_size: int) -> Path:
+    """
+    Worker task: load `rows` rows into this worker's own shard database.
+
+    Returns:
+        Path: Path of the shard, to be merged by the parent.
+    """
+    from magicgenerator.sqlite_loader import load_rows, shard_path
+
+    path = shard_path(db_path, i)
+    path.unlink(missing_ok=True)
+    load_rows(path, table, schema_model, rows, batch_size, shard=True)
+    return path
+
+
+def _run_sqlite(args, schema_model: dict[str, SchemaField]) -> None:
+    """
+    Bulk-loads data_lines rows into the --sink sqlite database, in a
+    table named after --file_name. With several workers each one fills
+    its own shard database, which are then attached and merged.
+    Requested indexes are built only after the load.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from magicgenerator.sqlite_loader import (
+        load_rows,
+        merge_shards,
+        create_indexes
+    )
+
+    db_path = Path(args.sink[0].target)
+    table = args.file_name
+    columns = {name for name, _ in flatten_schema(schema_model)}
+    unknown = [f for f in args.sqlite_index if f not in columns]
+    if unknown:
+        logger.error("--sqlite_index fields not in schema: %s",
+                     ", ".join(unknown))
+        sys.exit(1)
+
+    workers = min(max(args.multiprocessing, 1), max(args.data_lines, 1))
+    if workers == 1:
+        load_rows(db_path, table, schema_model,
+                  args.data_lines, args.sink_batch)
+    else:
+        # Split the rows as evenly as possible over the workers
+        share, extra = divmod(args.data_lines, workers)
+        log_queue = create_worker_log_queue()
+        try:
+            with ProcessPoolExecutor(
+                    max_workers=workers,
+                    initializer=_init_worker,
+                    initargs=(log_queue, get_log_level())
+            ) as executor:
+                futures = [
+                    executor.submit(
+                        _load_sqlite_shard,
+                        i,
+                        db_path,
+                        table,
+                        schema_model,
+                        share + (1 if i < extra else 0),
+                        args.sink_batch
+                    )
+                    for i in range(workers)
+                ]
+                shards = [future.result() for future in futures]
+        finally:
+            stop_worker_log_queue(log_queue)
+        merge_shards(db_path, table, schema_model, shards)
+
+    if args.sqlite_index:
+        create_indexes(db_path, table, args.sqlite_index)
+
+
+def _sqlite_sink(args) -> Optional["SinkSpec"]:
+    """The --sink sqlite database, if that is the output."""
+    if args.sink and args.sink[0].kind == "sqlite":
+        return args.sink[0]
+    return None
+
+
+def _send_to_sink(gen: DataGenerator, target: "Sink", args) -> None:
+    """
+    Sends data_lines records to an opened sink in --sink_batch batches,
+    or paced by --rate (until --duration elapsed, if given).
+    """
+    if args.rate is None:
+        gen.write_sink(target, args.data_lines, args.sink_batch)
+        return
+    from magicgenerator.rate import stream_at_rate
+
+    limit = args.data_lines if args.duration is None else None
+    try:
+        stream_at_rate(gen, target, args.rate, limit, args.duration or None)
+    except KeyboardInterrupt:
+        pass
+
+
+def _run_sinks(args, schema_model: dict[str, SchemaField]) -> None:
+    """
+    Sends data_lines records to every --sink (paced by --rate, if
+    given). The records are encoded once; with several sinks each batch
+    is fanned out to per-sink writer threads, a slow sink being handled
+    by --sink_policy.
+
+    Raises:
+        SystemExit: If a sink cannot be opened or fails.
+    """
+    from magicgenerator.sinks import open_sink
+    from magicgenerator.fanout import FanOut
+
+    gen = DataGenerator(schema_model, **_gen_options(args))
+    failed = []
+    try:
+        with ExitStack() as stack:
+            sinks = [stack.enter_context(open_sink(spec))
+                     for spec in args.sink]
+            if len(sinks) == 1:
+                target = sinks[0]
+                _send_to_sink(gen, target, args)
+            else:
+                target = FanOut(sinks, args.sink_policy, args.sink_buffer,
+                                args.spill_dir)
+                try:
+                    _send_to_sink(gen, target, args)
+                finally:
+                    target.close()
+                failed = target.failed
+            gen.log_pool_stats(target)
+    except OSError as e:
+        logger.error("Sink failed: %s", e)
+        sys.exit(1)
+    if failed:
+        logger.error("%d of %d sinks failed: %s", len(failed),
+                     len(args.sink), ", ".join(str(s) for s, _ in failed))
+        sys.exit(1)
+    logger.info("Completed %s", target)
+
+
+def _gen_options(args) -> dict:
+    """DataGenerator keyword arguments derived from the CLI arguments."""
+    return {
+        "output_format": args.format,
+        "pool_size": args.pool_size,
+        "pool_patch": args.pool_patch,
+        "write_mode": args.write_mode,
+        "checksum": args.checksum,
+    }
+
+
+def _run_estimate(args, output_dirs: List[Path],
+                  schema_model: dict[str, SchemaField]) -> None:
+    """
+    Dry run for --estimate: measures a sample of encoded records and
+    logs the projected size, wall time and best --multiprocessing.
+    Nothing is written.
+    """
+    import shutil
+    from magicgenerator.estimate import estimate_job, log_estimate
+
+    gen = DataGenerator(schema_model, **_gen_options(args))
+    to_files = args.files_count > 0 and not args.sink
+    budget = to_files and bool(args.target_bytes or args.total_bytes)
+    est = estimate_job(
+        gen,
+        0 if args.sink else args.files_count,
+        args.data_lines,
+        total_bytes=args.total_bytes if budget else None,
+        target_bytes=args.target_bytes if budget else None,
+        rate=args.rate
+    )
+    free = None
+    if to_files:
+        free = sum(shutil.disk_usage(dirs[0]).free
+                   for dirs in group_by_device(output_dirs).values())
+    log_estimate(est, free)
+
+
+def _validate_pool(args, schema_model: dict[str, SchemaField]) -> None:
+    """
+    Checks the replay-pool options against the schema and the mode.
+
+    Raises:
+        SystemExit: If a --pool_patch field is not part of the schema.
+    """
+    # csv/tsv may patch nested members by their column name ("user.id")
+    columns = DataGenerator(schema_model, args.format).columns
+    unknown = [f for f in args.pool_patch if f not in columns]
+    if unknown:
+        logger.error("--pool_patch fields not in schema: %s",
+                     ", ".join(unknown))
+        sys.exit(1)
+    if args.partition_by is not None \
+            or _sqlite_sink(args) is not None:
+        logger.warning("--pool_size does not apply to partitioned or "
+                       "sqlite output, records are generated one by one")
+
+
+def _validate_partition_field(args, schema_model: dict[str, SchemaField]):
+    """
+    Checks that --partition_by names a schema field and that it is
+    used in a mode where it applies (plain file output).
+
+    Raises:
+        SystemExit: If the field is not part of the schema.
+    """
+    field = schema_model.get(args.partition_by)
+    if field is None:
+        logger.error("--partition_by field %r is not in the schema",
+                     args.partition_by)
+        sys.exit(1)
+    if field.mode in {"object", "array"}:
+        logger.error("--partition_by field %r must be a top-level "
+                     "scalar field", args.partition_by)
+        sys.exit(1)
+    if field.mode not in {"choice", "constant", "empty"}:
+        logger.warning(
+            "Partitioning by %s (mode %s) may create one directory per record",
+            args.partition_by, field.mode
+        )
+    if args.files_count == 0 or args.sink \
+            or args.target_bytes or args.total_bytes:
+        logger.warning("--partition_by only applies to file output sized "
+                       "by --data_lines, ignoring it")
+        args.partition_by = None
+
+
+def _validate_grow(args) -> None:
+    """
+    Checks that --append / --add_files are used with flat file output.
+
+    Raises:
+        SystemExit: On a combination that cannot grow a dataset.
+    """
+    if args.append and args.add_files:
+        logger.error("--append and --add_files cannot be combined")
+        sys.exit(1)
+    if args.sink or args.partition_by is not None:
+        logger.error("--append / --add_files only apply to flat file "
+                     "output (no --sink or --partition_by)")
+        sys.exit(1)
+    if args.add_files and args.files_count == 0:
+        logger.error("--add_files needs --files_count >= 1")
+        sys.exit(1)
+    if args.append and (args.target_bytes or args.total_bytes):
+        logger.error("--append adds --data_lines lines to every file; "
+                     "use --add_files with --target_bytes/--total_bytes")
+        sys.exit(1)
+    if args.clear_path:
+        logger.warning("--clear_path would delete the dataset being "
+                       "grown, ignoring it")
+        args.clear_path = False
+
+
+def _validate_columnar(args) -> None:
+    """
+    Checks that a columnar --format (npy) is written to files sized by
+    --data_lines, the only output columns can go to.
+
+    Raises:
+        SystemExit: On a mode that needs line-encoded output.
+    """
+    if args.files_count == 0 or args.sink or args.append \
+            or args.target_bytes or args.total_bytes \
+            or args.partition_by is not None or args.estimate:
+        logger.error("--format %s only writes files sized by --data_lines "
+                     "(no stdout, --sink, --append, --target_bytes/"
+                     "--total_bytes, --partition_by or --estimate)",
+                     args.format)
+        sys.exit(1)
+    if args.pool_size:
+        logger.warning("--pool_size does not apply to --format %s, "
+                       "columns are generated directly", args.format)
+        args.pool_size = 0
+    if args.checksum:
+        logger.warning("--checksum does not apply to --format %s, "
+                       "ignoring it", args.format)
+        args.checksum = None
+
+
+def _open_dataset(args, output_dirs: List[Path],
+                  schema: str) -> "Dataset":
+    """
+    Loads the metadata of the dataset named by --file_name, or starts
+    a new one for a fresh run.
+
+    Parameters:
+        schema (str): schema_hash of the run's raw schema.
+
+    Returns:
+        Dataset: Dataset the run's files are recorded in.
+
+    Raises:
+        SystemExit: If --append / --add_files find no dataset, or one
+        written with another schema or format.
+    """
+    from magicgenerator.dataset import Dataset, load_dataset
+
+    grow = args.append or args.add_files
+    try:
+        dataset = load_dataset(output_dirs, args.file_name)
+    except ValueError as e:
+        if grow:
+            logger.error("Cannot grow dataset %r: %s", args.file_name, e)
+            sys.exit(1)
+        logger.warning("Replacing dataset metadata: %s", e)
+        dataset = None
+
+    if grow:
+        if dataset is None:
+            logger.error("No metadata of dataset %r in %s; --append and "
+                         "--add_files continue datasets written by an "
+                         "earlier run", args.file_name,
+                         ", ".join(map(str, output_dirs)))
+            sys.exit(1)
+        if (dataset.schema, dataset.output_format) != (schema, args.format):
+            logger.error("Dataset %r was generated with another schema "
+                         "or --format", args.file_name)
+            sys.exit(1)
+        logger.info("Growing dataset %r: %d files, %d lines",
+                    args.file_name, len(dataset.files), dataset.total_lines)
+        return dataset
+
+    if dataset is None or args.clear_path \
+            or dataset.schema != schema \
+            or dataset.output_format != args.format:
+        return Dataset(schema, args.format)
+    # Rewritten files replace their entries, others are kept
+    return dataset
+
+
+def _stream_with_rate(gen: DataGenerator, args) -> None:
+    """
+    Stdout mode with --rate: pace the output until data_lines records
+    were written, --duration elapsed, or the consumer went away.
+
+    Parameters:
+        gen (DataGenerator): Generator bound to the schema model.
+        args: Parsed CLI arguments (rate, duration, data_lines).
+    """
+    from magicgenerator.rate import stream_at_rate
+
+    limit = args.data_lines if args.duration is None else None
+    duration = args.duration or None
+    try:
+        stream_at_rate(gen, sys.stdout.buffer, args.rate, limit, duration)
+    except KeyboardInterrupt:
+        pass
+    except BrokenPipeError:
+        # The consumer closed the pipe; point stdout at devnull so the
+        # interpreter's final flush does not fail again on exit
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+
+
+def _serve(defaults: dict, argv: List[str]) -> None:
+    """
+    `main.py serve`: run the generator server until interrupted.
+
+    Raises:
+        SystemExit: On invalid options or if the address cannot be bound.
+    """
+    from magicgenerator.server import GeneratorServer
+
+    args = build_serve_parser(defaults).parse_args(argv)
+    configure_logging(
+        args.log_level, None if args.no_log_file else args.log_file
+    )
+    validate_min("multiprocessing", args.multiprocessing, 0)
+    validate_min("schema_cache", args.schema_cache, 1)
+    if args.listen.kind not in {"tcp", "unix"}:
+        logger.error("--listen must be tcp://host:port or unix:/path.sock")
+        sys.exit(1)
+    workers = cap_multiprocessing(args.multiprocessing)
+
+    try:
+        server = GeneratorServer(args.listen, workers, args.schema_cache)
+    except OSError as e:
+        logger.error("Cannot listen on %s: %s", args.listen, e)
+        sys.exit(1)
+    with server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logger.info("Server stopped")
+
+
+def _verify(defaults: dict, argv: List[str]) -> None:
+    """
+    `main.py verify`: check generated .jsonl files against the schema,
+    logging per-file line counts and the first invalid lines.
+
+    Raises:
+        SystemExit: On invalid options, or (status 1) if no file was
+        found or any record is invalid.
+    """
+    from magicgenerator.verify import collect_files, verify_files, log_reports
+
+    args = build_verify_parser(defaults).parse_args(argv)
+    configure_logging(
+        args.log_level, None if args.no_log_file else args.log_file
+    )
+    validate_min("multiprocessing", args.multiprocessing, 0)
+    validate_min("max_errors", args.max_errors, 0)
+    workers = cap_multiprocessing(args.multiprocessing)
+
+    paths = collect_files(args.paths, args.file_name)
+    missing = [p for p in paths if not p.is_file()]
+    if missing:
+        logger.error("Not a file or directory: %s",
+                     ", ".join(map(str, missing)))
+        sys.exit(1)
+    unsupported = [p for p in paths if p.suffix != ".jsonl"]
+    if unsupported:
+        logger.error("Only JSON Lines files can be verified: %s",
+                     ", ".join(map(str, unsupported)))
+        sys.exit(1)
+    if not paths:
+        logger.error("No %s .jsonl files found in %s", args.file_name,
+                     ", ".join(args.paths))
+        sys.exit(1)
+
+    schema_model = SchemaParser.build_schema_model(
+        SchemaParser.load_schema(args.data_schema)
+    )
+    logger.info("Verifying %d files with %d workers", len(paths), workers)
+    reports = verify_files(paths, schema_model, workers,
+                           args.chunk_size, args.max_errors)
+    if not log_reports(reports):
+        sys.exit(1)
 
 
 def main():
     """
-    Main execution flow for the CLI tool.
+    Main execution flow for the CLI tool
+    (`main.py serve ...` starts the generator server and
+    `main.py verify ...` checks generated files instead).
 
     Steps:
         1. Load defaults and parse CLI arguments.
         2. Validate input paths and numeric values.
         3. Load and parse the input schema.
-        4. Optionally clear previously generated files.
+        4. With --estimate, log the projected job size and stop.
+           Otherwise load the dataset metadata (file output) and
+           optionally clear previously generated files.
         5. Generate data:
-            - If files_count == 0: print to stdout.
+            - If --append: add data_lines records to every file.
+            - If --sink is given: send data_lines records to it
+              (to all of them at once if repeated).
+            - If files_count == 0: print to stdout (paced if --rate).
+            - If --target_bytes/--total_bytes: generate files by size.
             - If files_count == 1: generate one file.
-            - If files_count > 1: use multiprocessing to generate files.
+            - If files_count > 1 (or --add_files): use multiprocessing
+              to generate files, spread over the output directories
+              (one pool per device).
+        6. Record the files written in the dataset metadata, and with
+           --checksum write their manifest.
 
     Raises:
         SystemExit: On invalid input or configuration errors.
     """
     # 1) Load default configuration, parse the command-line args
-    logger = get_logger()
     defaults = read_defaults()
+    if sys.argv[1:2] == ["serve"]:
+        _serve(defaults, sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["verify"]:
+        _verify(defaults, sys.argv[2:])
+        return
     parser = build_parser(defaults)
     args = parser.parse_args()
+    configure_logging(
+        args.log_level, None if args.no_log_file else args.log_file
+    )
 
     logger.info("Starting magicgenerator with args: %s", vars(args))
 
     # 2) Validate path & numerics
-    output_dir = validate_output_path(args.path_to_save_files)
+    output_dirs = validate_output_paths(args.path_to_save_files)
+    output_dir = output_dirs[0]
     validate_min("files_count", args.files_count, 0)
     validate_min("multiprocessing", args.multiprocessing, 0)
     args.multiprocessing = cap_multiprocessing(args.multiprocessing)
+    if args.rate is not None:
+        validate_finite("rate", args.rate)
+    if args.duration is not None:
+        validate_finite("duration", args.duration)
+        validate_min("duration", args.duration, 0)
+    validate_min("sink_batch", args.sink_batch, 1)
+    validate_min("sink_buffer", args.sink_buffer, 1)
+    if len(args.sink) > 1 and any(s.kind == "sqlite" for s in args.sink):
+        logger.error("A sqlite sink cannot be combined with other sinks")
+        sys.exit(1)
+    validate_min("max_open_partitions", args.max_open_partitions, 1)
+    validate_min("pool_size", args.pool_size, 0)
+    if (args.target_bytes or args.total_bytes) \
+            and (args.files_count == 0 or args.sink):
+        logger.warning("--target_bytes/--total_bytes only apply to file "
+                       "output, ignoring them")
+    if args.rate is not None and _sqlite_sink(args) is not None:
+        logger.warning("--rate does not apply to sqlite sinks, ignoring it")
+        args.rate = None
+    elif args.rate is not None and args.files_count and not args.sink:
+        logger.warning("--rate only applies to stdout and sink mode, "
+                       "ignoring it")
+        args.rate = None
+    if args.duration is not None and args.rate is None:
+        logger.warning("--duration only applies together with --rate, "
+                       "ignoring it")
+        args.duration = None
+    if args.append or args.add_files:
+        _validate_grow(args)
+    if args.format in COLUMNAR_FORMATS:
+        _validate_columnar(args)
 
     logger.info("Validated all inputs")
 
-    # 3) Load raw schema (dict[str,str])
-    raw_schema = SchemaParser.load_schema(args.data_schema)
-
-    # 3) Parse that raw schema into SchemaField objects
-    schema_model = SchemaParser.build_schema_model(raw_schema)
+    # 3) Load the schema and parse it into SchemaField objects
+    # (or load the model compiled by an earlier run from --cache_dir)
+    if args.cache_dir:
+        from magicgenerator.schema_cache import load_schema_model
+        schema_model, schema = load_schema_model(
+            args.data_schema, Path(args.cache_dir).expanduser()
+        )
+    else:
+        raw_schema = SchemaParser.load_schema(args.data_schema)
+        schema_model = SchemaParser.build_schema_model(raw_schema)
+        schema = None
     logger.info("Built schema model with fields: %s",
                 ", ".join(schema_model.keys()))
 
 
-    # 4) Clear old files if clear_path is True
+    if args.partition_by is not None:
+        _validate_partition_field(args, schema_model)
+
+    if args.pool_size:
+        _validate_pool(args, schema_model)
+
+    if args.estimate:
+        _run_estimate(args, output_dirs, schema_model)
+        return
+
+    # 4) Flat file output is tracked in metadata next to the files,
+    # so later runs can grow it (--append / --add_files)
+    dataset = None
+    if not args.sink and args.partition_by is None \
+            and (args.files_count > 0 or args.append):
+        dataset = _open_dataset(args, output_dirs,
+                                schema or schema_hash(raw_schema))
+    elif args.checksum:
+        logger.warning("--checksum only applies to flat file output, "
+                       "ignoring it")
+        args.checksum = None
+
+    # Clear old files if clear_path is True
     if args.clear_path:
-        clear_old_files(output_dir, args.file_name)
+        from magicgenerator.checksum import manifest_path
+        from magicgenerator.dataset import metadata_path
+        for d in output_dirs:
+            clear_old_files(d, args.file_name)
+            metadata_path(d, args.file_name).unlink(missing_ok=True)
+            manifest_path(d, args.file_name).unlink(missing_ok=True)
+            if args.partition_by is not None:
+                for directory in partition_dirs(d, args.partition_by):
+                    clear_old_files(directory, args.file_name)
 
     # 5) Generate and output data
-    if args.files_count == 0:
+    if args.append:
+        _run_append(args, dataset, schema_model)
+
+    elif _sqlite_sink(args) is not None:
+        import sqlite3
+        logger.info("Entering sqlite mode (no files will be written)")
+        try:
+            _run_sqlite(args, schema_model)
+        except sqlite3.Error as e:
+            logger.error("Sink %s failed: %s", args.sink[0], e)
+            sys.exit(1)
+        logger.info("Completed %s", args.sink[0])
+
+    elif args.sink:
+        logger.info("Entering sink mode (no files will be written)")
+        _run_sinks(args, schema_model)
+
+    elif args.files_count == 0:
         logger.info("Entering stdout mode (no files will be written)")
-        gen = DataGenerator(schema_model)
-        for _ in range(args.data_lines):
-            rec = gen.generate_record()
-            print(json.dumps(rec))
+        gen = DataGenerator(schema_model, **_gen_options(args))
+        if args.rate is not None:
+            _stream_with_rate(gen, args)
+        else:
+            out = sys.stdout.buffer
+            out.write(gen.encode_header())
+            for buf in gen.iter_encoded(DEFAULT_WRITE_BATCH, args.data_lines):
+                out.write(buf)
+            out.flush()
+        gen.log_pool_stats("stdout")
 
-    elif args.files_count == 1:
-        path = _generate_one(
+    elif args.target_bytes or args.total_bytes:
+        _run_byte_budget(args, output_dirs, schema_model, dataset)
+
+    elif args.files_count == 1 and not args.add_files:
+        path, checksum = _generate_one(
             0,
             output_dir,
             args.file_name,
             args.file_prefix,
             args.data_lines,
             schema_model,
-            add_suffix=False
+            add_suffix=False,
+            gen_options=_gen_options(args),
+            partition_by=args.partition_by,
+            max_open_partitions=args.max_open_partitions
         )
         logger.info("Completed %s", path)
+        if dataset is not None:
+            dataset.record(path, args.data_lines, checksum=checksum)
+            dataset.next_index = max(dataset.next_index, 1)
 
     else:
-        with ProcessPoolExecutor(max_workers=args.multiprocessing) as executor:
-            futures = [
-                executor.submit(
-                    _generate_one,
-                    i,
-                    output_dir,
-                    args.file_name,
-                    args.file_prefix,
-                    args.data_lines,
-                    schema_model,
-                    add_suffix=True
-                )
-                for i in range(args.files_count)
-            ]
-
-            for future in as_completed(futures):
-                try:
-                    path = future.result()
-                    logger.info("Completed %s", path)
-                except Exception as e:
-                    logger.error("Worker failed to generate a file: %s", e)
+        _run_files(args, output_dirs, schema_model, dataset)
+
+    # 6) Record what was written for later --append / --add_files runs,
+    # and the manifest of the files' checksums
+    if dataset is not None:
+        dataset.save(output_dirs, args.file_name)
+        if args.checksum:
+            from magicgenerator.checksum import write_manifest
+            write_manifest(output_dirs, args.file_name, args.checksum,
+                           dataset.files, dataset.sums)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,102 @@
+import argparse
+import pytest
+from magicgenerator.budget import parse_size, ByteBudget
+from magicgenerator.parser import SchemaParser
+from magicgenerator.generator import DataGenerator
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("1048576", 1048576),
+    ("256MB", 256 * 1000 ** 2),
+    ("256MiB", 256 * 1024 ** 2),
+    ("1.5g", 1500 * 1000 ** 2),
+    ("10 kb", 10000),
+])
+def test_parse_size(raw, expected):
+    """
+    Sizes with and without units are converted to bytes.
+    """
+    assert parse_size(raw) == expected
+
+
+@pytest.mark.parametrize("raw", ["", "MB", "10XB", "0", "-1MB"])
+def test_parse_size_invalid(raw):
+    """
+    Malformed or zero sizes are rejected.
+    """
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_size(raw)
+
+
+def test_byte_budget_claims_and_refunds():
+    """
+    Claims hand out increasing indices and refunds are claimed again.
+    """
+    budget = ByteBudget(total=250, target=100)
+    assert budget.claim() == (0, 100)
+    assert budget.claim() == (1, 100)
+    budget.refund(10)
+    assert budget.claim() == (2, 60)
+    assert budget.claim() is None
+
+
+def test_byte_budget_refunds_add_no_files():
+    """
+    Refunds never make an extra file: ceil(total / target) at most.
+    """
+    budget = ByteBudget(total=400, target=100, first_index=3)
+    claims = []
+    while (claim := budget.claim()) is not None:
+        claims.append(claim)
+        budget.refund(5)
+    assert [i for i, _ in claims] == [3, 4, 5, 6]
+    assert all(size == 100 for _, size in claims)
+    assert budget.next_index == 7
+
+
+def test_write_jsonl_bytes_stays_within_budget(tmp_path):
+    """
+    The file holds only whole lines and never exceeds its budget.
+    """
+    model = SchemaParser.build_schema_model({"a": "str:rand"})
+    out = tmp_path / "out.jsonl"
+    lines, written = DataGenerator(model).write_jsonl_bytes(out, 100_000)
+    data = out.read_bytes()
+    assert written == len(data) <= 100_000
+    # uuid lines are all the same length, so less than one line is left
+    line_len = len(data.splitlines()[0]) + 1
+    assert 100_000 - written < line_len
+    assert data.count(b"\n") == lines
+    assert data.endswith(b"\n")
+
+
+def test_write_bytes_rejects_budget_below_header(tmp_path):
+    """
+    A csv file whose budget cannot hold the header is refused instead
+    of being written without one.
+    """
+    model = SchemaParser.build_schema_model({"long_column_name": "int:rand"})
+    gen = DataGenerator(model, "csv")
+    with pytest.raises(ValueError):
+        gen.write_jsonl_bytes(tmp_path / "out.csv", 5)
+    assert not (tmp_path / "out.csv").exists()
+
+
+def test_write_bytes_counts_records_with_newlines(tmp_path):
+    """
+    csv values holding newlines are counted as one record each, and the
+    file is cut at a record boundary.
+    """
+    import csv
+
+    model = SchemaParser.build_schema_model(
+        {"a": "str:[\"one\\nline\", \"x\"]", "b": "int:rand"}
+    )
+    out = tmp_path / "out.csv"
+    lines, written = DataGenerator(model, "csv").write_jsonl_bytes(out, 5000)
+    with open(out, newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["a", "b"]
+    assert lines == len(rows) - 1
+    assert all(len(r) == 2 and r[0] in {"one\nline", "x"} for r in rows[1:])
+    assert written == out.stat().st_size <= 5000
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import subprocess
+import sys
+import zlib
+from pathlib import Path
+import pytest
+from magicgenerator.parser import SchemaParser
+from magicgenerator.generator import DataGenerator
+from magicgenerator.checksum import Checksum, hash_file
+
+SCRIPT = Path(__file__).parent.parent / "main.py"
+SCHEMA = {"x": "int:rand(1,3)", "y": "str:[\"a\",\"b\"]"}
+
+
+def _reference(data: bytes, algorithm: str) -> str:
+    if algorithm == "crc32":
+        return f"{zlib.crc32(data):08x}"
+    return hashlib.new(algorithm, data).hexdigest()
+
+
+@pytest.fixture
+def model():
+    return SchemaParser.build_schema_model(SCHEMA)
+
+
+@pytest.mark.parametrize("algorithm", ["blake2b", "sha256", "crc32"])
+def test_checksum_in_pieces(algorithm):
+    """
+    Hashing a stream piece by piece gives the digest of the whole.
+    """
+    data = bytes(range(256)) * 1000
+    checksum = Checksum(algorithm)
+    for i in range(0, len(data), 7777):
+        checksum.update(data[i:i + 7777])
+    assert checksum.size == len(data)
+    assert checksum.hexdigest() == _reference(data, algorithm)
+
+
+def test_unknown_checksum():
+    """
+    Unsupported algorithms are rejected.
+    """
+    with pytest.raises(ValueError):
+        Checksum("md5")
+
+
+@pytest.mark.parametrize("output_format", ["jsonl", "csv"])
+def test_write_file_checksum(tmp_path, model, output_format):
+    """
+    The digest computed while writing matches the file on disk,
+    header included, also after appending.
+    """
+    out = tmp_path / "data.out"
+    gen = DataGenerator(model, output_format, checksum="sha256")
+    gen.write_jsonl_file(out, data_lines=2500)
+    s = gen.last_sum
+    assert (s.path, s.size, s.algorithm) == (out, out.stat().st_size, "sha256")
+    assert s.digest == _reference(out.read_bytes(), "sha256")
+
+    gen.write_jsonl_file(out, data_lines=10, append=True)
+    assert gen.last_sum.digest == _reference(out.read_bytes(), "sha256")
+    assert hash_file(out, "sha256").hexdigest() == gen.last_sum.digest
+
+
+def test_write_bytes_checksum(tmp_path, model):
+    """
+    Byte-budgeted files are hashed as well.
+    """
+    out = tmp_path / "data.jsonl"
+    gen = DataGenerator(model, checksum="crc32")
+    lines, written = gen.write_jsonl_bytes(out, 10_000)
+    assert gen.last_sum.size == written
+    assert gen.last_sum.digest == _reference(out.read_bytes(), "crc32")
+
+
+def test_no_checksum_by_default(tmp_path, model):
+    """
+    Without a checksum nothing is hashed.
+    """
+    gen = DataGenerator(model)
+    gen.write_jsonl_file(tmp_path / "data.jsonl", data_lines=5)
+    assert gen.last_sum is None
+
+
+def test_manifest_cli(tmp_path):
+    """
+    --checksum writes a manifest entry per file; entries of files a
+    later run does not touch are kept, grown files get new digests.
+    """
+    base = [sys.executable, str(SCRIPT), str(tmp_path),
+            "--data_schema", json.dumps(SCHEMA), "--checksum", "blake2b",
+            "--no_log_file"]
+
+    def run(*extra):
+        result = subprocess.run(base + list(extra),
+                                capture_output=True, text=True)
+        assert result.returncode == 0, f"Stderr:\n{result.stderr}"
+
+    def manifest():
+        path = tmp_path / "data.manifest.jsonl"
+        return {e["path"]: e for e in map(json.loads, path.open())}
+
+    run("--files_count", "2", "--data_lines", "30", "--multiprocessing", "2")
+    run("--add_files", "--files_count", "1", "--data_lines", "5")
+    entries = manifest()
+    assert sorted(entries) == ["data_1.jsonl", "data_2.jsonl", "data_3.jsonl"]
+    for name, e in entries.items():
+        data = (tmp_path / name).read_bytes()
+        assert e["size"] == len(data)
+        assert e["lines"] == data.count(b"\n")
+        assert (e["algorithm"], e["digest"]) == \
+            ("blake2b", _reference(data, "blake2b"))
+
+    run("--append", "--data_lines", "3")
+    for name, e in manifest().items():
+        data = (tmp_path / name).read_bytes()
+        assert e["digest"] == _reference(data, "blake2b")
+        assert e["lines"] == data.count(b"\n")
@@ -0,0 +1,173 @@
+import ast
+import json
+import subprocess
+import sys
+from array import array
+from pathlib import Path
+import pytest
+from magicgenerator.parser import SchemaParser
+from magicgenerator.generator import DataGenerator
+from magicgenerator.columnar import LAYOUT_NAME, npy_header, write_columns
+from magicgenerator.utils import clear_old_files
+
+SCRIPT = Path(__file__).parent.parent / "main.py"
+SCHEMA = {
+    "id": "str:rand",
+    "n": "int:rand(1,5)",
+    "c": "str:[\"a\",\"bcd\"]",
+    "k": "int:7",
+    "e": "int:",
+    "ts": "timestamp:",
+    "z": "int:zipf(1.5,10)",
+    "user": {"age": "int:rand(18,60)"},
+    "tags": "array:rand(0,3):int:[1,2]",
+}
+
+
+def read_npy(path: Path):
+    """(descr, shape, raw data) of a .npy file, checking the header."""
+    raw = path.read_bytes()
+    assert raw[:8] == b"\x93NUMPY\x01\x00"
+    length = int.from_bytes(raw[8:10], "little")
+    assert (10 + length) % 64 == 0
+    header = ast.literal_eval(raw[10:10 + length].decode("latin1"))
+    assert header["fortran_order"] is False
+    return header["descr"], header["shape"], raw[10 + length:]
+
+
+def values(path: Path, typecode: str) -> list:
+    descr, shape, data = read_npy(path)
+    a = array(typecode)
+    a.frombytes(data)
+    if descr[0] != ("<" if sys.byteorder == "little" else ">") \
+            and descr[0] != "|":
+        a.byteswap()
+    assert len(a) == shape[0]
+    return a.tolist()
+
+
+@pytest.fixture
+def columns(tmp_path):
+    model = SchemaParser.build_schema_model(SCHEMA)
+    out = tmp_path / "data_1.columns"
+    # Batches smaller than the row count, so columns are appended to
+    write_columns(model, out, 250, 100)
+    return out
+
+
+def test_npy_header_is_fixed_size():
+    """
+    The header is always 128 bytes, whatever the shape.
+    """
+    assert len(npy_header("<i8", (0,))) == 128
+    assert len(npy_header("<i8", (10 ** 15,))) == 128
+
+
+def test_layout(columns):
+    """
+    columns.json lists every flattened column with its files; null
+    columns have none and count their rows as nulls instead.
+    """
+    layout = json.loads((columns / LAYOUT_NAME).read_text())
+    assert layout["rows"] == 250
+    kinds = {c["name"]: c["kind"] for c in layout["columns"]}
+    assert kinds == {
+        "id": "fixed", "n": "int64", "c": "dictionary", "k": "int64",
+        "e": "null", "ts": "float64", "z": "int64", "user.age": "int64",
+        "tags": "json",
+    }
+    for c in layout["columns"]:
+        for name in c["files"]:
+            assert (columns / name).is_file()
+    [null] = [c for c in layout["columns"] if c["kind"] == "null"]
+    assert (null["files"], null["null_count"]) == ([], 250)
+
+
+def test_int_columns(columns):
+    """
+    int fields are int64 columns within the field rules.
+    """
+    assert read_npy(columns / "n.npy")[:2] == (
+        ("<" if sys.byteorder == "little" else ">") + "i8", (250,)
+    )
+    assert set(values(columns / "n.npy", "q")) <= {1, 2, 3, 4, 5}
+    assert values(columns / "k.npy", "q") == [7] * 250
+    assert all(1 <= v <= 10 for v in values(columns / "z.npy", "q"))
+    assert all(18 <= v <= 60 for v in values(columns / "user.age.npy", "q"))
+
+
+def test_dictionary_column(columns):
+    """
+    str choices are uint8 codes into a fixed-width unicode dictionary.
+    """
+    codes = values(columns / "c.npy", "B")
+    assert len(codes) == 250 and set(codes) == {0, 1}
+    descr, shape, data = read_npy(columns / "c.dict.npy")
+    assert descr[1:] == "U3" and shape == (2,)
+    encoding = "utf-32-le" if descr[0] == "<" else "utf-32-be"
+    assert data.decode(encoding) == "a\0\0bcd"
+
+
+def test_fixed_and_float_columns(columns):
+    """
+    uuids are 36-byte strings and timestamps float64 seconds.
+    """
+    descr, shape, data = read_npy(columns / "id.npy")
+    assert (descr, shape, len(data)) == ("|S36", (250,), 250 * 36)
+    assert data[8:9] == b"-"
+    ts = values(columns / "ts.npy", "d")
+    assert len(ts) == 250 and min(ts) > 1e9
+
+
+def test_json_column(columns):
+    """
+    Arrays are offset-packed JSON text.
+    """
+    offsets = values(columns / "tags.offsets.npy", "q")
+    _, _, data = read_npy(columns / "tags.data.npy")
+    assert len(offsets) == 251 and offsets[0] == 0
+    assert offsets[-1] == len(data)
+    for a, b in zip(offsets, offsets[1:]):
+        tags = json.loads(data[a:b])
+        assert len(tags) <= 3 and set(tags) <= {1, 2}
+
+
+def test_npy_has_no_line_encoding():
+    """
+    npy output cannot be encoded as lines (stdout, sinks).
+    """
+    gen = DataGenerator(SchemaParser.build_schema_model(SCHEMA), "npy")
+    with pytest.raises(ValueError):
+        gen.encode_batch(1)
+
+
+def test_clear_old_files_removes_column_dirs(columns):
+    """
+    Old columnar outputs are removed along with plain files.
+    """
+    (columns.parent / "other.txt").write_text("keep")
+    clear_old_files(columns.parent, "data")
+    assert [p.name for p in columns.parent.iterdir()] == ["other.txt"]
+
+
+def test_npy_cli(tmp_path):
+    """
+    --format npy writes one .columns directory per file and records
+    them in the dataset metadata; stdout mode is refused.
+    """
+    schema = json.dumps({"x": "int:rand(1,3)", "y": "str:[\"p\",\"q\"]"})
+    base = [sys.executable, str(SCRIPT), str(tmp_path),
+            "--format", "npy", "--data_schema", schema,
+            "--file_name", "cols", "--data_lines", "40", "--no_log_file"]
+    result = subprocess.run(base + ["--files_count", "2"],
+                            capture_output=True, text=True)
+    assert result.returncode == 0, f"Stderr:\n{result.stderr}"
+    dirs = sorted(p.name for p in tmp_path.glob("*.columns"))
+    assert dirs == ["cols_1.columns", "cols_2.columns"]
+    assert read_npy(tmp_path / "cols_1.columns" / "x.npy")[1] == (40,)
+    meta = json.loads((tmp_path / ".cols.meta.json").read_text())
+    assert meta["files"] == {"cols_1.columns": 40, "cols_2.columns": 40}
+
+    result = subprocess.run(base + ["--files_count", "0"],
+                            capture_output=True, text=True)
+    assert result.returncode == 1
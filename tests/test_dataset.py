@@ -0,0 +1,60 @@
+import json
+import pytest
+from magicgenerator.dataset import Dataset, load_dataset, metadata_path
+
+
+def test_save_and_load_across_dirs(tmp_path):
+    """
+    Each directory lists its own files; loading merges them back.
+    """
+    dirs = [tmp_path / "a", tmp_path / "b"]
+    for d in dirs:
+        d.mkdir()
+    ds = Dataset("abc", "jsonl", next_index=3)
+    ds.record(dirs[0] / "data_1.jsonl", 10)
+    ds.record(dirs[1] / "data_2.jsonl", 10)
+    ds.record(dirs[0] / "data_3.jsonl", 10)
+    ds.record(dirs[0] / "data_1.jsonl", 5, append=True)
+    ds.save(dirs, "data")
+
+    meta = json.loads(metadata_path(dirs[1], "data").read_text())
+    assert meta["files"] == {"data_2.jsonl": 10}
+    assert not list(tmp_path.rglob("*.tmp"))
+
+    loaded = load_dataset(dirs, "data")
+    assert loaded == ds
+    assert loaded.total_lines == 35
+    assert load_dataset(dirs, "other") is None
+
+
+def test_load_rejects_mixed_or_broken_metadata(tmp_path):
+    """
+    Directories of different schemas, or unreadable metadata, raise.
+    """
+    dirs = [tmp_path / "a", tmp_path / "b"]
+    for d in dirs:
+        d.mkdir()
+    Dataset("one", "jsonl").save(dirs[:1], "data")
+    Dataset("two", "jsonl").save(dirs[1:], "data")
+    with pytest.raises(ValueError, match="different schema"):
+        load_dataset(dirs, "data")
+
+    metadata_path(dirs[1], "data").write_text("{not json")
+    with pytest.raises(ValueError, match="unreadable"):
+        load_dataset(dirs, "data")
+
+
+def test_metadata_is_readable_like_data_files(tmp_path):
+    """
+    The metadata file gets the umask-derived mode of a normal new file,
+    not the private 0600 of its temporary file.
+    """
+    import os
+
+    data = tmp_path / "data.jsonl"
+    data.write_text("{}\n")
+    ds = Dataset("abc", "jsonl")
+    ds.record(data, 1)
+    ds.save([tmp_path], "data")
+    mode = os.stat(metadata_path(tmp_path, "data")).st_mode & 0o777
+    assert mode == os.stat(data).st_mode & 0o777
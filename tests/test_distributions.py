@@ -0,0 +1,111 @@
+import pickle
+from collections import Counter
+import pytest
+from magicgenerator.distributions import (
+    build_sampler,
+    Sampler,
+    ZipfSampler,
+    SAMPLE_BATCH,
+    ZIPF_TABLE_MAX
+)
+from magicgenerator.parser import SchemaParser
+from magicgenerator.generator import DataGenerator
+
+
+def test_zipf_bounded_and_skewed():
+    """
+    Zipf values stay in 1..max and smaller ranks are more frequent.
+    """
+    sampler = ZipfSampler(1.2, 50)
+    counts = Counter(sampler.draw(20000))
+    assert min(counts) >= 1 and max(counts) <= 50
+    assert counts[1] > counts[2] > counts[10]
+
+
+@pytest.mark.parametrize("s", [0.8, 1.0, 1.2])
+def test_zipf_wide_range_needs_no_table(s):
+    """
+    Wide ranges are sampled without a CDF table, with the same
+    distribution as the tabulated sampler.
+    """
+    wide = ZipfSampler(s, ZIPF_TABLE_MAX + 1)
+    assert wide._cdf is None
+    table = ZipfSampler(s, ZIPF_TABLE_MAX)
+    n = 40000
+    a, b = Counter(wide.draw(n)), Counter(table.draw(n))
+    assert min(a) >= 1 and max(a) <= ZIPF_TABLE_MAX + 1
+    for k in (1, 2, 3):
+        assert a[k] / n == pytest.approx(b[k] / n, abs=0.02)
+
+
+def test_zipf_huge_range_is_cheap():
+    """
+    zipf over a billion values starts immediately (no 8 GB table).
+    """
+    sampler = build_sampler("zipf", [1.2, 1e9])
+    values = sampler.draw(1000)
+    assert 1 <= min(values) and max(values) <= 10 ** 9
+
+
+def test_normal_mean_and_ints():
+    """
+    Normal draws are ints centred on mu.
+    """
+    values = build_sampler("normal", [100, 5]).draw(20000)
+    assert all(isinstance(v, int) for v in values)
+    assert sum(values) / len(values) == pytest.approx(100, abs=0.5)
+
+
+def test_exp_non_negative():
+    """
+    Exponential draws are non-negative ints.
+    """
+    values = build_sampler("exp", [0.1]).draw(5000)
+    assert min(values) >= 0
+    assert sum(values) / len(values) == pytest.approx(9.5, rel=0.1)
+
+
+def test_sampler_buffers_in_batches():
+    """
+    Calling the sampler refills its buffer one batch at a time, and the
+    buffer is not carried over when pickled for a worker.
+    """
+    sampler = build_sampler("lognormal", [2, 0.5])
+    sampler()
+    assert len(sampler._buf) == SAMPLE_BATCH - 1
+    assert pickle.loads(pickle.dumps(sampler))._buf == []
+
+
+def test_sampler_requires_draw():
+    """
+    A sampler without a draw() implementation cannot be created.
+    """
+    class NoDraw(Sampler):
+        pass
+
+    with pytest.raises(TypeError):
+        NoDraw()
+
+
+def test_generator_uses_distribution():
+    """
+    Records draw int fields from their distribution.
+    """
+    model = SchemaParser.build_schema_model({"key": "int:zipf(1.5, 10)"})
+    gen = DataGenerator(model)
+    assert all(1 <= r["key"] <= 10 for r in gen.iter_records(500))
+
+
+@pytest.mark.parametrize("spec", [
+    "int:normal(0, nan)", "int:normal(nan, 1)", "int:normal(0, inf)",
+    "int:lognormal(inf, 1)", "int:exp(inf)", "int:exp(nan)",
+    "int:zipf(nan, 10)", "int:zipf(1.2, inf)", "int:zipf(1.2, 1e400)",
+    "int:zipf(1.2, 1e19)",
+])
+def test_non_finite_parameters_rejected(spec):
+    """
+    nan, inf and out-of-range parameters are schema errors, not
+    failures during generation.
+    """
+    with pytest.raises(SystemExit):
+        SchemaParser.build_schema_model({"v": spec})
@@ -0,0 +1,83 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+from magicgenerator.estimate import best_workers, estimate_job, format_size
+from magicgenerator.generator import DataGenerator
+from magicgenerator.parser import SchemaParser
+
+SCRIPT = Path(__file__).parent.parent / "main.py"
+
+
+def _gen(output_format="jsonl"):
+    model = SchemaParser.build_schema_model(
+        {"x": "int:[7]", "y": 'str:["ab"]'}
+    )
+    return DataGenerator(model, output_format)
+
+
+@pytest.mark.parametrize("files, cpus, expected", [
+    (1, 8, 1),
+    (4, 8, 4),
+    (10, 8, 5),
+    (16, 8, 8),
+    (17, 8, 6),
+])
+def test_best_workers(files, cpus, expected):
+    """
+    Picks the fewest workers that still finish in the fewest rounds.
+    """
+    assert best_workers(files, cpus) == expected
+
+
+def test_format_size():
+    """
+    Sizes are shown in decimal units.
+    """
+    assert format_size(999) == "999 B"
+    assert format_size(1_500_000) == "1.50 MB"
+    assert format_size(3 * 1000 ** 5) == "3000.00 TB"
+
+
+def test_estimate_files():
+    """
+    Constant records give an exact byte projection for files × lines.
+    """
+    line = len(json.dumps({"x": 7, "y": "ab"})) + 1
+    est = estimate_job(_gen(), files=10, data_lines=100, cpus=8, sample=500)
+    assert est.records == 1000
+    assert est.bytes_per_record == line
+    assert est.total_bytes == 1000 * line
+    assert est.workers == 5
+    assert est.seconds > 0
+
+
+def test_estimate_byte_budget_counts_headers():
+    """
+    Byte budgets determine the file count; headers take part of each file.
+    """
+    gen = _gen("csv")
+    est = estimate_job(gen, files=1, data_lines=0, total_bytes=10_000,
+                       target_bytes=1_000, cpus=1, sample=500)
+    assert est.files == 10
+    assert est.workers == 1
+    line = len(gen.encode_batch(1))
+    assert est.records == (10_000 - 10 * len(gen.encode_header())) // line
+
+
+def test_cli_estimate_writes_nothing(tmp_path):
+    """
+    --estimate reports the projection and creates no data files.
+    """
+    cmd = [
+        sys.executable, str(SCRIPT), str(tmp_path),
+        "--files_count", "3",
+        "--data_lines", "100",
+        "--estimate",
+        "--no_log_file"
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    assert result.returncode == 0, f"Stderr:\n{result.stderr}"
+    assert "Estimate: 3 file(s), 300 records" in result.stderr
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,129 @@
+import json
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+import pytest
+from magicgenerator.fanout import FanOut
+from magicgenerator.sinks import Sink, SinkSpec
+
+SCRIPT = Path(__file__).parent.parent / "main.py"
+
+
+class MemorySink(Sink):
+    """Collects batches; writes wait for `gate` and may fail."""
+
+    def __init__(self, name, gate=None, fail_after=None):
+        self.spec = SinkSpec("file", name)
+        self.gate = gate
+        self.fail_after = fail_after
+        self.batches = []
+
+    def write(self, buf):
+        if self.gate is not None:
+            self.gate.wait()
+        if self.fail_after is not None \
+                and len(self.batches) >= self.fail_after:
+            raise OSError("peer went away")
+        self.batches.append(buf)
+
+    def close(self):
+        pass
+
+
+def _batches(n):
+    return [b"%d\n" % i * 10 for i in range(n)]
+
+
+def _feed(fan, sink, batches):
+    """Write batches, letting `sink` keep up (a fast consumer)."""
+    for k, buf in enumerate(batches, 1):
+        fan.write(buf)
+        deadline = time.monotonic() + 5
+        while len(sink.batches) < k and time.monotonic() < deadline:
+            time.sleep(0.0005)
+
+
+def test_every_sink_gets_every_batch():
+    """
+    With the block policy all sinks receive all batches, in order.
+    """
+    sinks = [MemorySink("a"), MemorySink("b")]
+    fan = FanOut(sinks, "block", max_buffer=2)
+    for buf in _batches(200):
+        fan.write(buf)
+    fan.close()
+    assert sinks[0].batches == sinks[1].batches == _batches(200)
+    assert not fan.failed
+
+
+def test_drop_policy_keeps_fast_sinks_going():
+    """
+    A stalled sink drops whole batches; the fast one gets everything.
+    """
+    gate = threading.Event()
+    fast, slow = MemorySink("fast"), MemorySink("slow", gate)
+    fan = FanOut([fast, slow], "drop", max_buffer=4)
+    _feed(fan, fast, _batches(100))
+    gate.set()
+    fan.close()
+    assert fast.batches == _batches(100)
+    assert 4 <= len(slow.batches) <= 5
+    assert all(b in _batches(100) for b in slow.batches)
+
+
+def test_spill_policy_replays_in_order(tmp_path, monkeypatch):
+    """
+    A stalled sink spills to disk and later receives everything in order.
+    """
+    monkeypatch.setattr("magicgenerator.fanout.SPILL_READ", 64)
+    gate = threading.Event()
+    fast, slow = MemorySink("fast"), MemorySink("slow", gate)
+    fan = FanOut([fast, slow], "spill", max_buffer=3, spill_dir=str(tmp_path))
+    _feed(fan, fast, _batches(100))
+    assert fast.batches == _batches(100)
+    gate.set()
+    fan.close()
+    assert fast.batches == _batches(100)
+    assert b"".join(slow.batches) == b"".join(_batches(100))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_failed_sink_is_dropped():
+    """
+    A failing sink stops receiving; the others continue. Once every
+    sink failed, writing raises.
+    """
+    ok, bad = MemorySink("ok"), MemorySink("bad", fail_after=3)
+    fan = FanOut([ok, bad], "block", max_buffer=1)
+    for buf in _batches(50):
+        fan.write(buf)
+    fan.close()
+    assert ok.batches == _batches(50)
+    assert [s for s, _ in fan.failed] == [bad]
+
+    fan = FanOut([MemorySink("bad", fail_after=0)], "block", max_buffer=1)
+    with pytest.raises(OSError):
+        for buf in _batches(50):
+            fan.write(buf)
+    fan.close()
+
+
+def test_cli_fans_out_to_files_and_stdout(tmp_path):
+    """
+    Repeated --sink options all receive the same generated records.
+    """
+    a, b = tmp_path / "a.jsonl", tmp_path / "b.jsonl"
+    cmd = [
+        sys.executable, str(SCRIPT),
+        "--sink", f"file:{a}", "--sink", f"file:{b}", "--sink", "stdout",
+        "--data_lines", "2500", "--sink_batch", "100",
+        "--data_schema", '{"id": "str:rand"}', "--no_log_file"
+    ]
+    result = subprocess.run(cmd, capture_output=True)
+    assert result.returncode == 0, result.stderr
+    assert a.read_bytes() == b.read_bytes() == result.stdout
+    lines = result.stdout.splitlines()
+    assert len(lines) == 2500
+    assert len({json.loads(line)["id"] for line in lines}) == 2500
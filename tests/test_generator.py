@@ -1,4 +1,9 @@
+import csv
 import json
+import os
+import subprocess
+import sys
+from pathlib import Path
 import pytest
 from magicgenerator.parser import SchemaParser
 from magicgenerator.generator import DataGenerator
@@ -50,3 +55,206 @@ def test_write_jsonl_file_creates_and_content(tmp_path, simple_schema_model):
         assert dt["b"] in {"x", "y"}
         assert isinstance(dt["c"], str)
         float(dt["c"])
+
+
+def test_iter_records_and_batches(simple_schema_model):
+    """
+    Iterators honour the requested count and batch sizes.
+    """
+    gen = DataGenerator(simple_schema_model)
+    recs = list(gen.iter_records(3))
+    assert len(recs) == 3
+    assert all(set(r) == {"a", "b", "c"} for r in recs)
+
+    sizes = [len(b) for b in gen.iter_batches(4, count=10)]
+    assert sizes == [4, 4, 2]
+
+    endless = gen.iter_records()
+    assert all(next(endless)["b"] in {"x", "y"} for _ in range(50))
+
+
+def test_iter_encoded(simple_schema_model):
+    """
+    Encoded chunks are complete JSON lines, `size` records each.
+    """
+    gen = DataGenerator(simple_schema_model)
+    chunks = list(gen.iter_encoded(3, count=7))
+    assert all(isinstance(c, bytes) for c in chunks)
+    assert [c.count(b"\n") for c in chunks] == [3, 3, 1]
+    for line in b"".join(chunks).splitlines():
+        assert json.loads(line)["a"] in {0, 1, 2}
+
+
+@pytest.mark.parametrize("size", [0, -1])
+def test_batch_size_must_be_positive(simple_schema_model, size):
+    """
+    A batch size below 1 is an error instead of an endless stream of
+    empty batches.
+    """
+    gen = DataGenerator(simple_schema_model)
+    with pytest.raises(ValueError):
+        next(gen.iter_encoded(size, count=5))
+    with pytest.raises(ValueError):
+        next(gen.iter_batches(size))
+
+
+def test_library_use_has_no_side_effects(tmp_path):
+    """
+    Importing the package and generating in-process creates no files.
+    """
+    code = (
+        "from magicgenerator import DataGenerator, SchemaParser\n"
+        "raw = SchemaParser.load_schema('{\"a\": \"int:rand\"}')\n"
+        "gen = DataGenerator(SchemaParser.build_schema_model(raw))\n"
+        "print(len(b''.join(gen.iter_encoded(10, count=25)).splitlines()))\n"
+    )
+    root = Path(__file__).parent.parent
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=tmp_path, capture_output=True,
+        text=True, env={**os.environ, "PYTHONPATH": str(root)}
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "25"
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize("fmt, delimiter", [("csv", ","), ("tsv", "\t")])
+def test_write_delimited_file(tmp_path, simple_schema_model, fmt, delimiter):
+    """
+    csv/tsv files start with a header in schema order, one row per record.
+    """
+    gen = DataGenerator(simple_schema_model, fmt)
+    out = tmp_path / f"out{gen.extension}"
+    gen.write_jsonl_file(out, data_lines=5)
+
+    with out.open(newline="") as f:
+        rows = list(csv.reader(f, delimiter=delimiter))
+    assert rows[0] == ["a", "b", "c"]
+    assert len(rows) == 6
+    for a, b, c in rows[1:]:
+        assert int(a) in {0, 1, 2}
+        assert b in {"x", "y"}
+        float(c)
+
+
+@pytest.mark.parametrize("write_mode", ["buffered", "dontneed"])
+def test_write_file_append(tmp_path, simple_schema_model, write_mode):
+    """
+    Appending keeps the existing rows and writes the header only once.
+    """
+    gen = DataGenerator(simple_schema_model, "csv", write_mode=write_mode)
+    out = tmp_path / "out.csv"
+    gen.write_jsonl_file(out, data_lines=3, append=True)
+    first = out.read_text()
+    gen.write_jsonl_file(out, data_lines=2, append=True)
+
+    text = out.read_text()
+    assert text.startswith(first)
+    assert text.splitlines()[0] == "a,b,c"
+    assert len(text.splitlines()) == 6
+
+
+def test_unknown_format(simple_schema_model):
+    """
+    Unknown output formats are rejected.
+    """
+    with pytest.raises(ValueError):
+        DataGenerator(simple_schema_model, "xml")
+
+
+def test_pool_replays_encoded_lines(simple_schema_model):
+    """
+    Replay mode only emits pooled lines and reports duplicates.
+    """
+    gen = DataGenerator(simple_schema_model, pool_size=5)
+    lines = gen.encode_batch(200).splitlines()
+    assert len(lines) == 200
+    assert len(set(lines)) <= 5
+    emitted, distinct, ratio = gen.pool_stats()
+    assert emitted == 200
+    assert distinct == len(set(lines))
+    assert ratio == pytest.approx(1 - distinct / 200)
+
+
+@pytest.mark.parametrize("fmt", ["jsonl", "csv"])
+def test_pool_patches_fields(fmt):
+    """
+    Patched fields are regenerated per line, the rest is replayed.
+    """
+    model = SchemaParser.build_schema_model({
+        "id": "str:rand", "seq": "int:rand(0,1000000)", "tag": "str:x"
+    })
+    gen = DataGenerator(model, fmt, pool_size=1, pool_patch=["seq"])
+    text = gen.encode_batch(50).decode()
+    if fmt == "jsonl":
+        rows = [json.loads(line) for line in text.splitlines()]
+    else:
+        rows = [dict(zip(model, r)) for r in csv.reader(text.splitlines())]
+    assert len({r["id"] for r in rows}) == 1
+    assert len({r["seq"] for r in rows}) > 1
+    assert all(r["tag"] == "x" for r in rows)
+
+
+def test_pool_patch_unknown_field(simple_schema_model):
+    """
+    Patching a field that is not in the schema is rejected.
+    """
+    with pytest.raises(ValueError):
+        DataGenerator(simple_schema_model, pool_size=3, pool_patch=["nope"])
+
+
+NESTED = {
+    "user": {"id": "int:rand(1,9)", "name": "str:[\"a\",\"b\"]",
+             "geo": {"cc": "str:DE", "none": "int:"}},
+    "tags": "array:rand(0,3):int:zipf(1.5,10)",
+    "items": "array:2:{\"sku\": \"str:rand\", \"ts\": \"timestamp:\"}",
+    "grid": "array:2:array:rand(1,2):int:rand",
+}
+
+
+def test_nested_json_lines():
+    """
+    The compiled serializer writes exactly what json.dumps would.
+    """
+    gen = DataGenerator(SchemaParser.build_schema_model(NESTED))
+    for line in gen.encode_batch(200).decode().splitlines():
+        record = json.loads(line)
+        assert json.dumps(record) == line
+        assert set(record) == set(NESTED)
+        assert record["user"]["geo"] == {"cc": "DE", "none": None}
+        assert 1 <= record["user"]["id"] <= 9
+        assert 0 <= len(record["tags"]) <= 3
+        assert all(1 <= t <= 10 for t in record["tags"])
+        assert len(record["items"]) == 2
+        assert all(1 <= len(row) <= 2 for row in record["grid"])
+    record = gen.generate_record()
+    assert record["user"]["name"] in {"a", "b"}
+    assert isinstance(record["items"][0]["sku"], str)
+
+
+def test_nested_delimited_columns():
+    """
+    csv flattens objects into dotted columns and stores arrays as JSON.
+    """
+    gen = DataGenerator(SchemaParser.build_schema_model(NESTED), "csv")
+    header, *rows = csv.reader(
+        (gen.encode_header() + gen.encode_batch(20)).decode().splitlines()
+    )
+    assert header == ["user.id", "user.name", "user.geo.cc", "user.geo.none",
+                      "tags", "items", "grid"]
+    for row in rows:
+        assert row[2] == "DE"
+        assert len(json.loads(row[5])) == 2
+
+
+def test_pool_patches_nested_column():
+    """
+    In csv, a nested member can be patched by its column name.
+    """
+    model = SchemaParser.build_schema_model(NESTED)
+    gen = DataGenerator(model, "csv", pool_size=1, pool_patch=["user.id"])
+    rows = list(csv.reader(gen.encode_batch(100).decode().splitlines()))
+    assert len({r[0] for r in rows}) > 1
+    assert len({r[4] for r in rows}) == 1
+    with pytest.raises(ValueError):
+        DataGenerator(model, "jsonl", pool_size=1, pool_patch=["user.id"])
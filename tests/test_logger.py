@@ -0,0 +1,75 @@
+from concurrent.futures import ProcessPoolExecutor
+from magicgenerator.logger import (
+    get_logger,
+    configure_logging,
+    shutdown_logging,
+    get_log_level,
+    create_worker_log_queue,
+    stop_worker_log_queue,
+    init_worker_logging
+)
+
+
+def _log_from_worker(msg):
+    get_logger("magicgenerator.test_worker").warning(msg)
+    return msg
+
+
+def test_configure_level_and_file(tmp_path):
+    """
+    Records below the configured level are dropped,
+    the rest reach the log file through the listener.
+    """
+    log_file = tmp_path / "run.log"
+    configure_logging("WARNING", str(log_file))
+    logger = get_logger("magicgenerator.test_level")
+    logger.info("hidden message")
+    logger.warning("visible message")
+    shutdown_logging()
+
+    text = log_file.read_text()
+    assert "visible message" in text
+    assert "hidden message" not in text
+    configure_logging("INFO", None)
+
+
+def test_disable_log_file(tmp_path, monkeypatch):
+    """
+    With no log file only stderr is used and no file is created.
+    """
+    monkeypatch.chdir(tmp_path)
+    configure_logging("INFO", None)
+    get_logger("magicgenerator.test_nofile").info("stderr only")
+    shutdown_logging()
+    assert list(tmp_path.iterdir()) == []
+    configure_logging("INFO", None)
+
+
+def test_worker_records_reach_parent_listener(tmp_path):
+    """
+    Pool workers send records to the parent's single listener: main
+    and worker records share one queue and land in the file once.
+    """
+    log_file = tmp_path / "workers.log"
+    configure_logging("INFO", str(log_file))
+    q = create_worker_log_queue()
+    assert create_worker_log_queue() is q
+    try:
+        with ProcessPoolExecutor(
+                max_workers=2,
+                initializer=init_worker_logging,
+                initargs=(q, get_log_level())
+        ) as executor:
+            list(executor.map(_log_from_worker,
+                              ["from worker 1", "from worker 2"]))
+        get_logger("magicgenerator.test_main").warning("from main")
+    finally:
+        stop_worker_log_queue(q)
+        stop_worker_log_queue(q)
+    get_logger("magicgenerator.test_main").warning("after pool")
+    shutdown_logging()
+
+    text = log_file.read_text()
+    for msg in ["from worker 1", "from worker 2", "from main", "after pool"]:
+        assert text.count(msg) == 1
+    configure_logging("INFO", None)
@@ -2,6 +2,7 @@ import json
 import subprocess
 import sys
 from pathlib import Path
+from magicgenerator.dataset import metadata_path
 
 SCRIPT = Path(__file__).parent.parent / "main.py"
 SCHEMA = json.dumps({"x": "int:rand(1,3)", "y": "str:[\"a\",\"b\"]"})
@@ -17,12 +18,14 @@ def test_multiprocess_creates_correct_number(tmp_path):
         "--multiprocessing", "2",
         "--data_schema", SCHEMA,
         "--file_name", "testfile",
-        "--data_lines", "2"
+        "--data_lines", "2",
+        "--no_log_file"
     ]
     result = subprocess.run(cmd, capture_output=True, text=True)
     assert result.returncode == 0, f"Stderr:\n{result.stderr}"
 
     files = list(tmp_path.iterdir())
+    files.remove(metadata_path(tmp_path, "testfile"))
     assert len(files) == 4
 
     for f in files:
@@ -43,7 +46,8 @@ def test_stdout_mode(tmp_path):
         sys.executable, str(SCRIPT), str(tmp_path),
         "--files_count", "0",
         "--data_schema", SCHEMA,
-        "--data_lines", str(data_lines)
+        "--data_lines", str(data_lines),
+        "--no_log_file"
     ]
     result = subprocess.run(cmd, capture_output=True, text=True)
     assert result.returncode == 0, f"Stderr:\n{result.stderr}"
@@ -56,3 +60,153 @@ def test_stdout_mode(tmp_path):
     for line in lines:
         d = json.loads(line)
         assert set(d.keys()) == {"x", "y"}
+
+
+def test_total_bytes_rollover(tmp_path):
+    """
+    Files roll over at --target_bytes and the job writes --total_bytes
+    to within one line.
+    """
+    cmd = [
+        sys.executable, str(SCRIPT), str(tmp_path),
+        "--multiprocessing", "2",
+        "--data_schema", SCHEMA,
+        "--file_name", "sized",
+        "--target_bytes", "2000",
+        "--total_bytes", "9000",
+        "--no_log_file"
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    assert result.returncode == 0, f"Stderr:\n{result.stderr}"
+
+    files = sorted(tmp_path.glob("*.jsonl"),
+                   key=lambda f: int(f.stem.split("_")[1]))
+    sizes = [f.stat().st_size for f in files]
+    assert [f.name for f in files] == [f"sized_{i}.jsonl" for i in range(1, 6)]
+    assert all(size <= 2000 for size in sizes)
+    line_len = max(len(line) + 1 for f in files
+                   for line in f.read_bytes().splitlines())
+    # Every file but the last is filled to within one line
+    assert all(2000 - line_len < size for size in sizes[:-1])
+    assert sum(sizes) <= 9000
+
+
+def test_csv_format(tmp_path):
+    """
+    --format csv writes .csv files with a header row.
+    """
+    cmd = [
+        sys.executable, str(SCRIPT), str(tmp_path),
+        "--files_count", "2",
+        "--format", "csv",
+        "--data_schema", SCHEMA,
+        "--file_name", "rows",
+        "--data_lines", "3",
+        "--no_log_file"
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    assert result.returncode == 0, f"Stderr:\n{result.stderr}"
+
+    files = sorted(tmp_path.glob("*.csv"))
+    assert [f.name for f in files] == ["rows_1.csv", "rows_2.csv"]
+    for f in files:
+        lines = f.read_text().splitlines()
+        assert lines[0] == "x,y"
+        assert len(lines) == 4
+
+
+def test_multiple_output_dirs(tmp_path):
+    """
+    Spreads files round-robin over several output directories.
+    """
+    dirs = [tmp_path / "a", tmp_path / "b"]
+    cmd = [
+        sys.executable, str(SCRIPT), *map(str, dirs),
+        "--files_count", "5",
+        "--data_schema", SCHEMA,
+        "--data_lines", "2",
+        "--no_log_file"
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    assert result.returncode == 0, f"Stderr:\n{result.stderr}"
+    assert len(list(dirs[0].glob("*.jsonl"))) == 3
+    assert len(list(dirs[1].glob("*.jsonl"))) == 2
+
+
+def test_append_and_add_files(tmp_path):
+    """
+    --append grows every file and --add_files continues the numbering,
+    both driven by the metadata of the first run.
+    """
+    base = [
+        sys.executable, str(SCRIPT), str(tmp_path),
+        "--data_schema", SCHEMA,
+        "--format", "csv",
+        "--no_log_file"
+    ]
+
+    def run(*extra):
+        return subprocess.run(base + list(extra),
+                              capture_output=True, text=True)
+
+    result = run("--files_count", "2", "--data_lines", "3")
+    assert result.returncode == 0, f"Stderr:\n{result.stderr}"
+
+    result = run("--append", "--data_lines", "2", "--multiprocessing", "2")
+    assert result.returncode == 0, f"Stderr:\n{result.stderr}"
+    result = run("--add_files", "--files_count", "1", "--data_lines", "4")
+    assert result.returncode == 0, f"Stderr:\n{result.stderr}"
+
+    files = sorted(tmp_path.glob("*.csv"))
+    assert [f.name for f in files] == ["data_1.csv", "data_2.csv",
+                                       "data_3.csv"]
+    for f, lines in zip(files, [5, 5, 4]):
+        rows = f.read_text().splitlines()
+        assert rows[0] == "x,y" and "x,y" not in rows[1:]
+        assert len(rows) == lines + 1
+
+    meta = json.loads((tmp_path / ".data.meta.json").read_text())
+    assert meta["next_index"] == 3
+    assert meta["files"] == {"data_1.csv": 5, "data_2.csv": 5,
+                             "data_3.csv": 4}
+
+    # Growing with another schema (or without metadata) is refused
+    result = run("--append", "--data_schema", '{"z": "int:rand"}')
+    assert result.returncode == 1
+    assert "another schema" in result.stderr
+    result = run("--append", "--file_name", "missing")
+    assert result.returncode == 1
+    assert "No metadata" in result.stderr
+
+
+def test_add_files_with_byte_budget(tmp_path):
+    """
+    --add_files with --total_bytes numbers the new files after the
+    existing ones.
+    """
+    base = [
+        sys.executable, str(SCRIPT), str(tmp_path),
+        "--data_schema", SCHEMA,
+        "--target_bytes", "1000",
+        "--total_bytes", "2000",
+        "--no_log_file"
+    ]
+
+    def indices():
+        return {int(f.stem.split("_")[1]) for f in tmp_path.glob("*.jsonl")}
+
+    result = subprocess.run(base, capture_output=True, text=True)
+    assert result.returncode == 0, f"Stderr:\n{result.stderr}"
+    first = indices()
+    result = subprocess.run(base + ["--add_files"],
+                            capture_output=True, text=True)
+    assert result.returncode == 0, f"Stderr:\n{result.stderr}"
+
+    added = indices() - first
+    assert (first, added) == ({1, 2}, {3, 4})
+    meta = json.loads((tmp_path / ".data.meta.json").read_text())
+    assert meta["next_index"] == 4
+    assert len(meta["files"]) == len(first) + len(added)
+    assert sum(meta["files"].values()) == sum(
+        len(f.read_text().splitlines()) for f in tmp_path.glob("*.jsonl")
+    )
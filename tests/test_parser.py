@@ -1,6 +1,6 @@
 import pytest
 from tests.conftest import get_test_logger
-from magicgenerator.parser import SchemaParser, SchemaField
+from magicgenerator.parser import SchemaParser, SchemaField, flatten_schema
 
 
 @pytest.mark.parametrize("raw,expected", [
@@ -39,6 +39,18 @@ def test_parser_str_modes(raw, expected):
      ),
     ("int:42",
      SchemaField(type="int", mode="constant", args=[], const=42)
+     ),
+    ("int:normal(100, 15)",
+     SchemaField(type="int", mode="normal", args=[100.0, 15.0])
+     ),
+    ("int:zipf(1.1,1000)",
+     SchemaField(type="int", mode="zipf", args=[1.1, 1000.0])
+     ),
+    ("int:exp(0.5)",
+     SchemaField(type="int", mode="exp", args=[0.5])
+     ),
+    ("int:lognormal(3,1)",
+     SchemaField(type="int", mode="lognormal", args=[3.0, 1.0])
      )
 ])
 def test_parse_int_modes(raw, expected):
@@ -65,7 +77,18 @@ def test_parse_timestamp_ignores_extra(caplog):
     "foo:bar",
     "str:rand(1,2)",
     "int:hello",
-    "int:rand(a,b)"
+    "int:rand(a,b)",
+    "int:normal(1)",
+    "int:normal(0,-1)",
+    "int:zipf(0,10)",
+    "int:zipf(1.5,2.5)",
+    "int:exp(-1)",
+    "int:exp(x)",
+    "int:normal(1e30,1)",
+    "int:normal(0,1e18)",
+    "int:lognormal(1000,1)",
+    "int:lognormal(40,1)",
+    "int:exp(1e-30)"
 ])
 def test_parse_errors(raw):
     """
@@ -73,3 +96,53 @@ def test_parse_errors(raw):
     """
     with pytest.raises(SystemExit):
         SchemaParser.parse_field_spec("field_name", raw)
+
+
+@pytest.mark.parametrize("raw", [
+    "int:normal(-1e18,1e16)",
+    "int:lognormal(30,1)",
+    "int:exp(1e-16)"
+])
+def test_wide_distributions_fit_int64(raw):
+    """
+    Distributions whose draws fit in int64 are accepted.
+    """
+    sf = SchemaParser.parse_field_spec("field_name", raw)
+    assert all(abs(v) < 2 ** 63 for v in sf.sampler.draw(1000))
+
+
+def test_build_nested_schema():
+    """
+    Nested objects and arrays (of scalars, arrays and objects) are parsed
+    recursively; flatten_schema names object members by their path.
+    """
+    model = SchemaParser.build_schema_model({
+        "user": {"id": "int:rand(1,9)", "geo": {"cc": "str:DE"}},
+        "tags": "array:rand(0,3):str:[\"a\",\"b\"]",
+        "grid": "array:2:array:3:int:1",
+        "items": "array:1:{\"sku\": \"str:rand\"}",
+    })
+    assert model["user"].items["geo"].items["cc"].const == "DE"
+    assert model["tags"].args == [0, 3]
+    assert model["tags"].items.mode == "choice"
+    assert model["grid"].items.args == [3, 3]
+    assert model["items"].items.items["sku"].mode == "rand_uuid"
+    assert [name for name, _ in flatten_schema(model)] == [
+        "user.id", "user.geo.cc", "tags", "grid", "items"
+    ]
+
+
+@pytest.mark.parametrize("raw", [
+    "array:int:1",
+    "array:x:int:1",
+    "array:rand(3,1):int:1",
+    "array:2:",
+    "array:2:{bad json}",
+    "array:2:{\"a\": 1}",
+])
+def test_parse_array_errors(raw):
+    """
+    Malformed array counts or element specs raise SystemExit.
+    """
+    with pytest.raises(SystemExit):
+        SchemaParser.parse_field_spec("field_name", raw)
@@ -0,0 +1,74 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+from magicgenerator.parser import SchemaParser
+from magicgenerator.generator import DataGenerator
+from magicgenerator.partition import PartitionWriter, partition_dir_name
+
+SCRIPT = Path(__file__).parent.parent / "main.py"
+SCHEMA = {"region": "str:[\"eu\",\"us\",\"apac\"]", "n": "int:rand(1,9)"}
+
+
+def test_partition_dir_name():
+    """
+    Values are escaped for use as a path segment; empty values get
+    a dedicated partition.
+    """
+    assert partition_dir_name("region", "eu") == "region=eu"
+    assert partition_dir_name("path", "a/b") == "path=a%2Fb"
+    assert partition_dir_name("x", None) == "x=__null__"
+
+
+def test_writer_lru_reopens_for_append(tmp_path):
+    """
+    With one open handle and no buffering, evicted partitions are
+    reopened in append mode and keep a single header.
+    """
+    with PartitionWriter(tmp_path, "k", "f.csv", header=b"k\n",
+                         max_open=1, buffer_bytes=0) as w:
+        for value in ["a", "b", "a", "b", "a"]:
+            w.write(value, f"{value}\n".encode())
+    assert (tmp_path / "k=a" / "f.csv").read_text() == "k\na\na\na\n"
+    assert (tmp_path / "k=b" / "f.csv").read_text() == "k\nb\nb\n"
+
+
+def test_write_partitioned_routes_by_value(tmp_path):
+    """
+    Every record lands in the directory of its own value.
+    """
+    gen = DataGenerator(SchemaParser.build_schema_model(SCHEMA))
+    paths = gen.write_partitioned(tmp_path, "data.jsonl", 3000, "region")
+    assert sorted(p.parent.name for p in paths) == [
+        "region=apac", "region=eu", "region=us"
+    ]
+    total = 0
+    for path in paths:
+        value = path.parent.name.split("=", 1)[1]
+        for line in path.read_text().splitlines():
+            assert json.loads(line)["region"] == value
+            total += 1
+    assert total == 3000
+
+
+def test_cli_partition_by(tmp_path):
+    """
+    --partition_by writes each generated file into every partition.
+    """
+    cmd = [
+        sys.executable, str(SCRIPT), str(tmp_path),
+        "--files_count", "2",
+        "--data_schema", json.dumps(SCHEMA),
+        "--data_lines", "300",
+        "--partition_by", "region",
+        "--no_log_file"
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    assert result.returncode == 0, f"Stderr:\n{result.stderr}"
+
+    files = sorted(str(p.relative_to(tmp_path))
+                   for p in tmp_path.rglob("*.jsonl"))
+    assert files == [
+        f"region={r}/data_{i}.jsonl"
+        for r in ["apac", "eu", "us"] for i in (1, 2)
+    ]
@@ -0,0 +1,73 @@
+import argparse
+import io
+import json
+import pytest
+from magicgenerator.parser import SchemaParser
+from magicgenerator.generator import DataGenerator
+from magicgenerator.rate import parse_rate, TokenBucket, stream_at_rate
+
+
+class FakeClock:
+    """Monotonic clock advanced only by the fake sleep."""
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("100", 100.0),
+    ("50000/s", 50000.0),
+    ("120/m", 2.0),
+    ("7200/h", 2.0),
+])
+def test_parse_rate(raw, expected):
+    """
+    Rates with and without a unit are converted to records per second.
+    """
+    assert parse_rate(raw) == expected
+
+
+@pytest.mark.parametrize("raw", ["fast", "10/d", "0/s", "-5"])
+def test_parse_rate_invalid(raw):
+    """
+    Malformed or non-positive rates are rejected.
+    """
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_rate(raw)
+
+
+def test_token_bucket_batches_without_drift():
+    """
+    Tokens are handed out in batches and the long-run rate matches
+    the target exactly.
+    """
+    clock = FakeClock()
+    bucket = TokenBucket(1000, clock=clock, sleep=clock.sleep)
+    taken = 0
+    batches = 0
+    while taken < 10000:
+        taken += bucket.take(10000 - taken, tick=0.01)
+        batches += 1
+    assert taken == 10000
+    assert clock.now == pytest.approx(10.0, rel=0.01)
+    # ~10 records per 10ms tick, not one wake-up per record
+    assert batches < 1100
+
+
+def test_stream_at_rate_limit():
+    """
+    Stops after `limit` valid JSON lines and reports the target rate.
+    """
+    model = SchemaParser.build_schema_model({"a": "int:rand(1,3)"})
+    out = io.BytesIO()
+    report = stream_at_rate(DataGenerator(model), out, rate=2000, limit=50)
+    lines = out.getvalue().splitlines()
+    assert len(lines) == 50
+    assert all(json.loads(line)["a"] in {1, 2, 3} for line in lines)
+    assert report.emitted == 50
+    assert report.target_rate == 2000
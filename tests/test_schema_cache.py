@@ -0,0 +1,95 @@
+import json
+import pickle
+import pytest
+from magicgenerator import schema_cache
+from magicgenerator.parser import SchemaParser, schema_hash
+from magicgenerator.schema_cache import (
+    ARTIFACT_SUFFIX, load_schema_model, schema_key
+)
+
+RAW = {"id": "int:rand(1,9)", "tag": 'str:["a","b"]',
+       "n": "int:zipf(1.2,50)",
+       "o": {"xs": "array:rand(1,2):int:rand(0,3)", "c": "int:7"}}
+SCHEMA = json.dumps(RAW)
+
+
+@pytest.fixture(autouse=True)
+def signing_key(tmp_path, monkeypatch):
+    """Keep the artifact signing key out of the real home directory."""
+    key_file = tmp_path / "key" / "cache.key"
+    monkeypatch.setattr(schema_cache, "KEY_FILE", str(key_file))
+    return key_file
+
+
+def _fail(*args):
+    raise AssertionError("schema was parsed again")
+
+
+def test_second_load_uses_cache(tmp_path, monkeypatch):
+    """
+    The compiled model is stored once and loaded without reading the
+    schema as JSON again.
+    """
+    cache = tmp_path / "cache"
+    first, first_hash = load_schema_model(SCHEMA, cache)
+    assert first_hash == schema_hash(RAW)
+    assert len(list(cache.glob(f"*{ARTIFACT_SUFFIX}"))) == 1
+
+    monkeypatch.setattr(SchemaParser, "load_schema", _fail)
+    monkeypatch.setattr(SchemaParser, "build_schema_model", _fail)
+    second, second_hash = load_schema_model(SCHEMA, cache)
+    assert (second, second_hash) == (first, first_hash)
+    assert second["n"].sampler() in range(1, 51)
+
+
+def test_schema_file_is_keyed_by_content(tmp_path):
+    """
+    A schema file is keyed by its text, not by its path.
+    """
+    path = tmp_path / "schema.json"
+    path.write_text(SCHEMA)
+    load_schema_model(str(path), tmp_path / "cache")
+    [artifact] = (tmp_path / "cache").iterdir()
+    assert artifact.name == schema_key(SCHEMA.encode()) + ARTIFACT_SUFFIX
+
+
+def test_key_depends_on_cache_format(monkeypatch):
+    """
+    Artifacts of another cache format are never reused.
+    """
+    before = schema_key(b"{}")
+    monkeypatch.setattr(schema_cache, "CACHE_FORMAT", -1)
+    assert schema_key(b"{}") != before
+
+
+@pytest.mark.parametrize("content", [b"", b"not a pickle", b"MGSCHEMA"])
+def test_broken_artifact_is_rebuilt(tmp_path, content):
+    """
+    An unreadable artifact is ignored and replaced.
+    """
+    artifact = tmp_path / f"{schema_key(SCHEMA.encode())}{ARTIFACT_SUFFIX}"
+    artifact.write_bytes(content)
+    model, _ = load_schema_model(SCHEMA, tmp_path)
+    assert set(model) == {"id", "tag", "n", "o"}
+    assert schema_cache.read_artifact(artifact)[0] == model
+
+
+class _Boom:
+    def __reduce__(self):
+        return _fail, ()
+
+
+def test_unsigned_artifact_is_not_unpickled(tmp_path, signing_key):
+    """
+    An artifact signed with another key (e.g. planted in a shared cache
+    directory) is never unpickled.
+    """
+    artifact = tmp_path / f"{schema_key(SCHEMA.encode())}{ARTIFACT_SUFFIX}"
+    artifact.write_bytes(b"MGSCHEMA" + bytes(32) + pickle.dumps(_Boom()))
+    assert schema_cache.read_artifact(artifact) is None
+
+    # A new key invalidates every artifact signed with the old one
+    load_schema_model(SCHEMA, tmp_path)
+    assert schema_cache.read_artifact(artifact) is not None
+    signing_key.unlink()
+    assert schema_cache.read_artifact(artifact) is None
@@ -0,0 +1,211 @@
+import http.client
+import json
+import socket
+import threading
+import pytest
+from magicgenerator import server as server_mod
+from magicgenerator.server import GeneratorServer, schema_hash
+from magicgenerator.sinks import SinkSpec
+
+SCHEMA = {"x": "int:rand(1,3)", "y": 'str:["a","b"]'}
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    """HTTPConnection over a UNIX socket."""
+
+    def __init__(self, path):
+        super().__init__("localhost")
+        self._path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self._path)
+
+
+@pytest.fixture
+def running():
+    """Start a server on a free port; yields a connection factory."""
+    started = []
+
+    def start(listen=SinkSpec("tcp", "127.0.0.1", 0), workers=1):
+        srv = GeneratorServer(listen, workers)
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        started.append(srv)
+        if listen.kind == "unix":
+            return srv, lambda: _UnixConnection(listen.target)
+        port = int(srv.address.rpartition(":")[2])
+        return srv, lambda: http.client.HTTPConnection("127.0.0.1", port)
+
+    yield start
+    for srv in started:
+        srv.shutdown()
+        srv.close()
+
+
+def _post(conn, payload):
+    conn.request("POST", "/generate", body=json.dumps(payload))
+    resp = conn.getresponse()
+    return resp, resp.read()
+
+
+def test_schema_hash_ignores_key_order():
+    """
+    The cache key depends on the schema content only.
+    """
+    assert schema_hash({"a": "int:", "b": "str:"}) \
+        == schema_hash({"b": "str:", "a": "int:"})
+
+
+def test_generate_and_cache(running):
+    """
+    Streams the requested lines and parses each schema only once.
+    """
+    srv, connect = running()
+    conn = connect()
+    resp, body = _post(conn, {"schema": SCHEMA, "data_lines": 5})
+    assert resp.status == 200
+    assert resp.getheader("X-Schema-Cache") == "miss"
+    lines = body.decode().splitlines()
+    assert len(lines) == 5
+    assert all(set(json.loads(line)) == {"x", "y"} for line in lines)
+
+    # Same connection (keep-alive), schema as a JSON string this time
+    resp, body = _post(conn, {"schema": json.dumps(SCHEMA), "data_lines": 2,
+                              "format": "csv"})
+    assert resp.getheader("X-Schema-Cache") == "hit"
+    assert body.decode().splitlines()[0] == "x,y"
+    assert srv.cache.hits == 1 and srv.cache.misses == 1
+
+
+@pytest.mark.parametrize("payload", [
+    {"schema": {"x": "bad"}},
+    {"schema": SCHEMA, "data_lines": -1},
+    {"schema": SCHEMA, "format": "xml"},
+    {"schema": SCHEMA, "pool_size": 10, "pool_patch": ["nope"]},
+    {"schema": SCHEMA, "pool_size": 10, "pool_patch": 5},
+    {"schema": SCHEMA, "pool_patch": "x"},
+    {"schema": SCHEMA, "pool_patch": [["x"]]},
+    {"schema": SCHEMA, "format": ["csv"]},
+    {"schema": SCHEMA, "format": {"a": 1}},
+])
+def test_bad_request(running, payload):
+    """
+    Invalid requests are answered with 400 and the server keeps serving.
+    """
+    _, connect = running()
+    resp, body = _post(connect(), payload)
+    assert resp.status == 400
+    assert "error" in json.loads(body)
+    resp, _ = _post(connect(), {"schema": SCHEMA, "data_lines": 1})
+    assert resp.status == 200
+
+
+def test_unix_socket(running, tmp_path):
+    """
+    Serves over a UNIX socket and removes it on close.
+    """
+    path = tmp_path / "gen.sock"
+    srv, connect = running(SinkSpec("unix", str(path)))
+    resp, body = _post(connect(), {"schema": SCHEMA, "data_lines": 3})
+    assert resp.status == 200 and len(body.splitlines()) == 3
+    srv.shutdown()
+    srv.close()
+    assert not path.exists()
+
+
+def test_unix_socket_keeps_regular_file(tmp_path):
+    """
+    A unix listen path taken by a regular file is refused, not deleted.
+    """
+    path = tmp_path / "notes.txt"
+    path.write_text("keep")
+    with pytest.raises(FileExistsError):
+        GeneratorServer(SinkSpec("unix", str(path)))
+    assert path.read_text() == "keep"
+
+
+def test_worker_compiles_schema_once(monkeypatch):
+    """
+    Pool tasks carry the schema hash; a worker parses each schema once.
+    """
+    parsed = []
+    build = server_mod.SchemaParser.build_schema_model
+    monkeypatch.setattr(server_mod.SchemaParser, "build_schema_model",
+                        lambda raw: parsed.append(raw) or build(raw))
+    monkeypatch.setattr(server_mod, "_worker_generators",
+                        server_mod.OrderedDict())
+    options = {"output_format": "jsonl", "pool_size": 0, "pool_patch": ()}
+    key = schema_hash(SCHEMA)
+    for _ in range(3):
+        body = server_mod._encode_chunk(key, SCHEMA, options, 4)
+        assert len(body.splitlines()) == 4
+    assert len(parsed) == 1
+
+
+def test_warm_pool_keeps_order(running, monkeypatch):
+    """
+    Large requests are split over the warm pool; all lines arrive.
+    """
+    monkeypatch.setattr(server_mod, "PARALLEL_MIN_LINES", 10)
+    monkeypatch.setattr(server_mod, "PARALLEL_CHUNK", 7)
+    _, connect = running(workers=2)
+    resp, body = _post(connect(), {"schema": SCHEMA, "data_lines": 100})
+    assert resp.status == 200
+    assert len(body.splitlines()) == 100
+
+
+@pytest.mark.parametrize("length", ["abc", "-5"])
+def test_bad_content_length(running, length):
+    """
+    A malformed or negative Content-Length is answered with 400.
+    """
+    _, connect = running()
+    conn = connect()
+    conn.putrequest("POST", "/generate")
+    conn.putheader("Content-Length", length)
+    conn.endheaders()
+    resp = conn.getresponse()
+    assert resp.status == 400
+    assert "Content-Length" in json.loads(resp.read())["error"]
+    resp, _ = _post(connect(), {"schema": SCHEMA, "data_lines": 1})
+    assert resp.status == 200
+
+
+def test_generator_compiled_once(running, monkeypatch):
+    """
+    Repeated requests reuse the generator compiled for their schema
+    and options.
+    """
+    compiled = []
+    real = server_mod.DataGenerator
+    monkeypatch.setattr(server_mod, "DataGenerator",
+                        lambda *a, **kw: compiled.append(kw) or real(*a, **kw))
+    _, connect = running()
+    conn = connect()
+    for _ in range(3):
+        resp, _ = _post(conn, {"schema": SCHEMA, "data_lines": 2})
+        assert resp.status == 200
+    _post(conn, {"schema": SCHEMA, "data_lines": 2, "format": "csv"})
+    assert len(compiled) == 2
+
+
+def test_broken_pool_is_replaced(running, monkeypatch):
+    """
+    After a pool worker dies, the request in flight still gets all its
+    lines and later requests run on a new pool.
+    """
+    monkeypatch.setattr(server_mod, "PARALLEL_MIN_LINES", 10)
+    monkeypatch.setattr(server_mod, "PARALLEL_CHUNK", 7)
+    srv, connect = running(workers=2)
+    broken = srv._pool
+    for proc in list(broken._processes.values()):
+        proc.kill()
+        proc.join()
+    resp, body = _post(connect(), {"schema": SCHEMA, "data_lines": 100})
+    assert resp.status == 200
+    assert len(body.splitlines()) == 100
+    assert srv._pool is not broken
+
+    resp, body = _post(connect(), {"schema": SCHEMA, "data_lines": 100})
+    assert resp.status == 200
+    assert len(body.splitlines()) == 100
@@ -0,0 +1,155 @@
+import argparse
+import json
+import os
+import socket
+import threading
+import pytest
+from magicgenerator.parser import SchemaParser
+from magicgenerator.generator import DataGenerator
+from magicgenerator.sinks import parse_sink, open_sink, SinkSpec
+
+
+@pytest.fixture
+def gen():
+    model = SchemaParser.build_schema_model(
+        {"x": "int:rand(1,3)", "y": "str:[\"a\",\"b\"]"}
+    )
+    return DataGenerator(model)
+
+
+def _accept_and_read(server, received):
+    conn, _ = server.accept()
+    with conn:
+        chunks = []
+        while data := conn.recv(65536):
+            chunks.append(data)
+    received.append(b"".join(chunks))
+
+
+def _check_lines(payload, expected):
+    lines = payload.decode("utf-8").splitlines()
+    assert len(lines) == expected
+    for line in lines:
+        d = json.loads(line)
+        assert d["x"] in {1, 2, 3}
+        assert d["y"] in {"a", "b"}
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("unix:/tmp/gen.sock", SinkSpec("unix", "/tmp/gen.sock")),
+    ("tcp://127.0.0.1:9000", SinkSpec("tcp", "127.0.0.1", 9000)),
+    ("tcp://[::1]:9000", SinkSpec("tcp", "::1", 9000)),
+    ("fifo:/tmp/gen.fifo", SinkSpec("fifo", "/tmp/gen.fifo")),
+    ("file:/tmp/out.jsonl", SinkSpec("file", "/tmp/out.jsonl")),
+    ("stdout", SinkSpec("stdout", "-")),
+    ("-", SinkSpec("stdout", "-")),
+])
+def test_parse_sink(raw, expected):
+    """
+    Supported sink specs are parsed into SinkSpec objects.
+    """
+    assert parse_sink(raw) == expected
+
+
+@pytest.mark.parametrize("raw", [
+    "disk:/tmp/x", "tcp://host", "tcp://host:port", "unix:", "/tmp/x"
+])
+def test_parse_sink_invalid(raw):
+    """
+    Unknown schemes and malformed addresses are rejected.
+    """
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_sink(raw)
+
+
+def test_tcp_sink(gen):
+    """
+    All lines arrive at a local TCP listener, sent in batches.
+    """
+    server = socket.create_server(("127.0.0.1", 0))
+    port = server.getsockname()[1]
+    received = []
+    t = threading.Thread(target=_accept_and_read, args=(server, received))
+    t.start()
+    with open_sink(parse_sink(f"tcp://127.0.0.1:{port}")) as sink:
+        gen.write_sink(sink, data_lines=2500, batch_size=1000)
+    t.join(5)
+    server.close()
+    _check_lines(received[0], 2500)
+
+
+def test_unix_sink(gen, tmp_path):
+    """
+    All lines arrive at a local UNIX socket listener.
+    """
+    path = str(tmp_path / "gen.sock")
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+    received = []
+    t = threading.Thread(target=_accept_and_read, args=(server, received))
+    t.start()
+    with open_sink(parse_sink(f"unix:{path}")) as sink:
+        gen.write_sink(sink, data_lines=10, batch_size=3)
+    t.join(5)
+    server.close()
+    _check_lines(received[0], 10)
+
+
+def test_fifo_sink(gen, tmp_path):
+    """
+    A missing FIFO is created and a reader receives every line.
+    """
+    path = tmp_path / "gen.fifo"
+    received = []
+
+    def reader():
+        while not path.exists():
+            pass
+        with open(path, "rb") as f:
+            received.append(f.read())
+
+    t = threading.Thread(target=reader)
+    t.start()
+    with open_sink(parse_sink(f"fifo:{path}")) as sink:
+        gen.write_sink(sink, data_lines=20, batch_size=7)
+    t.join(5)
+    _check_lines(received[0], 20)
+
+
+def test_fifo_sink_rejects_regular_file(tmp_path):
+    """
+    An existing non-FIFO path is refused.
+    """
+    path = tmp_path / "regular"
+    path.write_text("x")
+    with pytest.raises(OSError):
+        open_sink(parse_sink(f"fifo:{path}"))
+    assert os.path.isfile(path)
+
+
+def test_sink_is_abstract():
+    """
+    A sink must implement write and close.
+    """
+    from magicgenerator.sinks import Sink
+
+    class Incomplete(Sink):
+        def write(self, buf):
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_file_sink_at_rate(gen, tmp_path):
+    """
+    Sinks can be paced like stdout: --rate streams into them.
+    """
+    from magicgenerator.rate import stream_at_rate
+
+    path = tmp_path / "out.jsonl"
+    with open_sink(parse_sink(f"file:{path}")) as sink:
+        report = stream_at_rate(gen, sink, rate=5000, limit=40)
+    assert report.emitted == 40
+    _check_lines(path.read_bytes(), 40)
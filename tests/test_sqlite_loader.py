@@ -0,0 +1,109 @@
+import json
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+from magicgenerator.parser import SchemaParser
+from magicgenerator.sqlite_loader import (
+    load_rows,
+    merge_shards,
+    create_indexes,
+    shard_path
+)
+
+SCRIPT = Path(__file__).parent.parent / "main.py"
+
+
+@pytest.fixture
+def schema_model():
+    return SchemaParser.build_schema_model({
+        "id": "int:rand(1,100)",
+        "name": "str:[\"a\",\"b\"]",
+        "ts": "timestamp:"
+    })
+
+
+def test_load_rows_typed_table(tmp_path, schema_model):
+    """
+    Table columns are typed from the schema and all rows are inserted.
+    """
+    db = tmp_path / "out.sqlite"
+    assert load_rows(db, "events", schema_model, 2500, 1000) == 2500
+
+    conn = sqlite3.connect(db)
+    cols = [(r[1], r[2]) for r in conn.execute("PRAGMA table_info(events)")]
+    assert cols == [("id", "INTEGER"), ("name", "TEXT"), ("ts", "REAL")]
+    assert conn.execute("SELECT COUNT(*) FROM events").fetchone() == (2500,)
+    row = conn.execute("SELECT id, name, ts FROM events LIMIT 1").fetchone()
+    assert 1 <= row[0] <= 100
+    assert row[1] in {"a", "b"}
+    assert isinstance(row[2], float)
+    assert conn.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    conn.close()
+
+
+def test_load_nested_rows(tmp_path):
+    """
+    Nested members get their own columns; arrays are stored as JSON text.
+    """
+    model = SchemaParser.build_schema_model({
+        "user": {"id": "int:rand(1,100)", "name": "str:x"},
+        "tags": "array:2:int:7",
+    })
+    db = tmp_path / "out.sqlite"
+    load_rows(db, "events", model, 10, 5)
+
+    conn = sqlite3.connect(db)
+    cols = [(r[1], r[2]) for r in conn.execute("PRAGMA table_info(events)")]
+    assert cols == [("user.id", "INTEGER"), ("user.name", "TEXT"),
+                    ("tags", "TEXT")]
+    row = conn.execute('SELECT "user.name", tags FROM events').fetchone()
+    assert row == ("x", "[7, 7]")
+    conn.close()
+
+
+def test_merge_shards_and_indexes(tmp_path, schema_model):
+    """
+    Worker shards are merged into the target and removed;
+    indexes are built afterwards.
+    """
+    db = tmp_path / "out.sqlite"
+    shards = []
+    for i, rows in enumerate([30, 20]):
+        path = shard_path(db, i)
+        load_rows(path, "events", schema_model, rows, 7, shard=True)
+        shards.append(path)
+
+    merge_shards(db, "events", schema_model, shards)
+    create_indexes(db, "events", ["name"])
+
+    assert not any(p.exists() for p in shards)
+    conn = sqlite3.connect(db)
+    assert conn.execute("SELECT COUNT(*) FROM events").fetchone() == (50,)
+    indexes = [r[1] for r in conn.execute("PRAGMA index_list(events)")]
+    assert indexes == ["idx_events_name"]
+    conn.close()
+
+
+def test_cli_sqlite_sink(tmp_path):
+    """
+    --sink sqlite: loads data_lines rows into a table named after
+    --file_name.
+    """
+    db = tmp_path / "seed.sqlite"
+    cmd = [
+        sys.executable, str(SCRIPT), str(tmp_path),
+        "--sink", f"sqlite:{db}",
+        "--file_name", "users",
+        "--data_schema", json.dumps({"id": "int:rand", "name": "str:rand"}),
+        "--data_lines", "300",
+        "--sqlite_index", "id",
+        "--no_log_file"
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    assert result.returncode == 0, f"Stderr:\n{result.stderr}"
+
+    conn = sqlite3.connect(db)
+    assert conn.execute("SELECT COUNT(*) FROM users").fetchone() == (300,)
+    conn.close()
@@ -0,0 +1,56 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# Import-time budget for main.py in milliseconds (best of five cold runs);
+# override with MG_STARTUP_BUDGET_MS on unusually slow machines
+STARTUP_BUDGET_MS = float(os.environ.get("MG_STARTUP_BUDGET_MS", 150))
+
+# Modules only some modes need; importing main must not pull them in
+LAZY_MODULES = {
+    "concurrent.futures", "multiprocessing", "sqlite3", "uuid", "ctypes",
+    "http.server", "hashlib", "shutil", "magicgenerator.server",
+    "magicgenerator.estimate", "magicgenerator.sqlite_loader",
+    "magicgenerator.verify", "magicgenerator.fanout",
+    "magicgenerator.columnar", "magicgenerator.checksum", "fcntl",
+}
+
+
+def _import_main(cwd: Path) -> dict:
+    """Import main in a fresh interpreter; return {module: cumulative µs}."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=cwd, capture_output=True, text=True,
+        env={**os.environ, "PYTHONPATH": str(ROOT)}
+    )
+    assert result.returncode == 0, result.stderr
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_import_is_side_effect_free(tmp_path):
+    """
+    Importing main neither writes a log file nor loads mode-specific modules.
+    """
+    times = _import_main(tmp_path)
+    assert list(tmp_path.iterdir()) == []
+    assert not LAZY_MODULES & times.keys()
+
+
+def test_startup_budget(tmp_path):
+    """
+    Importing main stays within the start-up time budget.
+    """
+    best = min(_import_main(tmp_path)["main"] for _ in range(5)) / 1000
+    assert best <= STARTUP_BUDGET_MS, (
+        f"importing main took {best:.1f} ms "
+        f"(budget {STARTUP_BUDGET_MS:.0f} ms)"
+    )
@@ -1,9 +1,14 @@
 import logging
 import os
 import pytest
+from types import SimpleNamespace
 from magicgenerator.utils import (
     validate_output_path,
+    validate_output_paths,
+    assign_dirs,
+    share_workers,
     validate_min,
+    validate_finite,
     cap_multiprocessing,
     clear_old_files,
 )
@@ -31,6 +36,49 @@ def test_validate_output_path_bad_file(tmp_path):
         validate_output_path(str(bad_file))
 
 
+def test_validate_output_paths_dedupes(tmp_path):
+    """
+    Creates every directory and drops repeats of the same directory.
+    """
+    a, b = tmp_path / "a", tmp_path / "b"
+    result = validate_output_paths([str(a), str(b), str(tmp_path / "b/.")])
+    assert result == [a, b]
+    assert a.is_dir() and b.is_dir()
+
+
+def test_assign_dirs_round_robin(tmp_path):
+    """
+    Round-robin assignment cycles through the directories in order.
+    """
+    dirs = [tmp_path / "a", tmp_path / "b"]
+    assert assign_dirs(dirs, 5) == [dirs[0], dirs[1]] * 2 + [dirs[0]]
+
+
+def test_assign_dirs_free_space(tmp_path):
+    """
+    Free-space assignment places files in proportion to the free space.
+    """
+    dirs = [tmp_path / "a", tmp_path / "b"]
+    free = {dirs[0]: 300, dirs[1]: 100}
+    result = assign_dirs(dirs, 8, "free_space",
+                         disk_usage=lambda d: SimpleNamespace(free=free[d]))
+    assert result.count(dirs[0]) == 6
+    assert result.count(dirs[1]) == 2
+
+
+@pytest.mark.parametrize("groups, workers, expected", [
+    ([[1, 2], [3]], 5, ([[1, 2], [3]], [3, 2])),
+    ([[1], [2], [3]], 2, ([[1, 3], [2]], [1, 1])),
+    ([[1], [2]], 0, ([[1, 2]], [1])),
+])
+def test_share_workers(groups, workers, expected):
+    """
+    Device groups share the worker cap and never exceed it in total;
+    with more groups than workers, groups are merged.
+    """
+    assert share_workers(groups, workers) == expected
+
+
 def test_validate_min_too_small(caplog):
     """
     Exits if value is below the minimum.
@@ -41,6 +89,18 @@ def test_validate_min_too_small(caplog):
     assert "must be >= 0" in caplog.text
 
 
+@pytest.mark.parametrize("value", [float("nan"), float("inf"), -float("inf")])
+def test_validate_finite_rejects(caplog, value):
+    """
+    Exits if value is nan or infinite.
+    """
+    get_test_logger("magicgenerator.utils", caplog, logging.ERROR)
+    with pytest.raises(SystemExit) as exc:
+        validate_finite("test", value)
+    assert exc.value.code == 1
+    assert "must be a finite number" in caplog.text
+
+
 def test_cap_multiprocessing_no_cap(monkeypatch):
     """
     Returns requested value if <= CPU count.
@@ -61,17 +121,37 @@ def test_cap_multiprocessing_caps_and_warns(caplog, monkeypatch):
 
 def test_clear_old_files(tmp_path, caplog):
     """
-    Deletes files matching prefix and logs results.
+    Deletes files matching the naming pattern and logs one summary line.
     """
     (tmp_path / "data_1.jsonl").write_text("x")
     (tmp_path / "data_2.jsonl").write_text("x")
+    (tmp_path / "data.jsonl").write_text("x")
+    uuid_name = "data_0b7f4b1e-3c3a-4f7e-9d2a-6f1e2b3c4d5e.jsonl"
+    (tmp_path / uuid_name).write_text("x")
+    (tmp_path / "data_3.csv").write_text("x")
+    (tmp_path / "data_4.tsv").write_text("x")
     (tmp_path / "other.txt").write_text("x")
 
     get_test_logger("magicgenerator.utils", caplog, logging.INFO)
     clear_old_files(tmp_path, "data")
 
     remaining = [p.name for p in tmp_path.iterdir()]
-    assert "other.txt" in remaining
-    for name in remaining:
-        assert not name.startswith("data")
-    assert "Deleted old file" in caplog.text
+    assert remaining == ["other.txt"]
+    assert "Cleared 6 old files" in caplog.text
+    assert len(caplog.records) == 1
+
+
+def test_clear_old_files_exact_match(tmp_path):
+    """
+    Files that only share the prefix are kept.
+    """
+    keep = ["database.jsonl", "data_notes.txt", "data_1.jsonl.bak",
+            "data_x.jsonl"]
+    for name in keep:
+        (tmp_path / name).write_text("x")
+    (tmp_path / "data_3.jsonl").mkdir()
+
+    clear_old_files(tmp_path, "data")
+
+    remaining = sorted(p.name for p in tmp_path.iterdir())
+    assert remaining == sorted(keep + ["data_3.jsonl"])
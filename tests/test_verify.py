@@ -0,0 +1,132 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+from magicgenerator.parser import SchemaParser
+from magicgenerator.generator import DataGenerator
+from magicgenerator.verify import record_check, verify_files, collect_files
+
+SCRIPT = Path(__file__).parent.parent / "main.py"
+SCHEMA = {
+    "id": "str:rand",
+    "n": "int:rand(1,5)",
+    "c": "str:[\"a\",\"b\"]",
+    "k": "int:7",
+    "e": "int:",
+    "ts": "timestamp:",
+    "z": "int:zipf(1.5,10)",
+    "user": {"age": "int:rand(18,60)"},
+    "tags": "array:rand(0,3):int:[1,2]",
+}
+
+
+@pytest.fixture
+def model():
+    return SchemaParser.build_schema_model(SCHEMA)
+
+
+def test_generated_records_are_valid(model):
+    """
+    Everything the generator produces passes the schema checks.
+    """
+    check = record_check(model)
+    gen = DataGenerator(model)
+    assert not any(check(r) for r in gen.iter_records(500))
+
+
+@pytest.mark.parametrize("patch, message", [
+    ({"n": 6}, "n: 6 not in [1, 5]"),
+    ({"n": True}, "is not an int"),
+    ({"c": "x"}, "not one of"),
+    ({"k": 8}, "k: 8 != 7"),
+    ({"e": 0}, "e: 0 != None"),
+    ({"ts": "soon"}, "not a timestamp"),
+    ({"id": "abc"}, "not a uuid4"),
+    ({"z": 11}, "z: 11 not in [1, 10]"),
+    ({"user": {"age": 17}}, "user.age: 17"),
+    ({"user": {}}, "user: fields"),
+    ({"tags": [1, 2, 1, 2]}, "tags: 4 elements"),
+    ({"tags": [3]}, "tags[]: 3 not one of"),
+    ({"extra": 1}, "record: fields"),
+])
+def test_invalid_values_are_reported(model, patch, message):
+    """
+    Values outside the field rules are reported with the field path.
+    """
+    record = DataGenerator(model).generate_record()
+    record.update(patch)
+    err = record_check(model)(record)
+    assert err is not None and message in err
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_verify_files_splits_ranges(tmp_path, model, workers):
+    """
+    Files checked in several byte ranges report the same line counts
+    and file-wide line numbers of bad lines.
+    """
+    gen = DataGenerator(model)
+    good = tmp_path / "data_1.jsonl"
+    gen.write_jsonl_file(good, 300)
+    bad = tmp_path / "data_2.jsonl"
+    lines = gen.encode_batch(300).decode().splitlines()
+    lines[9] = "{broken"
+    lines[100] = ""
+    lines[250] = json.dumps({**json.loads(lines[250]), "n": 0})
+    bad.write_text("\n".join(lines))  # no newline at EOF
+
+    reports = verify_files([good, bad], model, workers=workers,
+                           chunk=1000, max_errors=5, range_size=4096)
+    assert [(r.lines, r.invalid) for r in reports] == [(300, 0), (300, 3)]
+    assert [line for line, _ in reports[1].errors] == [10, 101, 251]
+    assert "not a JSON record" in reports[1].errors[0][1]
+
+
+def test_record_split_across_lines(tmp_path):
+    """
+    A record split over two lines is reported even when another line
+    holding two records keeps the record count equal to the line count.
+    """
+    model = SchemaParser.build_schema_model({"a": "array:rand(0,3):int:[1,2]"})
+    path = tmp_path / "data.jsonl"
+    path.write_text('{"a": [1\n2]}\n{"a": [1]},{"a": [2]}\n{"a": []}\n')
+    [report] = verify_files([path], model)
+    assert (report.lines, report.invalid) == (4, 3)
+    assert [line for line, _ in report.errors] == [1, 2, 3]
+
+
+def test_collect_files(tmp_path):
+    """
+    Directories are searched, partitions included, for the named files.
+    """
+    (tmp_path / "r=eu").mkdir()
+    for name in ["data_1.jsonl", "r=eu/data_2.jsonl", "other_1.jsonl",
+                 "data_1.csv"]:
+        (tmp_path / name).touch()
+    assert collect_files([str(tmp_path)], "data") == [
+        tmp_path / "data_1.jsonl", tmp_path / "r=eu" / "data_2.jsonl"
+    ]
+
+
+def test_verify_command(tmp_path):
+    """
+    `main.py verify` exits 0 on generated files and 1 on a bad record.
+    """
+    schema = json.dumps(SCHEMA)
+    gen_cmd = [sys.executable, str(SCRIPT), str(tmp_path), "-n", "2",
+               "--data_lines", "50", "--data_schema", schema, "--no_log_file"]
+    assert subprocess.run(gen_cmd, capture_output=True).returncode == 0
+
+    verify = [sys.executable, str(SCRIPT), "verify", str(tmp_path),
+              "--data_schema", schema, "--no_log_file"]
+    result = subprocess.run(verify, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert "Verified 2 files, 100 lines: all valid" in result.stderr
+
+    with open(tmp_path / "data_2.jsonl", "a") as f:
+        f.write('{"id": 1}\n')
+    result = subprocess.run(verify, capture_output=True, text=True)
+    assert result.returncode == 1
+    assert "data_2.jsonl: 1 of 51 lines invalid" in result.stderr
+    assert "line 51: record: fields" in result.stderr
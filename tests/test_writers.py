@@ -0,0 +1,70 @@
+import os
+import pytest
+from magicgenerator.writers import StreamingWriter, open_output
+from magicgenerator.parser import SchemaParser
+from magicgenerator.generator import DataGenerator
+
+
+@pytest.mark.parametrize("mode", ["dontneed", "direct"])
+@pytest.mark.parametrize("expected_size", [None, 200_000])
+def test_streaming_writer_content(tmp_path, mode, expected_size):
+    """
+    Data written in odd-sized pieces comes back byte for byte, and
+    preallocation / O_DIRECT padding is trimmed on close.
+    """
+    path = tmp_path / "out.bin"
+    pieces = [os.urandom(n) for n in (1, 4095, 4097, 10_000, 30_000, 7)]
+    with StreamingWriter(path, mode, chunk=8192,
+                         expected_size=expected_size) as f:
+        for piece in pieces:
+            f.write(piece)
+    assert path.read_bytes() == b"".join(pieces)
+
+
+def test_streaming_writer_append(tmp_path):
+    """
+    Append mode keeps the existing content.
+    """
+    path = tmp_path / "out.bin"
+    path.write_bytes(b"head\n")
+    with StreamingWriter(path, "dontneed", chunk=4096, append=True) as f:
+        f.write(b"tail\n")
+    assert path.read_bytes() == b"head\ntail\n"
+
+
+def test_direct_append_falls_back(tmp_path, caplog):
+    """
+    direct cannot append; the fallback to dontneed says so.
+    """
+    path = tmp_path / "out.bin"
+    path.write_bytes(b"head\n")
+    with StreamingWriter(path, "direct", append=True) as f:
+        f.write(b"tail\n")
+    assert path.read_bytes() == b"head\ntail\n"
+    assert "cannot append" in caplog.text
+    assert "not available" not in caplog.text
+
+
+@pytest.mark.parametrize("mode", ["buffered", "dontneed", "direct"])
+def test_generator_write_modes(tmp_path, mode):
+    """
+    Every write mode produces the same kind of file.
+    """
+    model = SchemaParser.build_schema_model({"a": "int:rand(1,3)"})
+    gen = DataGenerator(model, write_mode=mode)
+    out = tmp_path / "out.jsonl"
+    gen.write_jsonl_file(out, data_lines=5000)
+    assert len(out.read_text().splitlines()) == 5000
+
+    lines, written = gen.write_jsonl_bytes(out, 12_345)
+    assert out.stat().st_size == written <= 12_345
+
+
+def test_open_output_buffered(tmp_path):
+    """
+    buffered mode is a regular binary file.
+    """
+    path = tmp_path / "plain.bin"
+    with open_output(path) as f:
+        f.write(b"x")
+    assert path.read_bytes() == b"x"